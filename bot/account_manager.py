@@ -107,6 +107,15 @@ class AccountManager:
         """
         return self.get_settings().get('max_concurrent_accounts', 3)
     
+    def get_slot_stagger_minutes(self) -> float:
+        """
+        Get the window slot starts are spread over.
+        
+        Returns:
+            Stagger window in minutes (0 = every account starts on time)
+        """
+        return self.get_settings().get('slot_stagger_minutes', 0)
+    
     def get_global_rate_limits(self) -> Dict:
         """
         Get global rate limits.
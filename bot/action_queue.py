@@ -0,0 +1,272 @@
+"""
+Deferred action queue
+Per-account queue of write actions with earliest-execution times and cool-downs
+"""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import random
+from datetime import datetime
+from typing import AsyncContextManager, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from .clock import SYSTEM_CLOCK, Clock
+
+logger = logging.getLogger(__name__)
+
+# Action kinds
+REPLY = 'reply'
+LIKE = 'like'
+FOLLOW = 'follow'
+
+# Wait after a successful reply before the next one (was an inline sleep)
+DEFAULT_COOLDOWNS = {REPLY: (600, 900)}
+
+
+class DeferredAction:
+    """One queued action"""
+    
+    __slots__ = ('kind', 'run', 'not_before', 'key', 'description', 'seq')
+    
+    def __init__(self, kind: str, run: Callable[[], Awaitable], not_before: float,
+                 key: Optional[str], description: str, seq: int):
+        self.kind = kind
+        self.run = run
+        self.not_before = not_before
+        self.key = key
+        self.description = description
+        self.seq = seq
+
+
+class DeferredActionQueue:
+    """
+    Replies, likes and follows of one account, run by a background worker.
+    
+    A slot enqueues its actions and returns; the worker runs them one at a
+    time, each no earlier than its `delay` and no earlier than the
+    cool-down of its kind allows (e.g. 10-15 minutes between replies).
+    Per-action safety delays and rate limits still apply inside the
+    actions themselves (TwitterClient). Actions are kept in memory only:
+    whatever is still pending when the bot stops is dropped.
+    
+    With a `permit` (SlotScheduler.permit for the account) each action
+    runs holding one of the scheduler's max_concurrent places, so queued
+    work counts toward the fleet's concurrency cap like slots do.
+    """
+    
+    def __init__(self, account_id: str = 'default',
+                 cooldowns: Optional[Dict[str, Sequence[float]]] = None,
+                 max_pending: int = 100, clock: Clock = SYSTEM_CLOCK):
+        """
+        Args:
+            account_id: Account the actions belong to (for logs)
+            cooldowns: kind -> (min, max) seconds to wait after a successful action of that kind
+            max_pending: Actions queued at most; further ones are refused
+            clock: Time source and sleep (a VirtualClock for simulations)
+        """
+        self.account_id = account_id
+        self.cooldowns = {kind: tuple(span) for kind, span in (cooldowns or DEFAULT_COOLDOWNS).items()}
+        self.max_pending = max_pending
+        self.clock = clock
+        
+        self._pending: List[DeferredAction] = []
+        self._keys = set()
+        self._seq = itertools.count()
+        self._cooldown_until: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._permit: Optional[Callable[[], AsyncContextManager]] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        
+        # Stats per kind
+        self.done: Dict[str, int] = {}
+        self.failed: Dict[str, int] = {}
+        self.dropped = 0
+    
+    @classmethod
+    def from_settings(cls, settings: Dict, account_id: str = 'default',
+                      clock: Clock = SYSTEM_CLOCK) -> Optional['DeferredActionQueue']:
+        """Build from settings.yaml `action_queue`, or None if disabled"""
+        if not settings.get('enabled', True):
+            return None
+        return cls(
+            account_id=account_id,
+            cooldowns=settings.get('cooldowns', DEFAULT_COOLDOWNS),
+            max_pending=settings.get('max_pending', 100),
+            clock=clock
+        )
+    
+    # ============= QUEUE =============
+    
+    def enqueue(self, kind: str, run: Callable[[], Awaitable], delay: float = 0.0,
+                key: Optional[str] = None, description: str = '') -> bool:
+        """
+        Queue an action
+        
+        Args:
+            kind: REPLY, LIKE, FOLLOW (cool-downs are per kind)
+            run: Coroutine function performing the action; a falsy result counts as failed
+            delay: Seconds from now before it may run
+            key: Refuse the action while another one with this key is pending
+            description: For logs
+        
+        Returns:
+            True if queued
+        """
+        if key is not None and key in self._keys:
+            return False
+        
+        if len(self._pending) >= self.max_pending:
+            logger.warning(f"Action queue full for {self.account_id}, dropping {kind}: {description}")
+            self.dropped += 1
+            return False
+        
+        action = DeferredAction(kind, run, self.clock.time() + delay, key, description, next(self._seq))
+        self._pending.append(action)
+        if key is not None:
+            self._keys.add(key)
+        
+        logger.debug(f"📥 Queued {kind} for {self.account_id}: {description}")
+        if self._idle is not None:
+            self._idle.clear()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return True
+    
+    def pending(self, kind: Optional[str] = None) -> int:
+        """Number of queued actions (of one kind)"""
+        return sum(1 for action in self._pending if kind is None or action.kind == kind)
+    
+    def _ready_at(self, action: DeferredAction) -> float:
+        return max(action.not_before, self._cooldown_until.get(action.kind, 0.0))
+    
+    def _next(self) -> Optional[DeferredAction]:
+        if not self._pending:
+            return None
+        return min(self._pending, key=lambda action: (self._ready_at(action), action.seq))
+    
+    # ============= WORKER =============
+    
+    async def _sleep(self, seconds: float):
+        """Sleep until `seconds` pass or an action is queued"""
+        sleeper = asyncio.ensure_future(self.clock.sleep(seconds))
+        waiter = asyncio.ensure_future(self._wakeup.wait())
+        try:
+            await asyncio.wait({sleeper, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sleeper.cancel()
+            waiter.cancel()
+        self._wakeup.clear()
+    
+    async def _run(self, action: DeferredAction):
+        self._pending.remove(action)
+        self._keys.discard(action.key)
+        
+        try:
+            async with (self._permit() if self._permit else contextlib.nullcontext()):
+                result = await action.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Queued {action.kind} failed for {self.account_id}: {e}")
+            result = None
+        
+        if not result:
+            self.failed[action.kind] = self.failed.get(action.kind, 0) + 1
+            return
+        
+        self.done[action.kind] = self.done.get(action.kind, 0) + 1
+        
+        cooldown = self.cooldowns.get(action.kind)
+        if cooldown:
+            wait = random.uniform(*cooldown)
+            self._cooldown_until[action.kind] = self.clock.time() + wait
+            if self.pending(action.kind):
+                logger.info(f"⏳ Next {action.kind} for {self.account_id} in {wait / 60:.1f} minutes")
+    
+    async def _worker(self):
+        while True:
+            action = self._next()
+            if action is None:
+                self._idle.set()
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            
+            wait = self._ready_at(action) - self.clock.time()
+            if wait > 0:
+                await self._sleep(wait)
+                continue
+            
+            await self._run(action)
+    
+    def start(self, permit: Optional[Callable[[], AsyncContextManager]] = None):
+        """
+        Start the worker (no-op if running)
+        
+        Args:
+            permit: Context manager factory each action runs under (kept for restarts)
+        """
+        if permit is not None:
+            self._permit = permit
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._task = asyncio.create_task(self._worker())
+    
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued action has run
+        
+        Args:
+            timeout: Give up after this many seconds (on the clock)
+        
+        Returns:
+            True if the queue is empty
+        """
+        self.start()
+        if timeout is None:
+            await self._idle.wait()
+            return True
+        
+        sleeper = asyncio.ensure_future(self.clock.sleep(timeout))
+        waiter = asyncio.ensure_future(self._idle.wait())
+        try:
+            await asyncio.wait({sleeper, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sleeper.cancel()
+            waiter.cancel()
+        return self._idle.is_set()
+    
+    async def stop(self):
+        """Stop the worker, dropping pending actions"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        if self._pending:
+            logger.warning(f"Dropping {len(self._pending)} queued action(s) for {self.account_id}")
+            self.dropped += len(self._pending)
+            self._pending.clear()
+            self._keys.clear()
+    
+    def get_status(self) -> Dict:
+        """Queue size, next action and outcomes"""
+        action = self._next()
+        return {
+            'pending': {kind: self.pending(kind) for kind in sorted({a.kind for a in self._pending})},
+            'next': {
+                'kind': action.kind,
+                'at': datetime.fromtimestamp(self._ready_at(action)).isoformat(),
+                'description': action.description
+            } if action else None,
+            'done': dict(self.done),
+            'failed': dict(self.failed),
+            'dropped': self.dropped
+        }
@@ -8,16 +8,40 @@ import asyncio
 from typing import Optional
 import logging
 
+from .http_pool import get_registry
+from .call_metrics import ERROR, RATE_LIMITED, get_call_metrics
+from .clock import SYSTEM_CLOCK, Clock
+
 logger = logging.getLogger(__name__)
 
 
+class AIResponseError(Exception):
+    """The AI API answered, but not with a usable result"""
+    
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _call_outcome(error: BaseException) -> str:
+    """Call metrics outcome of a failed AI call"""
+    if isinstance(error, AIResponseError) and error.status_code == 429:
+        return RATE_LIMITED
+    return ERROR
+
+
 class AIClient:
     """AI client for improving tweet content"""
     
-    def __init__(self, api_url: str, timeout: int = 10):
+    def __init__(self, api_url: str, timeout: int = 10, account_id: str = 'default',
+                 clock: Clock = SYSTEM_CLOCK):
         self.api_url = api_url
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
+        self.account_id = account_id
+        self.clock = clock
+        self.call_metrics = get_call_metrics()
+        # Created on first use: pools are bound to the running event loop
+        self.client: Optional[httpx.AsyncClient] = None
     
     async def improve_tweet(self, tweet: str, prompt_template: str) -> Optional[str]:
         """
@@ -34,32 +58,37 @@ class AIClient:
             # Format prompt
             prompt = prompt_template.format(tweet=tweet)
             
-            # Call API
-            response = await self.client.get(
-                self.api_url,
-                params={"text": prompt}
-            )
+            if self.client is None:
+                self.client = get_registry().client('ai', timeout=self.timeout)
             
-            if response.status_code == 200:
-                data = response.json()
+            # Call API; unusable answers (incl. non-JSON bodies) count as failed calls
+            with self.call_metrics.timed(self.account_id, 'ai', _call_outcome,
+                                         clock=self.clock.monotonic):
+                response = await self.client.get(
+                    self.api_url,
+                    params={"text": prompt}
+                )
                 
-                if data.get('status') and 'result' in data:
-                    improved = data['result'].strip()
-                    
-                    # Validate: must be under 280 chars
-                    if len(improved) <= 280:
-                        logger.info(f"AI improved tweet: {tweet[:50]}... -> {improved[:50]}...")
-                        return improved
-                    else:
-                        logger.warning(f"AI result too long ({len(improved)} chars), using original")
-                        return tweet
-                else:
-                    logger.error(f"AI API error: {data}")
-                    return tweet
+                if response.status_code != 200:
+                    raise AIResponseError(f"returned status {response.status_code}", response.status_code)
+                
+                data = response.json()
+                if not (data.get('status') and 'result' in data):
+                    raise AIResponseError(f"error: {data}", response.status_code)
+            
+            improved = data['result'].strip()
+            
+            # Validate: must be under 280 chars
+            if len(improved) <= 280:
+                logger.info(f"AI improved tweet: {tweet[:50]}... -> {improved[:50]}...")
+                return improved
             else:
-                logger.error(f"AI API returned status {response.status_code}")
+                logger.warning(f"AI result too long ({len(improved)} chars), using original")
                 return tweet
-                
+        
+        except AIResponseError as e:
+            logger.error(f"AI API {e}")
+            return tweet
         except httpx.TimeoutException:
             logger.error("AI API timeout, using original tweet")
             return tweet
@@ -68,8 +97,10 @@ class AIClient:
             return tweet
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """Release HTTP client back to the shared pool"""
+        if self.client is not None:
+            await get_registry().release(self.client)
+            self.client = None
 
 
 # Sync wrapper for convenience
@@ -0,0 +1,144 @@
+"""
+Activity log archiving
+Move old activity_log rows into gzip NDJSON files partitioned by day
+"""
+
+import gzip
+import json
+import os
+import logging
+from datetime import date, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from .database import SQL_TIMESTAMP, Database
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityLogArchiver:
+    """
+    Retention policy for activity_log.
+    
+    Rows older than the retention window are appended to
+    `<data dir>/archive/activity_log/YYYY/MM/YYYY-MM-DD.ndjson.gz`, deleted
+    from the database, and the freed pages are returned with an
+    incremental vacuum. Archived ranges can still be streamed back with
+    iter_archived().
+    """
+    
+    def __init__(self, db: Database, archive_dir: Optional[str] = None):
+        self.db = db
+        if archive_dir is None:
+            archive_dir = os.path.join(os.path.dirname(db.db_path), 'archive')
+        self.archive_dir = Path(archive_dir) / 'activity_log'
+    
+    def _partition_path(self, day: str) -> Path:
+        """Archive file for a 'YYYY-MM-DD' day"""
+        return self.archive_dir / day[:4] / day[5:7] / f"{day}.ndjson.gz"
+    
+    def archive(self, keep_days: int = 30, batch_size: int = 5000) -> int:
+        """
+        Archive and delete rows older than `keep_days`.
+        
+        Each batch is written (and fsynced) to its day partitions before
+        the rows are deleted, so a crash can at worst duplicate rows in
+        the archive, never lose them; readers drop duplicates by id.
+        
+        Returns:
+            Number of rows archived
+        """
+        self.db.flush()
+        
+        cutoff = (self.db.clock.now(timezone.utc) - timedelta(days=keep_days)).strftime(SQL_TIMESTAMP)
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        archived = 0
+        
+        while True:
+            cursor.execute("""
+                SELECT * FROM activity_log
+                WHERE timestamp < ?
+                ORDER BY id
+                LIMIT ?
+            """, (cutoff, batch_size))
+            rows = cursor.fetchall()
+            
+            if not rows:
+                break
+            
+            # Group by day and append one gzip member per partition
+            partitions: Dict[str, list] = {}
+            for row in rows:
+                partitions.setdefault(str(row['timestamp'])[:10], []).append(dict(row))
+            
+            for day, day_rows in partitions.items():
+                path = self._partition_path(day)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                
+                with open(path, 'ab') as raw:
+                    with gzip.GzipFile(fileobj=raw, mode='ab') as gz:
+                        for row in day_rows:
+                            gz.write(json.dumps(row, default=str).encode('utf-8') + b'\n')
+                    raw.flush()
+                    os.fsync(raw.fileno())
+            
+            last_id = rows[-1]['id']
+            cursor.execute("""
+                DELETE FROM activity_log
+                WHERE timestamp < ? AND id <= ?
+            """, (cutoff, last_id))
+            conn.commit()
+            
+            archived += len(rows)
+        
+        if archived:
+            self.compact()
+            logger.info(f"🗄️  Archived {archived} activity_log rows older than {keep_days} days")
+        
+        return archived
+    
+    def compact(self):
+        """Return free pages to the filesystem"""
+        conn = self.db.get_connection()
+        
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum != 2:
+            # Older files were created without incremental auto-vacuum;
+            # switching needs one full VACUUM, later runs are incremental
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+    
+    def iter_archived(self, start: date, end: date) -> Iterator[Dict]:
+        """
+        Stream archived rows for days in [start, end], oldest first.
+        
+        Args:
+            start: First day (inclusive, UTC)
+            end: Last day (inclusive, UTC)
+        """
+        day = start
+        while day <= end:
+            path = self._partition_path(day.isoformat())
+            
+            if path.exists():
+                seen = set()
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        row = json.loads(line)
+                        if row['id'] in seen:
+                            continue
+                        seen.add(row['id'])
+                        yield row
+            
+            day += timedelta(days=1)
+    
+    def get_archived_days(self) -> list:
+        """List days that have an archive partition"""
+        return sorted(
+            path.name[:10] for path in self.archive_dir.glob('*/*/*.ndjson.gz')
+        )
@@ -0,0 +1,92 @@
+"""
+Async database facade
+Non-blocking access to Database for the asyncio automation engine
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """
+    Awaitable mirror of Database.
+    
+    Every public Database method is available as a coroutine with the same
+    name and arguments, e.g. `await adb.log_activity('login', ...)`. Calls
+    run on a dedicated writer thread so a slow disk write never stalls the
+    event loop shared by other accounts. The wrapped sync Database is kept
+    on `.sync` for code that is not async (e.g. the Flask dashboards).
+    
+    With `inline=True` calls run directly on the event loop instead. That
+    is for simulations on a VirtualClock, where time must not move on while
+    a write is still in flight on another thread.
+    """
+    
+    def __init__(self, database: Database, inline: bool = False):
+        self.sync = database
+        self.inline = inline
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="db-writer"
+        )
+        self._closed = False
+    
+    @property
+    def db_path(self) -> str:
+        return self.sync.db_path
+    
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable on the writer thread"""
+        if self._closed or self.inline:
+            # Late calls after shutdown (e.g. a second cleanup) run inline
+            return fn(*args, **kwargs)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+    
+    def submit(self, fn: Callable, *args, **kwargs):
+        """Queue a blocking callable on the writer thread without waiting for it"""
+        if self._closed or self.inline:
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"Background database call {fn.__name__} failed: {e}")
+            return
+        
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(functools.partial(self._log_failure, fn.__name__))
+    
+    @staticmethod
+    def _log_failure(name: str, future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Background database call {name} failed: {future.exception()}")
+    
+    def __getattr__(self, name: str):
+        attr = getattr(self.sync, name)
+        
+        if name.startswith('_') or not callable(attr):
+            return attr
+        
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        
+        return call
+    
+    async def close(self):
+        """Wait for queued work and stop the writer thread"""
+        if self._closed:
+            return
+        
+        self._closed = True
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown, True)
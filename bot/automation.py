@@ -3,17 +3,29 @@ Automation Engine
 Main bot automation logic
 """
 
-import asyncio
+import functools
 import logging
 import random
-from datetime import datetime
-from typing import Dict, Optional
+from contextlib import aclosing
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
 
 from .config_loader import ConfigLoader
 from .database import Database
+from .async_database import AsyncDatabase
+from .archive import ActivityLogArchiver
+from .dedupe import ReplyDedupeIndex
+from .fleet_limiter import FleetRateLimiter
+from .metrics_refresher import TweetMetricsRefresher
+from .action_queue import REPLY, DeferredActionQueue
+from .pipeline import TOTAL, SlotPipeline
+from .scheduler import ScheduledSlot, SlotScheduler, slots_from_settings
 from .twitter_client import TwitterClient
 from .ai_client import AIClient
 from .content_generator import ContentGenerator
+from .clock import SYSTEM_CLOCK, Clock
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +33,9 @@ logger = logging.getLogger(__name__)
 class BotAutomation:
     """Main bot automation engine"""
     
-    def __init__(self, cookies_file: str = "cookies.json", account_folder: Optional[str] = None):
+    def __init__(self, cookies_file: str = "cookies.json", account_folder: Optional[str] = None,
+                 fleet_limiter: Optional[FleetRateLimiter] = None, account_id: Optional[str] = None,
+                 clock: Clock = SYSTEM_CLOCK, transport: Optional[httpx.AsyncBaseTransport] = None):
         """
         Initialize BotAutomation.
         
@@ -30,9 +44,14 @@ class BotAutomation:
             account_folder: Account folder path (e.g., "accounts/account1_GrnStore4347")
                           If provided, all paths will be relative to this folder.
                           If None, uses default paths (backward compatible).
+            fleet_limiter: Shared global rate limiter (multi-account runs)
+            account_id: Account ID used in the fleet ledger
+            clock: Time source and sleep (a VirtualClock for simulations)
+            transport: In-process Twitter transport (e.g. bot.fake_api.FakeXTransport)
         """
         # Store account folder for multi-account support
         self.account_folder = account_folder
+        self.clock = clock
         
         # Determine paths based on account_folder
         if account_folder:
@@ -54,104 +73,207 @@ class BotAutomation:
         
         # Initialize components with appropriate paths
         self.config = ConfigLoader(config_dir=self.config_path)
-        self.db = Database(db_path=f"{self.data_path}/metrics.db")
+        self.db = Database(db_path=f"{self.data_path}/metrics.db", clock=self.clock)
+        # Non-blocking facade used from coroutines; self.db stays for sync callers
+        self.async_db = AsyncDatabase(self.db, inline=clock.virtual)
+        self.archiver = ActivityLogArchiver(self.db)
+        self.reply_index = ReplyDedupeIndex(self.db)
         
         # Get settings
         settings = self.config.get_settings()
         
+        # Optional write-behind buffering for activity logs and counters
+        write_behind = settings.get('database', {}).get('write_behind', {})
+        if write_behind.get('enabled', False):
+            self.db.enable_write_behind(
+                max_events=write_behind.get('max_events', 50),
+                flush_interval=write_behind.get('flush_interval', 5)
+            )
+        
         # Setup AI client
         ai_config = settings['ai']
         self.ai_client = None
         if ai_config['enabled']:
             self.ai_client = AIClient(
                 api_url=ai_config['api_url'],
-                timeout=ai_config['timeout']
+                timeout=ai_config['timeout'],
+                account_id=account_id or 'default',
+                clock=self.clock
             )
         
         # Setup components
-        self.twitter = TwitterClient(self.cookies_file, self.config, self.db)
+        self.account_id = account_id or 'default'
+        self.twitter = TwitterClient(
+            self.cookies_file, self.config, self.async_db,
+            fleet_limiter=fleet_limiter, account_id=self.account_id,
+            clock=clock, transport=transport
+        )
         self.content_gen = ContentGenerator(self.config, self.ai_client)
         
+        # Background tweet stats refresher (started by start_background)
+        self.metrics_settings = settings.get('metrics_refresh', {})
+        self.metrics_refresher = TweetMetricsRefresher.from_settings(
+            self.twitter, self.async_db, self.metrics_settings, sleep=clock.sleep
+        )
+        
+        # Replies, likes and follows run from here, so slots don't sit out
+        # the cool-downs between them (None = act inline)
+        self.action_queue = DeferredActionQueue.from_settings(
+            settings.get('action_queue', {}), self.account_id, clock=clock
+        )
+        # Longest the evening summary waits for queued actions to run
+        self.summary_max_wait = settings.get('action_queue', {}).get('summary_max_wait', 1800)
+        
+        # Own scheduler of run_scheduled (MultiAccountRunner uses a shared one)
+        self.scheduler: Optional[SlotScheduler] = None
         self.is_running = False
     
-    async def initialize(self) -> bool:
-        """Initialize bot"""
+    async def initialize(self, verify: bool = False) -> bool:
+        """
+        Initialize bot
+        
+        Args:
+            verify: Check the cookies with a profile request even if a
+                    cached profile is fresh
+        """
         logger.info("🚀 Initializing bot...")
         
-        success = await self.twitter.setup()
+        success = await self.twitter.setup(verify=verify)
         
         if success:
+            await self.async_db.run(self.reply_index.load)
             logger.info("✅ Bot initialized successfully!")
-            self.db.log_activity('initialize', 'Bot started', True)
+            await self.async_db.log_activity('initialize', 'Bot started', True)
         else:
             logger.error("❌ Bot initialization failed!")
-            self.db.log_activity('initialize', None, False, 'Setup failed')
+            await self.async_db.log_activity('initialize', None, False, 'Setup failed')
         
         return success
     
+    def _resolve_media_path(self, media_path: str) -> str:
+        """Resolve a template media path (relative to account folder if multi-account)"""
+        if self.account_folder:
+            # Multi-account mode: prepend account folder
+            return f"{self.account_folder}/{media_path}"
+        # Single-account mode: use as-is
+        return media_path
+    
+    def _template_media_paths(self) -> List[str]:
+        """Media files referenced by the promo templates"""
+        templates = self.config.get_templates().get('promo_templates', [])
+        return [
+            self._resolve_media_path(item['media'])
+            for item in templates
+            if isinstance(item, dict) and item.get('media')
+        ]
+    
+    async def run_maintenance(self):
+        """Apply the activity_log retention policy (archive and compact)"""
+        retention = self.config.get_settings().get('database', {}).get('retention', {})
+        if not retention.get('enabled', False):
+            return
+        
+        try:
+            await self.async_db.run(self.archiver.archive, retention.get('activity_log_days', 30))
+        except Exception as e:
+            logger.error(f"Database maintenance error: {e}")
+    
+    def _slot_pipeline(self, slot: str) -> SlotPipeline:
+        """Empty pipeline for a slot (schedule.concurrent_steps: false runs steps one by one)"""
+        concurrent = self.config.get_settings()['schedule'].get('concurrent_steps', True)
+        return SlotPipeline(slot, concurrent=concurrent, clock=self.clock)
+    
+    async def _run_pipeline(self, pipeline: SlotPipeline):
+        """Run a slot pipeline, log the outcome and store its step timings"""
+        slot = pipeline.name
+        try:
+            await pipeline.run()
+            
+            logger.info(f"\n✅ {slot.capitalize()} slot completed in {pipeline.summary()}")
+            await self.async_db.log_activity(f'{slot}_slot', f'Completed in {pipeline.summary()}', True)
+        
+        except Exception as e:
+            logger.error(f"❌ {slot.capitalize()} slot error: {e}")
+            await self.async_db.log_activity(f'{slot}_slot', None, False, str(e))
+        
+        finally:
+            if TOTAL in pipeline.timings:
+                try:
+                    await self.async_db.record_slot_timings(
+                        slot, pipeline.started_at, pipeline.timings, pipeline.concurrent
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not record {slot} slot timings: {e}")
+    
+    async def _upload_template_media(self, media_path: Optional[str]) -> Optional[List[str]]:
+        """Upload a template's media, returning media_ids for post_tweet"""
+        if not media_path:
+            return None
+        
+        full_media_path = self._resolve_media_path(media_path)
+        
+        # Check if file exists
+        if not Path(full_media_path).exists():
+            logger.warning(f"⚠️  Media file not found: {full_media_path}")
+            return None
+        
+        logger.info(f"📸 Using media from template: {full_media_path}")
+        media_id = await self.twitter.upload_media_file(full_media_path)
+        return [media_id] if media_id else None
+    
+    async def _post(self, slot: str, text: str, media_ids: Optional[List[str]] = None,
+                    tweet_type: str = 'promo') -> Optional[str]:
+        logger.info(f"Tweet: {text}")
+        tweet_id = await self.twitter.post_tweet(text, media_ids=media_ids, tweet_type=tweet_type)
+        
+        if not tweet_id:
+            logger.warning(f"Failed to post {slot} tweet")
+        return tweet_id
+    
+    async def _search_and_like(self, intent_level: str, max_like: int) -> int:
+        keywords = self.content_gen.get_search_keywords(intent_level)
+        if not keywords:
+            return 0
+        
+        keyword = random.choice(keywords)
+        liked_count = await self.twitter.search_and_like(keyword, max_like=max_like, queue=self.action_queue)
+        logger.info(f"{'Queued' if self.action_queue else 'Liked'} {liked_count} likes for: {keyword}")
+        return liked_count
+    
+    async def _search_and_follow(self, follow_keywords: List[str], max_follow: int) -> int:
+        keyword = random.choice(follow_keywords)
+        followed_count = await self.twitter.search_and_follow(keyword, max_follow=max_follow,
+                                                              queue=self.action_queue)
+        logger.info(f"{'Queued' if self.action_queue else 'Followed'} {followed_count} follows")
+        return followed_count
+    
     async def run_morning_slot(self):
         """Morning automation slot (08:00)"""
         logger.info("\n" + "="*60)
         logger.info("🌅 MORNING SLOT STARTING")
         logger.info("="*60)
         
-        try:
-            # 1. Post promo tweet
-            logger.info("\n📝 Generating morning promo tweet...")
-            tweet_text, media_path = await self.content_gen.generate_promo_tweet(use_ai=True)
-            
-            # Upload media if specified in template
-            media_ids = None
-            if media_path:
-                # Resolve media path (relative to account folder if multi-account)
-                if self.account_folder:
-                    # Multi-account mode: prepend account folder
-                    full_media_path = f"{self.account_folder}/{media_path}"
-                else:
-                    # Single-account mode: use as-is
-                    full_media_path = media_path
-                
-                # Check if file exists
-                from pathlib import Path
-                if Path(full_media_path).exists():
-                    logger.info(f"📸 Using media from template: {full_media_path}")
-                    media_id = await self.twitter.upload_media_file(full_media_path)
-                    if media_id:
-                        media_ids = [media_id]
-                else:
-                    logger.warning(f"⚠️  Media file not found: {full_media_path}")
-            
-            logger.info(f"Tweet: {tweet_text}")
-            tweet_id = await self.twitter.post_tweet(tweet_text, media_ids=media_ids, tweet_type='promo')
-            
-            if not tweet_id:
-                logger.warning("Failed to post morning tweet")
-            
-            # 2. Search & engage
-            logger.info("\n🔍 Searching and engaging...")
-            keywords = self.content_gen.get_search_keywords('high')
-            
-            if keywords:
-                keyword = random.choice(keywords)
-                liked_count = await self.twitter.search_and_like(keyword, max_like=5)
-                logger.info(f"Liked {liked_count} tweets for: {keyword}")
-            
-            # 3. Follow target users
-            logger.info("\n👥 Following target users...")
-            follow_keywords = ["mahasiswa kuota", "wfh internet", "butuh kuota"]
-            keyword = random.choice(follow_keywords)
-            followed_count = await self.twitter.search_and_follow(keyword, max_follow=5)
-            logger.info(f"Followed {followed_count} users")
-            
-            # 4. Update metrics
-            await self.twitter.update_follower_count()
-            
-            logger.info("\n✅ Morning slot completed!")
-            self.db.log_activity('morning_slot', 'Completed successfully', True)
-            
-        except Exception as e:
-            logger.error(f"❌ Morning slot error: {e}")
-            self.db.log_activity('morning_slot', None, False, str(e))
+        # The template is picked up front so its media uploads while the AI
+        # improves the text; searches don't wait for either. Writes still
+        # take turns (TwitterClient.write_lock).
+        tweet_text, media_path = self.content_gen.pick_promo_template()
+            
+        pipeline = self._slot_pipeline('morning')
+        # 1. Post promo tweet
+        pipeline.add('compose', lambda: self.content_gen.improve_tweet(tweet_text))
+        pipeline.add('media', lambda: self._upload_template_media(media_path))
+        pipeline.add('post', lambda compose, media: self._post('morning', compose, media),
+                     after=('compose', 'media'))
+        # 2. Search & engage
+        pipeline.add('like', lambda: self._search_and_like('high', 5))
+        # 3. Follow target users
+        pipeline.add('follow', lambda: self._search_and_follow(
+            ["mahasiswa kuota", "wfh internet", "butuh kuota"], 5))
+        # 4. Update metrics
+        pipeline.add('followers', lambda **_: self.twitter.update_follower_count(),
+                     after=('post', 'like', 'follow'))
+        
+        await self._run_pipeline(pipeline)
     
     async def run_afternoon_slot(self):
         """Afternoon automation slot (13:00)"""
@@ -159,35 +281,42 @@ class BotAutomation:
         logger.info("🌤️  AFTERNOON SLOT STARTING")
         logger.info("="*60)
         
-        try:
-            # 1. Post value content
-            logger.info("\n📝 Generating value content tweet...")
-            tweet_text = await self.content_gen.generate_value_tweet(use_ai=True)
-            
-            logger.info(f"Tweet: {tweet_text}")
-            tweet_id = await self.twitter.post_tweet(tweet_text, tweet_type='value')
-            
-            if not tweet_id:
-                logger.warning("Failed to post afternoon tweet")
-            
-            # 2. Search & engage (medium intent)
-            logger.info("\n🔍 Searching and engaging...")
-            keywords = self.content_gen.get_search_keywords('medium')
-            
-            if keywords:
-                keyword = random.choice(keywords)
-                liked_count = await self.twitter.search_and_like(keyword, max_like=5)
-                logger.info(f"Liked {liked_count} tweets for: {keyword}")
-            
-            # 3. Update metrics
-            await self.twitter.update_follower_count()
-            
-            logger.info("\n✅ Afternoon slot completed!")
-            self.db.log_activity('afternoon_slot', 'Completed successfully', True)
-            
-        except Exception as e:
-            logger.error(f"❌ Afternoon slot error: {e}")
-            self.db.log_activity('afternoon_slot', None, False, str(e))
+        pipeline = self._slot_pipeline('afternoon')
+        # 1. Post value content
+        pipeline.add('compose', lambda: self.content_gen.generate_value_tweet(use_ai=True))
+        pipeline.add('post', lambda compose: self._post('afternoon', compose, tweet_type='value'),
+                     after=('compose',))
+        # 2. Search & engage (medium intent)
+        pipeline.add('like', lambda: self._search_and_like('medium', 5))
+        # 3. Update metrics
+        pipeline.add('followers', lambda **_: self.twitter.update_follower_count(),
+                     after=('post', 'like'))
+            
+        await self._run_pipeline(pipeline)
+    
+    async def _wait_for_queue(self):
+        """Let queued actions run (bounded) so they are in today's counters"""
+        if self.action_queue is None:
+            return
+        
+        if not await self.action_queue.join(timeout=self.summary_max_wait):
+            logger.warning(f"⏳ {self.action_queue.pending()} queued action(s) still pending, "
+                           f"summarizing without them")
+    
+    async def _daily_summary(self):
+        logger.info("\n📊 Generating daily summary...")
+        daily_stats = await self.async_db.get_daily_activity()
+        
+        logger.info("\n" + "="*60)
+        logger.info("📊 DAILY SUMMARY")
+        logger.info("="*60)
+        logger.info(f"Tweets posted: {daily_stats['tweets_posted']}")
+        logger.info(f"Likes given: {daily_stats['likes_given']}")
+        logger.info(f"Replies made: {daily_stats['replies_made']}")
+        logger.info(f"Follows made: {daily_stats['follows_made']}")
+        logger.info(f"Retweets made: {daily_stats['retweets_made']}")
+        logger.info("="*60)
+        return daily_stats
     
     async def run_evening_slot(self):
         """Evening automation slot (20:00)"""
@@ -195,94 +324,40 @@ class BotAutomation:
         logger.info("🌙 EVENING SLOT STARTING")
         logger.info("="*60)
         
-        try:
-            # 1. Post promo tweet
-            logger.info("\n📝 Generating evening promo tweet...")
-            tweet_text, media_path = await self.content_gen.generate_promo_tweet(use_ai=True)
-            
-            # Upload media if specified in template
-            media_ids = None
-            if media_path:
-                # Resolve media path (relative to account folder if multi-account)
-                if self.account_folder:
-                    # Multi-account mode: prepend account folder
-                    full_media_path = f"{self.account_folder}/{media_path}"
-                else:
-                    # Single-account mode: use as-is
-                    full_media_path = media_path
-                
-                # Check if file exists
-                from pathlib import Path
-                if Path(full_media_path).exists():
-                    logger.info(f"📸 Using media from template: {full_media_path}")
-                    media_id = await self.twitter.upload_media_file(full_media_path)
-                    if media_id:
-                        media_ids = [media_id]
-                else:
-                    logger.warning(f"⚠️  Media file not found: {full_media_path}")
-            
-            logger.info(f"Tweet: {tweet_text}")
-            tweet_id = await self.twitter.post_tweet(tweet_text, media_ids=media_ids, tweet_type='promo')
-            
-            if not tweet_id:
-                logger.warning("Failed to post evening tweet")
-            
-            # 2. Engage with followers (like their tweets)
-            logger.info("\n💙 Engaging with followers...")
-            # Note: This would require getting follower list and their tweets
-            # For now, we'll just search and engage
-            
-            keywords = self.content_gen.get_search_keywords('high')
-            if keywords:
-                keyword = random.choice(keywords)
-                liked_count = await self.twitter.search_and_like(keyword, max_like=3)
-                logger.info(f"Liked {liked_count} tweets")
-            
-            # 3. Follow more users
-            logger.info("\n👥 Following target users...")
-            follow_keywords = ["gamer kuota", "streaming internet"]
-            keyword = random.choice(follow_keywords)
-            followed_count = await self.twitter.search_and_follow(keyword, max_follow=5)
-            logger.info(f"Followed {followed_count} users")
-            
-            # 4. Daily summary
-            logger.info("\n📊 Generating daily summary...")
-            daily_stats = self.db.get_daily_activity()
-            
-            logger.info("\n" + "="*60)
-            logger.info("📊 DAILY SUMMARY")
-            logger.info("="*60)
-            logger.info(f"Tweets posted: {daily_stats['tweets_posted']}")
-            logger.info(f"Likes given: {daily_stats['likes_given']}")
-            logger.info(f"Replies made: {daily_stats['replies_made']}")
-            logger.info(f"Follows made: {daily_stats['follows_made']}")
-            logger.info(f"Retweets made: {daily_stats['retweets_made']}")
-            logger.info("="*60)
-            
-            # 5. Update metrics
-            await self.twitter.update_follower_count()
-            
-            logger.info("\n✅ Evening slot completed!")
-            self.db.log_activity('evening_slot', 'Completed successfully', True)
-            
-        except Exception as e:
-            logger.error(f"❌ Evening slot error: {e}")
-            self.db.log_activity('evening_slot', None, False, str(e))
+        tweet_text, media_path = self.content_gen.pick_promo_template()
+            
+        pipeline = self._slot_pipeline('evening')
+        # 1. Post promo tweet
+        pipeline.add('compose', lambda: self.content_gen.improve_tweet(tweet_text))
+        pipeline.add('media', lambda: self._upload_template_media(media_path))
+        pipeline.add('post', lambda compose, media: self._post('evening', compose, media),
+                     after=('compose', 'media'))
+        # 2. Engage with followers (like their tweets)
+        # Note: This would require getting follower list and their tweets
+        # For now, we'll just search and engage
+        pipeline.add('like', lambda: self._search_and_like('high', 3))
+        # 3. Follow more users
+        pipeline.add('follow', lambda: self._search_and_follow(["gamer kuota", "streaming internet"], 5))
+        # 4. Daily summary, once today's actions (incl. the queued ones) are in
+        pipeline.add('queued', lambda **_: self._wait_for_queue(), after=('like', 'follow'))
+        pipeline.add('summary', lambda **_: self._daily_summary(), after=('post', 'queued'))
+        # 5. Update metrics
+        pipeline.add('followers', lambda **_: self.twitter.update_follower_count(),
+                     after=('post', 'like', 'follow'))
+        # 6. Daily database maintenance
+        pipeline.add('maintenance', lambda **_: self.run_maintenance(), after=('summary', 'followers'))
+        
+        await self._run_pipeline(pipeline)
+    
+    @staticmethod
+    def _reply_author(tweet) -> str:
+        """Author key as stored in commented_tweets"""
+        author = tweet.user.screen_name if hasattr(tweet.user, 'screen_name') else tweet.user.username
+        return f"@{author}"
     
     def _is_suitable_for_reply(self, tweet) -> bool:
-        """Filter tweets that are suitable for replying"""
+        """Filter tweets that are suitable for replying (dedupe is done by reply_index)"""
         try:
-            # Check if we already replied to this tweet
-            if self.db.has_replied_to_tweet(tweet.id):
-                logger.debug(f"⏭️  Skip: Already replied to tweet {tweet.id}")
-                return False
-            
-            # Check if we already replied to this author today
-            author = tweet.user.screen_name if hasattr(tweet.user, 'screen_name') else tweet.user.username
-            if self.db.has_replied_to_author_today(f"@{author}"):
-                logger.debug(f"⏭️  Skip: Already replied to @{author} today")
-                return False
-            
             # Skip if tweet has too many replies (viral tweet, risky)
             if hasattr(tweet, 'reply_count') and tweet.reply_count and tweet.reply_count > 50:
                 logger.debug(f"⏭️  Skip: Too many replies ({tweet.reply_count})")
@@ -292,13 +367,13 @@ class BotAutomation:
             from datetime import datetime, timezone, timedelta
             if hasattr(tweet, 'created_at'):
                 if isinstance(tweet.created_at, datetime):
-                    tweet_age = datetime.now(timezone.utc) - tweet.created_at
+                    tweet_age = self.clock.now(timezone.utc) - tweet.created_at
                 else:
                     # Try to parse if it's a string
                     try:
                         from dateutil import parser
                         created = parser.parse(tweet.created_at)
-                        tweet_age = datetime.now(timezone.utc) - created
+                        tweet_age = self.clock.now(timezone.utc) - created
                     except:
                         tweet_age = timedelta(hours=0)  # Assume recent if can't parse
                 
@@ -338,33 +413,56 @@ class BotAutomation:
             return False
     
     async def search_and_reply_tweets(self, keyword: str, max_replies: int = 3) -> int:
-        """Search tweets and reply with helpful content (with safety filters)"""
+        """
+        Search tweets and reply with helpful content (with safety filters)
+        
+        Returns:
+            Replies posted, or queued if the action queue is enabled
+        """
         try:
             logger.info(f"🔍 Searching tweets for: {keyword} (max replies: {max_replies})")
             
             # Check daily limit
-            replies_today = self.db.get_reply_count_today()
+            replies_today = await self.async_db.get_reply_count_today()
             if replies_today >= 9:  # Daily limit
-                self.logger.warning(f"⚠️  Daily reply limit reached ({replies_today}/9)")
+                logger.warning(f"⚠️  Daily reply limit reached ({replies_today}/9)")
                 return 0
             
-            # Adjust max_replies based on remaining daily quota
+            # Adjust max_replies based on remaining daily quota (queued replies included)
+            if self.action_queue:
+                replies_today += self.action_queue.pending(REPLY)
+                if replies_today >= 9:
+                    logger.warning(f"⚠️  Daily reply limit reached with queued replies ({replies_today}/9)")
+                    return 0
             remaining = 9 - replies_today
             max_replies = min(max_replies, remaining)
             
-            # Search tweets
-            tweets = await self.twitter.search_tweets(keyword, count=20)  # Get more to filter
+            await self.async_db.log_activity('search_tweets', f'Query: {keyword}', True)
             
-            if not tweets:
-                self.logger.info("No tweets found")
-                return 0
-            
-            self.logger.info(f"Found {len(tweets)} tweets, filtering...")
+            # Search page by page until enough tweets pass the filters
+            found_count = 0
+            suitable_tweets = []
+            pages = self.twitter.iter_search_tweet_pages(keyword, count=20)
+            async with aclosing(pages):
+                async for tweets in pages:
+                    found_count += len(tweets)
+                    
+                    # Drop already-replied tweets / authors in one pass, then content filters
+                    new_tweets = await self.async_db.run(
+                        self.reply_index.filter_new, tweets, self._reply_author
+                    )
+                    suitable_tweets.extend(
+                        tweet for tweet in new_tweets if self._is_suitable_for_reply(tweet)
+                    )
+                    
+                    if len(suitable_tweets) >= max_replies:
+                        break
             
-            # Filter suitable tweets
-            suitable_tweets = [tweet for tweet in tweets if self._is_suitable_for_reply(tweet)]
+            if not found_count:
+                logger.info("No tweets found")
+                return 0
             
-            self.logger.info(f"✅ {len(suitable_tweets)} tweets suitable for reply")
+            logger.info(f"Found {found_count} tweets, ✅ {len(suitable_tweets)} suitable for reply")
             
             if not suitable_tweets:
                 return 0
@@ -372,46 +470,68 @@ class BotAutomation:
             # Limit to max_replies
             suitable_tweets = suitable_tweets[:max_replies]
             
+            if self.action_queue:
+                # The queue spaces replies by its reply cool-down
+                queued = 0
+                for tweet in suitable_tweets:
+                    author = self._reply_author(tweet)
+                    if self.action_queue.enqueue(REPLY, lambda tweet=tweet: self._reply(tweet),
+                                                 key=f"{REPLY}:{author}", description=author):
+                        queued += 1
+                logger.info(f"📥 Queued {queued} replies")
+                return queued
+            
             replied_count = 0
             for tweet in suitable_tweets:
-                try:
-                    # Generate reply using templates
-                    reply_text = await self._generate_reply()
+                if await self._reply(tweet):
+                    replied_count += 1
                     
-                    # Post reply
-                    self.logger.info(f"💬 Replying to @{tweet.user.username}: {reply_text[:50]}...")
-                    reply_id = await self.twitter.reply_to_tweet(tweet.id, reply_text)
-                    
-                    if reply_id:
-                        # Track in database
-                        author = f"@{tweet.user.username if hasattr(tweet.user, 'username') else tweet.user.screen_name}"
-                        self.db.add_replied_tweet(
-                            tweet_id=tweet.id,
-                            tweet_author=author,
-                            tweet_text=tweet.text[:200] if hasattr(tweet, 'text') else "",
-                            our_reply_id=reply_id,
-                            our_reply_text=reply_text
-                        )
-                        
-                        replied_count += 1
-                        self.logger.info(f"✅ Reply posted successfully!")
-                        
-                        # Random delay between replies (10-15 minutes)
-                        import random
-                        delay = random.randint(600, 900)  # 10-15 minutes
-                        self.logger.info(f"⏳ Waiting {delay/60:.1f} minutes before next reply...")
-                        await asyncio.sleep(delay)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error replying to tweet: {e}")
-                    continue
+                    # Random delay between replies (10-15 minutes)
+                    delay = random.randint(600, 900)  # 10-15 minutes
+                    logger.info(f"⏳ Waiting {delay/60:.1f} minutes before next reply...")
+                    await self.clock.sleep(delay)
             
             return replied_count
             
         except Exception as e:
-            self.logger.error(f"Error in search_and_reply_tweets: {e}")
+            logger.error(f"Error in search_and_reply_tweets: {e}")
             return 0
     
+    async def _reply(self, tweet) -> bool:
+        """Reply to one tweet and track it (skipped if its author got a reply meanwhile)"""
+        try:
+            author = self._reply_author(tweet)
+            if not await self.async_db.run(self.reply_index.filter_new, [tweet], self._reply_author):
+                logger.info(f"⏭️  Already replied to {author}, skipping")
+                return False
+            
+            # Generate reply using templates
+            reply_text = await self._generate_reply()
+            
+            # Post reply
+            logger.info(f"💬 Replying to {author}: {reply_text[:50]}...")
+            reply_id = await self.twitter.reply_to_tweet(tweet.id, reply_text)
+            
+            if not reply_id:
+                return False
+            
+            # Track in database
+            await self.async_db.add_replied_tweet(
+                tweet_id=tweet.id,
+                tweet_author=author,
+                tweet_text=tweet.text[:200] if hasattr(tweet, 'text') else "",
+                our_reply_id=reply_id,
+                our_reply_text=reply_text
+            )
+            self.reply_index.add(tweet.id, author)
+            
+            logger.info(f"✅ Reply posted successfully!")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error replying to tweet: {e}")
+            return False
+    
     async def _generate_reply(self) -> str:
         """Generate a reply using templates"""
         import random
@@ -445,10 +565,8 @@ class BotAutomation:
         
         return reply_text
     
-    async def search_and_like_tweets(self, keyword: str, count: int = 5):
-        """Run one slot manually"""
-        await self.initialize()
-        
+    async def run_slot(self, slot: str):
+        """Run one slot (bot already initialized)"""
         if slot == 'morning':
             await self.run_morning_slot()
         elif slot == 'afternoon':
@@ -457,9 +575,49 @@ class BotAutomation:
             await self.run_evening_slot()
         else:
             logger.error(f"Unknown slot: {slot}")
+    
+    async def run_once(self, slot: str):
+        """Run one slot manually (waits for its queued actions)"""
+        await self.initialize()
+        await self.run_slot(slot)
+        
+        if self.action_queue:
+            await self.action_queue.join()
         
         await self.cleanup()
     
+    def schedule_slots(self, stagger: float = 0.0) -> List[ScheduledSlot]:
+        """
+        This account's slots from settings.yaml `schedule`
+        
+        Args:
+            stagger: Window (seconds) the account's deterministic start offset is picked from
+        """
+        schedule_config = self.config.get_settings()['schedule']
+        if not schedule_config['enabled']:
+            return []
+        return slots_from_settings(self.account_id, schedule_config, self.run_slot, self.async_db,
+                                   stagger=stagger)
+    
+    def start_background(self, scheduler: Optional[SlotScheduler] = None):
+        """
+        Start the background refreshers used between slots
+        
+        Args:
+            scheduler: Scheduler whose concurrency places queued actions run under
+        """
+        if self.metrics_settings.get('enabled', True):
+            self.metrics_refresher.start()
+        
+        # Re-upload template media before it expires so slots never wait on it
+        if self.twitter.media_cache:
+            self.twitter.media_cache.start(self._template_media_paths)
+        
+        if self.action_queue:
+            self.action_queue.start(
+                functools.partial(scheduler.permit, self.account_id) if scheduler else None
+            )
+    
     async def run_scheduled(self):
         """Run bot with schedule"""
         await self.initialize()
@@ -472,50 +630,44 @@ class BotAutomation:
             return
         
         logger.info("🕐 Starting scheduled bot...")
-        logger.info(f"Morning slot: {schedule_config['morning']['time']}")
-        logger.info(f"Afternoon slot: {schedule_config['afternoon']['time']}")
-        logger.info(f"Evening slot: {schedule_config['evening']['time']}")
         
         self.is_running = True
         
-        while self.is_running:
-            now = datetime.now()
-            current_time = now.strftime("%H:%M")
-            
-            # Check if it's time for a slot
-            if (schedule_config['morning']['enabled'] and 
-                current_time == schedule_config['morning']['time']):
-                await self.run_morning_slot()
-                await asyncio.sleep(60)  # Wait 1 minute to avoid duplicate
-            
-            elif (schedule_config['afternoon']['enabled'] and 
-                  current_time == schedule_config['afternoon']['time']):
-                await self.run_afternoon_slot()
-                await asyncio.sleep(60)
-            
-            elif (schedule_config['evening']['enabled'] and 
-                  current_time == schedule_config['evening']['time']):
-                await self.run_evening_slot()
-                await asyncio.sleep(60)
-            
-            # Check every 30 seconds
-            await asyncio.sleep(30)
+        # Sleeps until the next slot is due instead of polling the time
+        self.scheduler = SlotScheduler(self.clock)
+        self.start_background(self.scheduler)
+        await self.scheduler.add(self.schedule_slots())
+        await self.scheduler.run()
     
     def stop(self):
         """Stop bot"""
         logger.info("🛑 Stopping bot...")
         self.is_running = False
+        if self.scheduler:
+            self.scheduler.stop()
     
     async def cleanup(self):
         """Cleanup resources"""
         logger.info("🧹 Cleaning up...")
         
+        await self.metrics_refresher.stop()
+        
+        if self.action_queue:
+            await self.action_queue.stop()
+        
+        if self.twitter.media_cache:
+            await self.twitter.media_cache.stop()
+        
         if self.twitter:
             await self.twitter.cleanup()
         
         if self.ai_client:
             await self.ai_client.close()
         
+        # Flush buffered activity writes and stop the writer thread
+        await self.async_db.disable_write_behind()
+        await self.async_db.close()
+        
         logger.info("✅ Cleanup complete!")
     
     def get_status(self) -> Dict:
@@ -524,5 +676,7 @@ class BotAutomation:
             'is_running': self.is_running,
             'rate_limits': {} if self.twitter.client else {},
             'daily_stats': self.db.get_daily_activity(),
-            'dashboard_stats': self.db.get_dashboard_stats()
+            'dashboard_stats': self.db.get_dashboard_stats(),
+            'slot_timings': self.db.get_slot_timings(self.clock.time() - 7 * 86400),
+            'action_queue': self.action_queue.get_status() if self.action_queue else None
         }
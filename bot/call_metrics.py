@@ -0,0 +1,261 @@
+"""
+Call metrics
+Per-endpoint latency histograms and outcome counters for outbound calls
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Outcomes
+OK = 'ok'
+ERROR = 'error'
+RATE_LIMITED = 'rate_limited'
+REJECTED = 'rejected'  # never sent (circuit open)
+
+OUTCOMES = (OK, ERROR, RATE_LIMITED, REJECTED)
+
+# Bucket upper bounds in milliseconds (roughly 1-2.5-5 per decade); the
+# last bucket catches everything slower
+BUCKET_BOUNDS_MS = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (constant memory, O(log buckets) record)"""
+    
+    __slots__ = ('counts', 'count', 'total', 'max')
+    
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+    
+    def merge(self, other: 'LatencyHistogram'):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile, capped at the max (ms)"""
+        if not self.count:
+            return None
+        
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                # No call took longer than the slowest one, so it bounds every
+                # bucket (and is the only bound of the overflow bucket)
+                if i < len(BUCKET_BOUNDS_MS):
+                    return min(BUCKET_BOUNDS_MS[i], round(self.max, 1))
+                return round(self.max, 1)
+        return round(self.max, 1)
+    
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 1) if self.count else None,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max, 1),
+            'buckets': {
+                (f'le_{bound}' if i < len(BUCKET_BOUNDS_MS) else 'inf'): n
+                for i, (bound, n) in enumerate(zip(BUCKET_BOUNDS_MS + (None,), self.counts))
+                if n
+            }
+        }
+
+
+class _EndpointMetrics:
+    __slots__ = ('histogram', 'outcomes', 'last_error', 'last_at')
+    
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.last_error: Optional[str] = None
+        self.last_at: Optional[float] = None
+
+
+class CallMetrics:
+    """
+    Latency histograms and outcome counts per (account, endpoint).
+    
+    Recorded in memory for every outbound request: each twikit attempt
+    (retries and 429s count separately, so a slot slowed down by retries
+    shows up as several entries) and each AI API call. Rejections by an
+    open circuit are counted without a latency. Nothing is persisted;
+    counts start from zero with the process. Runners publish export()
+    to the runtime stats file, and readers in other processes rebuild
+    the combined view with merge_export().
+    """
+    
+    def __init__(self):
+        self._metrics: Dict[Tuple[str, str], _EndpointMetrics] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+    
+    def record(self, account_id: str, endpoint: str, outcome: str,
+               seconds: Optional[float] = None, error: Optional[BaseException] = None):
+        """
+        Record one call
+        
+        Args:
+            account_id: Calling account
+            endpoint: Endpoint name (twikit method or 'ai')
+            outcome: OK, ERROR, RATE_LIMITED or REJECTED
+            seconds: Wall time of the call (None if it was never sent)
+            error: Exception of a failed call
+        """
+        key = (account_id, endpoint)
+        with self._lock:
+            metrics = self._metrics.get(key)
+            if metrics is None:
+                metrics = _EndpointMetrics()
+                self._metrics[key] = metrics
+            
+            metrics.outcomes[outcome] += 1
+            metrics.last_at = time.time()
+            if seconds is not None:
+                metrics.histogram.record(seconds * 1000)
+            if error is not None:
+                metrics.last_error = f'{type(error).__name__}: {error}'[:200]
+    
+    @contextmanager
+    def timed(self, account_id: str, endpoint: str, classify=None,
+              clock: Callable[[], float] = time.perf_counter):
+        """
+        Time the enclosed call; exceptions are recorded and re-raised
+        (cancellation isn't an outcome and is left out)
+        
+        Args:
+            classify: Maps an exception to RATE_LIMITED or ERROR (default ERROR)
+            clock: Monotonic time source (simulations pass their virtual clock)
+        """
+        started = clock()
+        try:
+            yield
+        except Exception as e:
+            outcome = classify(e) if classify else ERROR
+            self.record(account_id, endpoint, outcome, clock() - started, e)
+            raise
+        self.record(account_id, endpoint, OK, clock() - started)
+    
+    def export(self) -> Dict:
+        """Raw counters, for merge_export() in another process"""
+        with self._lock:
+            return {
+                'since': self.started_at,
+                'metrics': [
+                    {
+                        'account_id': account,
+                        'endpoint': endpoint,
+                        'outcomes': dict(metrics.outcomes),
+                        'counts': list(metrics.histogram.counts),
+                        'total': metrics.histogram.total,
+                        'max': metrics.histogram.max,
+                        'last_error': metrics.last_error,
+                        'last_at': metrics.last_at
+                    }
+                    for (account, endpoint), metrics in self._metrics.items()
+                ]
+            }
+    
+    def merge_export(self, exported: Dict):
+        """Add the counters of another process's export()"""
+        with self._lock:
+            self.started_at = min(self.started_at, exported['since'])
+            for item in exported['metrics']:
+                key = (item['account_id'], item['endpoint'])
+                metrics = self._metrics.get(key)
+                if metrics is None:
+                    metrics = _EndpointMetrics()
+                    self._metrics[key] = metrics
+                
+                for outcome, n in item['outcomes'].items():
+                    metrics.outcomes[outcome] = metrics.outcomes.get(outcome, 0) + n
+                
+                histogram = metrics.histogram
+                for i, n in enumerate(item['counts']):
+                    histogram.counts[i] += n
+                histogram.count += sum(item['counts'])
+                histogram.total += item['total']
+                histogram.max = max(histogram.max, item['max'])
+                
+                if item['last_at'] and (metrics.last_at is None or item['last_at'] > metrics.last_at):
+                    metrics.last_at = item['last_at']
+                    metrics.last_error = item['last_error'] or metrics.last_error
+    
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self.started_at = time.time()
+    
+    def get_stats(self, account_id: Optional[str] = None) -> Dict:
+        """
+        Snapshot per account and endpoint, plus per-endpoint totals
+        
+        Args:
+            account_id: Only this account (totals then cover just it too)
+        """
+        with self._lock:
+            items: List[Tuple[Tuple[str, str], _EndpointMetrics]] = [
+                (key, metrics) for key, metrics in self._metrics.items()
+                if account_id is None or key[0] == account_id
+            ]
+            
+            accounts: Dict[str, Dict] = {}
+            totals: Dict[str, Tuple[LatencyHistogram, Dict[str, int]]] = {}
+            
+            for (account, endpoint), metrics in sorted(items, key=lambda item: item[0]):
+                accounts.setdefault(account, {})[endpoint] = {
+                    **metrics.outcomes,
+                    **metrics.histogram.snapshot(),
+                    'last_error': metrics.last_error,
+                    'last_at': metrics.last_at
+                }
+                
+                histogram, outcomes = totals.setdefault(
+                    endpoint, (LatencyHistogram(), dict.fromkeys(OUTCOMES, 0))
+                )
+                histogram.merge(metrics.histogram)
+                for outcome, n in metrics.outcomes.items():
+                    outcomes[outcome] += n
+        
+        return {
+            'since': self.started_at,
+            'bucket_bounds_ms': list(BUCKET_BOUNDS_MS),
+            'endpoints': {
+                endpoint: {**outcomes, **histogram.snapshot()}
+                for endpoint, (histogram, outcomes) in sorted(totals.items())
+            },
+            'accounts': accounts
+        }
+
+
+_metrics: Optional[CallMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_call_metrics() -> CallMetrics:
+    """Process-wide call metrics"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = CallMetrics()
+        return _metrics
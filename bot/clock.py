@@ -0,0 +1,150 @@
+"""
+Clock
+Time source and sleep used by the bot, with a virtual clock for simulations
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime, tzinfo
+from typing import Awaitable, List, Optional, Tuple
+
+
+class Clock:
+    """
+    Wall-clock time and real sleeps.
+    
+    Everything in the automation path that reads the time or waits takes
+    one of these (or its `time`/`sleep` methods), so a VirtualClock can be
+    swapped in to run days of schedule in seconds.
+    """
+    
+    # Virtual clocks only advance while nothing else can run
+    virtual = False
+    
+    def time(self) -> float:
+        """Current epoch seconds"""
+        return time.time()
+    
+    def monotonic(self) -> float:
+        return time.monotonic()
+    
+    def now(self, tz: Optional[tzinfo] = None) -> datetime:
+        """Current datetime (naive local time unless `tz` is given)"""
+        return datetime.now(tz)
+    
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+SYSTEM_CLOCK = Clock()
+
+
+class VirtualClock(Clock):
+    """
+    Simulated time for running schedules faster than real time.
+    
+    sleep() doesn't wait: it parks the caller until the clock reaches its
+    wake time. The clock jumps straight to the earliest wake time whenever
+    the event loop has nothing else ready to run, so a day of 30-second
+    polls and 15-minute reply delays passes as fast as the code between
+    them executes. Every coroutine involved must sleep through this clock;
+    real waits (threads, sockets) still in flight when everything else
+    is asleep don't hold it back.
+    
+    Run the simulation with `clock.run(main())`, or keep `clock.drive()`
+    running as a task alongside it.
+    """
+    
+    virtual = True
+    
+    def __init__(self, start: Optional[float] = None):
+        """
+        Args:
+            start: Initial epoch seconds (default: now)
+        """
+        self._now = time.time() if start is None else start
+        self._sleepers: List[Tuple[float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        
+        # Stats
+        self.wakeups = 0
+    
+    def time(self) -> float:
+        return self._now
+    
+    def monotonic(self) -> float:
+        return self._now
+    
+    def now(self, tz: Optional[tzinfo] = None) -> datetime:
+        return datetime.fromtimestamp(self._now, tz)
+    
+    async def sleep(self, seconds: float):
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self._now + seconds, next(self._seq), future))
+        await future
+    
+    async def _settle(self):
+        """Yield until no other callback is ready to run"""
+        await asyncio.sleep(0)
+        
+        # asyncio's own loops keep runnable callbacks in `_ready`; other
+        # loops just get a few iterations to settle
+        ready = getattr(asyncio.get_running_loop(), '_ready', None)
+        if ready is None:
+            for _ in range(10):
+                await asyncio.sleep(0)
+            return
+        
+        while ready:
+            await asyncio.sleep(0)
+    
+    def advance(self, seconds: float):
+        """Move the clock forward, waking sleepers that become due"""
+        self._wake_until(self._now + seconds)
+    
+    def _wake_until(self, until: float):
+        while self._sleepers and self._sleepers[0][0] <= until:
+            wake_at, _, future = heapq.heappop(self._sleepers)
+            if future.done():
+                # Cancelled sleep
+                continue
+            self._now = max(self._now, wake_at)
+            future.set_result(None)
+            self.wakeups += 1
+        self._now = max(self._now, until)
+    
+    async def drive(self):
+        """Advance to the next wake time whenever the loop is idle (until cancelled)"""
+        while True:
+            await self._settle()
+            
+            while self._sleepers and self._sleepers[0][2].done():
+                heapq.heappop(self._sleepers)
+            
+            if not self._sleepers:
+                # Only real work pending (or nothing at all yet)
+                await asyncio.sleep(0.001)
+                continue
+            
+            self._wake_until(self._sleepers[0][0])
+    
+    def run(self, main: Awaitable):
+        """asyncio.run(main) with this clock driving simulated time"""
+        async def runner():
+            driver = asyncio.create_task(self.drive())
+            try:
+                return await main
+            finally:
+                driver.cancel()
+                try:
+                    await driver
+                except asyncio.CancelledError:
+                    pass
+        
+        return asyncio.run(runner())
@@ -43,6 +43,19 @@ class ContentGenerator:
     async def generate_promo_tweet(self, use_ai: bool = True) -> Tuple[str, Optional[str]]:
         """Generate promotional tweet with optional media
         
+        Returns:
+            Tuple[str, Optional[str]]: (tweet_text, media_path)
+        """
+        tweet, media = self.pick_promo_template()
+        
+        if use_ai:
+            tweet = await self.improve_tweet(tweet)
+        
+        return (tweet, media)
+    
+    def pick_promo_template(self) -> Tuple[str, Optional[str]]:
+        """Pick a promo template (no AI), so its media can be uploaded while the text is improved
+        
         Returns:
             Tuple[str, Optional[str]]: (tweet_text, media_path)
         """
@@ -77,8 +90,11 @@ class ContentGenerator:
             else:
                 logger.debug(f"📝 Text-only tweet (no media assigned)")
         
-        # AI improvement
-        if use_ai and self.ai_client:
+        return (tweet, media)
+    
+    async def improve_tweet(self, tweet: str) -> str:
+        """AI improvement of a promo tweet (unchanged if AI is off or fails)"""
+        if self.ai_client:
             settings = self.config.get_settings()
             if settings['ai']['enabled']:
                 prompt = settings['ai']['improve_prompt']
@@ -86,7 +102,7 @@ class ContentGenerator:
                 if improved:
                     tweet = improved
         
-        return (tweet, media)
+        return tweet
     
     async def generate_value_tweet(self, use_ai: bool = True) -> str:
         """Generate value content tweet"""
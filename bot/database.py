@@ -5,165 +5,458 @@ SQLite database for storing all metrics
 
 import sqlite3
 import os
-from datetime import datetime, date
-from typing import Optional, Dict, List, Tuple
+import asyncio
+import threading
+import weakref
+from datetime import date, timedelta, timezone
+from typing import Optional, Dict, Iterator, List, Tuple
+from collections import Counter
 import json
 
+from .clock import SYSTEM_CLOCK, Clock
+from .write_buffer import WriteBehindBuffer
+from .migrations import migrate, backfill_rollups
+
+
+# Connection tuning applied once per connection
+CACHE_SIZE_KB = 8192
+BUSY_TIMEOUT_MS = 5000
+
+# Format of SQLite's CURRENT_TIMESTAMP (UTC); timestamps are bound in this form
+SQL_TIMESTAMP = '%Y-%m-%d %H:%M:%S'
+
+# Read queries behind the dashboards and hot checks: name -> (sql, sample params).
+# Date filters compare the raw column against bound dates (computed on the
+# Database clock) so they stay sargable, and "latest N" queries are bounded
+# by now so they are range searches too; check_query_plans() verifies each
+# one is an index search.
+DASHBOARD_QUERIES = {
+    'daily_activity': ("""
+        SELECT * FROM daily_activity WHERE date = ?
+    """, ('2000-01-01',)),
+    'recent_tweets': ("""
+        SELECT * FROM tweet_performance 
+        WHERE posted_at <= ?
+        ORDER BY posted_at DESC 
+        LIMIT ?
+    """, ('2000-01-01 00:00:00', 10)),
+    'best_tweet': ("""
+        SELECT * FROM tweet_performance 
+        WHERE posted_at >= ?
+        ORDER BY engagement_rate DESC
+        LIMIT 1
+    """, ('2000-01-01 00:00:00',)),
+    'dashboard_rollup': ("""
+        SELECT 
+            SUM(CASE WHEN date >= :week THEN tweet_count END) as tweets_7d,
+            SUM(CASE WHEN date >= :week THEN views_sum END) as views_7d,
+            SUM(CASE WHEN date >= :week THEN likes_sum END) as likes_7d,
+            SUM(CASE WHEN date >= :week THEN engagement_sum END) as engagement_7d,
+            SUM(CASE WHEN date >= :week THEN wa_messages END) as messages_7d,
+            SUM(CASE WHEN date >= :week THEN orders END) as orders_7d,
+            SUM(CASE WHEN date >= :week THEN revenue END) as revenue_7d,
+            SUM(wa_messages) as messages_30d,
+            SUM(orders) as orders_30d,
+            SUM(revenue) as revenue_30d,
+            SUM(follower_snapshot) as growth_30d
+        FROM stats_daily
+        WHERE date >= :month
+    """, {'week': '2000-01-01', 'month': '2000-01-01'}),
+    'hourly_activity': ("""
+        SELECT * FROM stats_hourly 
+        WHERE hour >= ?
+        ORDER BY hour ASC
+    """, ('2000-01-01 00:00',)),
+    'follower_growth': ("""
+        SELECT * FROM follower_growth 
+        WHERE date >= ?
+        ORDER BY date ASC
+    """, ('2000-01-01',)),
+    'current_follower_count': ("""
+        SELECT followers_count, following_count 
+        FROM follower_growth 
+        WHERE date <= ?
+        ORDER BY date DESC 
+        LIMIT 1
+    """, ('2000-01-01',)),
+    'conversions': ("""
+        SELECT * FROM conversions 
+        WHERE date >= ?
+        ORDER BY date DESC
+    """, ('2000-01-01',)),
+    'conversion_summary': ("""
+        SELECT 
+            SUM(wa_messages) as total_messages,
+            SUM(orders) as total_orders,
+            SUM(revenue) as total_revenue
+        FROM conversions 
+        WHERE date >= ?
+    """, ('2000-01-01',)),
+    'keyword_performance': ("""
+        SELECT 
+            keyword,
+            SUM(tweets_found) as total_found,
+            SUM(engaged) as total_engaged,
+            ROUND(CAST(SUM(engaged) AS FLOAT) / SUM(tweets_found) * 100, 2) as engagement_rate
+        FROM keyword_performance
+        WHERE date >= ? AND date <= ?
+        GROUP BY keyword
+        ORDER BY total_engaged DESC
+    """, ('2000-01-01', '2000-01-08')),
+    'recent_logs': ("""
+        SELECT * FROM activity_log 
+        WHERE timestamp <= ?
+        ORDER BY timestamp DESC 
+        LIMIT ?
+    """, ('2000-01-01 00:00:00', 50)),
+    'replied_to_author_today': ("""
+        SELECT 1 FROM commented_tweets 
+        WHERE tweet_author = ? 
+        AND timestamp >= ?
+        AND timestamp < ?
+    """, ('@someone', '2000-01-01', '2000-01-02')),
+    'reply_count_today': ("""
+        SELECT COUNT(*) FROM commented_tweets 
+        WHERE timestamp >= ?
+        AND timestamp < ?
+    """, ('2000-01-01', '2000-01-02')),
+    'recent_replies': ("""
+        SELECT * FROM commented_tweets 
+        WHERE timestamp <= ?
+        ORDER BY timestamp DESC 
+        LIMIT ?
+    """, ('2000-01-01 00:00:00', 10)),
+}
+
+# Activity type -> daily_activity counter column
+ACTIVITY_COLUMNS = {
+    'tweet': 'tweets_posted',
+    'like': 'likes_given',
+    'reply': 'replies_made',
+    'follow': 'follows_made',
+    'retweet': 'retweets_made'
+}
+
+
+class _ThreadConnections:
+    """One thread's connections: loop id -> (connection, loop weakref, generation)"""
+    
+    __slots__ = ('entries', '__weakref__')
+    
+    def __init__(self):
+        self.entries: Dict[Optional[int], Tuple] = {}
+
+
+class ConnectionPool:
+    """
+    Long-lived SQLite connections for one database file.
+    
+    Each thread (and each event loop running on that thread) gets its own
+    connection, opened once in WAL mode and reused for every query, so the
+    bot runner and the dashboards can share the same metrics.db.
+    
+    Connections live in thread-local storage: only the owning thread ever
+    uses or closes one, and a thread's connections are released when it
+    exits, so a reused thread id can never pick up a dead thread's
+    connection.
+    """
+    
+    def __init__(self, db_path: str, cache_size_kb: int = CACHE_SIZE_KB,
+                 busy_timeout_ms: int = BUSY_TIMEOUT_MS):
+        self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self.busy_timeout_ms = busy_timeout_ms
+        self.schema_ready = False
+        self.inode = None
+        
+        # Bumped by close_all(); owners reopen older connections on their next get()
+        self.generation = 0
+        
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._holders: "weakref.WeakSet[_ThreadConnections]" = weakref.WeakSet()
+    
+    def _holder(self) -> _ThreadConnections:
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = _ThreadConnections()
+            self._local.holder = holder
+            with self._lock:
+                self._holders.add(holder)
+        return holder
+    
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+            # Brand-new file: auto_vacuum must be set before the first write
+            # (switching to WAL is one); older files are converted by the
+            # archiver's first compaction
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    def _prune(self, holder: _ThreadConnections):
+        """Close the calling thread's connections for closed loops or an older generation"""
+        for loop_id, (conn, loop_ref, generation) in list(holder.entries.items()):
+            loop = loop_ref() if loop_ref else None
+            loop_gone = loop_ref is not None and (loop is None or loop.is_closed())
+            if loop_gone or generation != self.generation:
+                del holder.entries[loop_id]
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+    
+    def get(self) -> sqlite3.Connection:
+        """Get the connection for the calling thread / event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        loop_id = id(loop) if loop else None
+        
+        holder = self._holder()
+        entry = holder.entries.get(loop_id)
+        if (entry is not None and entry[2] == self.generation
+                and (loop is None or entry[1]() is loop)):
+            return entry[0]
+        
+        self._prune(holder)
+        conn = self._open()
+        holder.entries[loop_id] = (conn, weakref.ref(loop) if loop else None, self.generation)
+        return conn
+    
+    def close_all(self):
+        """
+        Close every pooled connection
+        
+        The calling thread's connections are closed now; other threads
+        close theirs on their next get() (or release them when they exit).
+        """
+        with self._lock:
+            self.generation += 1
+        
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None:
+            self._prune(holder)
+    
+    def size(self) -> int:
+        """Number of open connections"""
+        with self._lock:
+            return sum(len(holder.entries) for holder in list(self._holders))
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _file_inode(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_ino
+    except OSError:
+        return None
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """
+    Get the shared connection pool for a database file.
+    
+    Pools are shared by every Database instance pointing at the same file,
+    so the per-request Database objects in the dashboards reuse connections.
+    A pool whose file was deleted or replaced is discarded.
+    """
+    key = os.path.abspath(db_path)
+    
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.inode != _file_inode(key):
+            pool.close_all()
+            pool = None
+        
+        if pool is None:
+            pool = ConnectionPool(key)
+            _pools[key] = pool
+        
+        return pool
+
+
+def close_all_pools():
+    """Close all pooled connections (e.g. on shutdown)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
 
 class Database:
     """SQLite database handler for metrics"""
     
-    def __init__(self, db_path: str = "data/metrics.db"):
+    def __init__(self, db_path: str = "data/metrics.db", clock: Clock = SYSTEM_CLOCK):
+        """
+        Args:
+            db_path: SQLite file
+            clock: Source of "today" and of the timestamps written (a VirtualClock in simulations)
+        """
         self.db_path = db_path
+        self.clock = clock
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.init_database()
+        self.pool = get_pool(db_path)
+        self.write_buffer: Optional[WriteBehindBuffer] = None
+        
+        if not self.pool.schema_ready:
+            self.init_database()
     
     def get_connection(self) -> sqlite3.Connection:
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Get pooled database connection (do not close it)"""
+        conn = self.pool.get()
+        if conn.in_transaction:
+            # Leftover from a write that raised before committing
+            conn.rollback()
         return conn
     
-    def init_database(self):
-        """Initialize database tables"""
+    def close(self):
+        """Flush buffered writes and close all pooled connections"""
+        self.disable_write_behind()
+        self.pool.close_all()
+    
+    # ============= CLOCK =============
+    
+    def _today(self) -> date:
+        """Local date on the clock (daily counters, date columns)"""
+        return self.clock.now().date()
+    
+    def _days_ago(self, days: float) -> str:
+        """Local date `days` before today, for date column filters"""
+        return (self._today() - timedelta(days=days)).isoformat()
+    
+    def _timestamp(self, ago: timedelta = timedelta()) -> str:
+        """UTC timestamp on the clock, formatted like CURRENT_TIMESTAMP"""
+        return (self.clock.now(timezone.utc) - ago).strftime(SQL_TIMESTAMP)
+    
+    def _utc_day(self) -> Tuple[str, str]:
+        """Bounds of the current UTC day, for timestamp column filters"""
+        today = self.clock.now(timezone.utc).date()
+        return today.isoformat(), (today + timedelta(days=1)).isoformat()
+    
+    # ============= WRITE-BEHIND BUFFER =============
+    
+    def enable_write_behind(self, max_events: int = 50, flush_interval: float = 5.0):
+        """
+        Buffer log_activity / increment_activity writes in memory.
+        
+        Pending events are flushed in one transaction every `flush_interval`
+        seconds or once `max_events` are queued. Call flush() or close()
+        before shutdown.
+        """
+        if self.write_buffer:
+            return
+        
+        self.write_buffer = WriteBehindBuffer(
+            self._write_batch,
+            max_events=max_events,
+            flush_interval=flush_interval,
+            clock=self.clock
+        )
+        self.write_buffer.start()
+    
+    def disable_write_behind(self):
+        """Flush pending events and go back to direct writes"""
+        if self.write_buffer:
+            buffer, self.write_buffer = self.write_buffer, None
+            buffer.close()
+    
+    def flush(self) -> int:
+        """Flush buffered writes, return number of events written"""
+        if self.write_buffer:
+            return self.write_buffer.flush()
+        return 0
+    
+    def _flush_pending(self):
+        """Flush buffered writes before reading tables they touch"""
+        if self.write_buffer and self.write_buffer.has_pending():
+            self.write_buffer.flush()
+    
+    def _write_batch(self, logs: List[Tuple], counters: Counter):
+        """Persist a write-behind batch in a single transaction"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Daily activity tracking
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS daily_activity (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE UNIQUE NOT NULL,
-                tweets_posted INTEGER DEFAULT 0,
-                likes_given INTEGER DEFAULT 0,
-                replies_made INTEGER DEFAULT 0,
-                follows_made INTEGER DEFAULT 0,
-                retweets_made INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tweet performance tracking
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tweet_performance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tweet_id TEXT UNIQUE NOT NULL,
-                tweet_text TEXT,
-                tweet_type TEXT,
-                posted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                views INTEGER DEFAULT 0,
-                likes INTEGER DEFAULT 0,
-                retweets INTEGER DEFAULT 0,
-                replies INTEGER DEFAULT 0,
-                engagement_rate FLOAT DEFAULT 0,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Follower growth tracking
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS follower_growth (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE UNIQUE NOT NULL,
-                followers_count INTEGER NOT NULL,
-                following_count INTEGER NOT NULL,
-                ratio FLOAT,
-                new_followers INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Business conversions
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS conversions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE NOT NULL,
-                wa_messages INTEGER DEFAULT 0,
-                orders INTEGER DEFAULT 0,
-                revenue FLOAT DEFAULT 0,
-                source TEXT DEFAULT 'twitter',
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Keyword performance
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS keyword_performance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                keyword TEXT NOT NULL,
-                date DATE NOT NULL,
-                tweets_found INTEGER DEFAULT 0,
-                engaged INTEGER DEFAULT 0,
-                conversions INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(keyword, date)
-            )
-        """)
-        
-        # Bot activity log
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS activity_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                activity_type TEXT NOT NULL,
-                details TEXT,
-                success BOOLEAN DEFAULT 1,
-                error_message TEXT
-            )
-        """)
-        
-        # Configuration history (for tracking changes)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS config_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                config_type TEXT NOT NULL,
-                changes TEXT,
-                user TEXT DEFAULT 'system'
-            )
-        """)
-        
-        # Twitter accounts management
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS accounts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                display_name TEXT,
-                wa_number TEXT,
-                wa_link TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                cookies_file TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tracking for replied tweets (prevent duplicate comments)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS commented_tweets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tweet_id TEXT NOT NULL,
-                tweet_author TEXT NOT NULL,
-                tweet_text TEXT,
-                our_reply_id TEXT,
-                our_reply_text TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(tweet_id)
+        try:
+            if logs:
+                cursor.executemany("""
+                    INSERT INTO activity_log 
+                    (activity_type, details, success, error_message, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                """, logs)
+            
+            self._apply_counters(cursor, counters)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def _apply_counters(self, cursor: sqlite3.Cursor, counters: Counter):
+        """
+        Add counter deltas keyed by (hour 'YYYY-MM-DD HH:00', column).
+        
+        Coalesced to one daily_activity UPDATE per day plus one rollup
+        upsert per day and per hour; the caller commits.
+        """
+        per_day: Dict[str, Counter] = {}
+        per_hour: Dict[str, Counter] = {}
+        for (hour, column), count in counters.items():
+            per_hour.setdefault(hour, Counter())[column] += count
+            per_day.setdefault(hour[:10], Counter())[column] += count
+        
+        for day, columns in per_day.items():
+            cursor.execute(
+                "INSERT OR IGNORE INTO daily_activity (date) VALUES (?)",
+                (day,)
             )
-        """)
+            assignments = ", ".join(f"{column} = {column} + ?" for column in columns)
+            cursor.execute(f"""
+                UPDATE daily_activity 
+                SET {assignments},
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE date = ?
+            """, (*columns.values(), day))
+        
+        for table, key_column, groups in (('stats_daily', 'date', per_day),
+                                          ('stats_hourly', 'hour', per_hour)):
+            for key, columns in groups.items():
+                names = ", ".join(columns)
+                placeholders = ", ".join("?" for _ in columns)
+                updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in columns)
+                cursor.execute(f"""
+                    INSERT INTO {table} ({key_column}, {names})
+                    VALUES (?, {placeholders})
+                    ON CONFLICT({key_column}) DO UPDATE SET {updates}
+                """, (key, *columns.values()))
+    
+    def init_database(self):
+        """Create or upgrade schema to the latest version"""
+        conn = self.get_connection()
+        migrate(conn)
         
-        conn.commit()
-        conn.close()
+        self.pool.inode = _file_inode(self.pool.db_path)
+        self.pool.schema_ready = True
     
     # ============= DAILY ACTIVITY =============
     
     def get_or_create_daily_activity(self, target_date: Optional[date] = None) -> int:
         """Get or create daily activity record, return ID"""
         if target_date is None:
-            target_date = date.today()
+            target_date = self._today()
         
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -180,55 +473,41 @@ class Database:
         
         row = cursor.fetchone()
         conn.commit()
-        conn.close()
         
         return row['id'] if row else None
     
     def increment_activity(self, activity_type: str, count: int = 1):
         """Increment activity counter for today"""
-        self.get_or_create_daily_activity()
+        column = ACTIVITY_COLUMNS.get(activity_type)
+        if not column:
+            return
         
+        if self.write_buffer:
+            self.write_buffer.add_counter(column, count)
+            return
+        
+        hour = self.clock.now().strftime('%Y-%m-%d %H:00')
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        column_map = {
-            'tweet': 'tweets_posted',
-            'like': 'likes_given',
-            'reply': 'replies_made',
-            'follow': 'follows_made',
-            'retweet': 'retweets_made'
-        }
-        
-        column = column_map.get(activity_type)
-        if not column:
-            conn.close()
-            return
-        
-        cursor.execute(f"""
-            UPDATE daily_activity 
-            SET {column} = {column} + ?,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE date = ?
-        """, (count, date.today()))
+        # Counter row, increment and rollups share one transaction
+        self._apply_counters(cursor, Counter({(hour, column): count}))
         
         conn.commit()
-        conn.close()
     
     def get_daily_activity(self, target_date: Optional[date] = None) -> Dict:
         """Get daily activity stats"""
         if target_date is None:
-            target_date = date.today()
+            target_date = self._today()
+        
+        self._flush_pending()
         
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute(
-            "SELECT * FROM daily_activity WHERE date = ?",
-            (target_date,)
-        )
+        cursor.execute(DASHBOARD_QUERIES['daily_activity'][0], (target_date,))
         
         row = cursor.fetchone()
-        conn.close()
         
         if row:
             return dict(row)
@@ -250,30 +529,125 @@ class Database:
         
         cursor.execute("""
             INSERT OR IGNORE INTO tweet_performance 
-            (tweet_id, tweet_text, tweet_type)
-            VALUES (?, ?, ?)
-        """, (tweet_id, tweet_text, tweet_type))
+            (tweet_id, tweet_text, tweet_type, posted_at, last_updated)
+            VALUES (?, ?, ?, ?, ?)
+        """, (tweet_id, tweet_text, tweet_type, self._timestamp(), self._timestamp()))
+        
+        if cursor.rowcount:
+            self._refresh_tweet_rollups(cursor, [tweet_id])
         
         conn.commit()
-        conn.close()
     
     def update_tweet_stats(self, tweet_id: str, views: int, likes: int, 
                           retweets: int, replies: int):
         """Update tweet performance stats"""
-        engagement_rate = (likes + retweets + replies) / views if views > 0 else 0
+        self.update_tweet_stats_batch([(tweet_id, views, likes, retweets, replies)])
+    
+    def update_tweet_stats_batch(self, stats: List[Tuple[str, int, int, int, int]]):
+        """
+        Update stats for many tweets in one transaction
+        
+        Args:
+            stats: (tweet_id, views, likes, retweets, replies) per tweet
+        """
+        if not stats:
+            return
+        
+        now = self._timestamp()
+        rows = []
+        for tweet_id, views, likes, retweets, replies in stats:
+            engagement_rate = (likes + retweets + replies) / views if views > 0 else 0
+            rows.append((views, likes, retweets, replies, engagement_rate, now, tweet_id))
         
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
+        cursor.executemany("""
             UPDATE tweet_performance
             SET views = ?, likes = ?, retweets = ?, replies = ?,
-                engagement_rate = ?, last_updated = CURRENT_TIMESTAMP
+                engagement_rate = ?, last_updated = ?
             WHERE tweet_id = ?
-        """, (views, likes, retweets, replies, engagement_rate, tweet_id))
+        """, rows)
+        
+        self._refresh_tweet_rollups(cursor, [row[-1] for row in rows])
+        
+        conn.commit()
+    
+    def touch_tweet_stats(self, tweet_ids: List[str]):
+        """Mark tweets as checked without changing stats (e.g. deleted tweets)"""
+        if not tweet_ids:
+            return
         
+        now = self._timestamp()
+        conn = self.get_connection()
+        conn.executemany("""
+            UPDATE tweet_performance SET last_updated = ?
+            WHERE tweet_id = ?
+        """, [(now, tweet_id) for tweet_id in tweet_ids])
         conn.commit()
-        conn.close()
+    
+    def get_tweets_due_for_refresh(self, tiers: List[Tuple[float, float]],
+                                   max_age_hours: float, limit: int) -> List[str]:
+        """
+        Tweet IDs whose stats are stale for their age, newest first
+        
+        Args:
+            tiers: (max tweet age hours, refresh interval minutes), ascending by age;
+                   tweets older than the last tier use its interval
+            max_age_hours: Tweets older than this are never refreshed
+            limit: Maximum IDs to return
+        """
+        if not tiers:
+            return []
+        
+        cases = " ".join("WHEN posted_at >= ? THEN ?" for _ in tiers)
+        bounds = []
+        for age, interval in tiers:
+            bounds += [self._timestamp(timedelta(hours=age)), self._timestamp(timedelta(minutes=interval))]
+        fallback = self._timestamp(timedelta(minutes=tiers[-1][1]))
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f"""
+            SELECT tweet_id FROM tweet_performance
+            WHERE posted_at >= ?
+            AND last_updated <= CASE {cases} ELSE ? END
+            ORDER BY posted_at DESC
+            LIMIT ?
+        """, (self._timestamp(timedelta(hours=max_age_hours)), *bounds, fallback, limit))
+        
+        return [row[0] for row in cursor.fetchall()]
+    
+    def _refresh_tweet_rollups(self, cursor: sqlite3.Cursor, tweet_ids: List[str]):
+        """
+        Recompute stats_daily tweet aggregates for the days these tweets were posted
+        
+        posted_at is UTC; days are local like every other stats_daily
+        counter, so each day is filtered on its UTC bounds.
+        """
+        if not tweet_ids:
+            return
+        
+        placeholders = ", ".join("?" for _ in tweet_ids)
+        cursor.execute(f"""
+            SELECT DISTINCT date(posted_at, 'localtime') AS day FROM tweet_performance
+            WHERE tweet_id IN ({placeholders})
+        """, tweet_ids)
+        days = [(row['day'], row['day'], row['day']) for row in cursor.fetchall()]
+        
+        cursor.executemany("""
+            INSERT INTO stats_daily (date, tweet_count, views_sum, likes_sum, engagement_sum)
+            SELECT ?, COUNT(*), COALESCE(SUM(views), 0), COALESCE(SUM(likes), 0),
+                   COALESCE(SUM(engagement_rate), 0)
+            FROM tweet_performance
+            WHERE posted_at >= datetime(?, 'utc') AND posted_at < datetime(?, '+1 day', 'utc')
+            ON CONFLICT(date) DO UPDATE SET
+                tweet_count = excluded.tweet_count,
+                views_sum = excluded.views_sum,
+                likes_sum = excluded.likes_sum,
+                engagement_sum = excluded.engagement_sum
+        """, days)
     
     def get_tweet_stats(self, tweet_id: str) -> Optional[Dict]:
         """Get stats for specific tweet"""
@@ -286,7 +660,6 @@ class Database:
         )
         
         row = cursor.fetchone()
-        conn.close()
         
         return dict(row) if row else None
     
@@ -295,14 +668,9 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT * FROM tweet_performance 
-            ORDER BY posted_at DESC 
-            LIMIT ?
-        """, (limit,))
+        cursor.execute(DASHBOARD_QUERIES['recent_tweets'][0], (self._timestamp(), limit))
         
         rows = cursor.fetchall()
-        conn.close()
         
         return [dict(row) for row in rows]
     
@@ -311,15 +679,9 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT * FROM tweet_performance 
-            WHERE posted_at >= datetime('now', '-' || ? || ' days')
-            ORDER BY engagement_rate DESC
-            LIMIT 1
-        """, (days,))
+        cursor.execute(DASHBOARD_QUERIES['best_tweet'][0], (self._timestamp(timedelta(days=days)),))
         
         row = cursor.fetchone()
-        conn.close()
         
         return dict(row) if row else None
     
@@ -328,7 +690,7 @@ class Database:
     def record_follower_count(self, followers: int, following: int):
         """Record daily follower count"""
         ratio = followers / following if following > 0 else 0
-        today = date.today()
+        today = self._today()
         
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -351,22 +713,25 @@ class Database:
             VALUES (?, ?, ?, ?, ?)
         """, (today, followers, following, ratio, new_followers))
         
+        cursor.execute("""
+            INSERT INTO stats_daily (date, followers_count, following_count, follower_snapshot)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT(date) DO UPDATE SET
+                followers_count = excluded.followers_count,
+                following_count = excluded.following_count,
+                follower_snapshot = 1
+        """, (today, followers, following))
+        
         conn.commit()
-        conn.close()
     
     def get_follower_growth(self, days: int = 30) -> List[Dict]:
         """Get follower growth for last N days"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT * FROM follower_growth 
-            WHERE date >= date('now', '-' || ? || ' days')
-            ORDER BY date ASC
-        """, (days,))
+        cursor.execute(DASHBOARD_QUERIES['follower_growth'][0], (self._days_ago(days),))
         
         rows = cursor.fetchall()
-        conn.close()
         
         return [dict(row) for row in rows]
     
@@ -375,26 +740,142 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT followers_count, following_count 
-            FROM follower_growth 
-            ORDER BY date DESC 
-            LIMIT 1
-        """)
+        cursor.execute(DASHBOARD_QUERIES['current_follower_count'][0], (self._days_ago(0),))
         
         row = cursor.fetchone()
-        conn.close()
         
         if row:
             return row['followers_count'], row['following_count']
         return 0, 0
     
+    # ============= SOCIAL GRAPH =============
+    
+    def load_social_graph(self) -> Dict[str, Dict]:
+        """Get follower/following snapshots and sync checkpoints per kind"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT kind, ids, pending, cursor, pass_started_at, completed_at
+            FROM social_graph
+        """)
+        
+        return {row['kind']: dict(row) for row in cursor.fetchall()}
+    
+    def save_social_graph(self, kind: str, ids: bytes, pending: Optional[bytes],
+                          sync_cursor: Optional[str], pass_started_at: Optional[float],
+                          completed_at: Optional[float],
+                          events: Optional[List[Tuple[str, str]]] = None):
+        """
+        Persist a snapshot/checkpoint, plus any (user_id, 'gained'|'lost')
+        events found by the same sync step, in one transaction
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            INSERT OR REPLACE INTO social_graph
+                (kind, ids, pending, cursor, pass_started_at, completed_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (kind, ids, pending, sync_cursor, pass_started_at, completed_at))
+        
+        if events:
+            now = self._timestamp()
+            cursor.executemany("""
+                INSERT INTO follower_events (kind, user_id, event, detected_at) VALUES (?, ?, ?, ?)
+            """, [(kind, user_id, event, now) for user_id, event in events])
+        
+        conn.commit()
+    
+    def get_follower_events(self, days: int = 7, kind: str = 'followers') -> List[Dict]:
+        """Get gained/lost events of the last N days, newest first"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT user_id, event, detected_at FROM follower_events
+            WHERE kind = ? AND detected_at >= ?
+            ORDER BY detected_at DESC, id DESC
+        """, (kind, self._timestamp(timedelta(days=int(days)))))
+        
+        return [dict(row) for row in cursor.fetchall()]
+    
+    # ============= SCHEDULE =============
+    
+    def get_schedule_state(self) -> Dict[str, Dict]:
+        """Get the last fire time and outcome per scheduled slot"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT slot, last_fire, last_status FROM schedule_state")
+        
+        return {row['slot']: dict(row) for row in cursor.fetchall()}
+    
+    def save_schedule_state(self, slot: str, last_fire: float, last_status: str):
+        """Record that `slot`'s occurrence at `last_fire` was handled (run or skipped)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            INSERT OR REPLACE INTO schedule_state (slot, last_fire, last_status, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        """, (slot, last_fire, last_status))
+        
+        conn.commit()
+    
+    def record_slot_timings(self, slot: str, run_started: float, timings: Dict[str, Dict],
+                            concurrent: bool):
+        """Store the step timings of one slot run (see SlotPipeline.timings)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.executemany("""
+            INSERT INTO slot_step_timings
+                (slot, run_started, step, start_offset, seconds, status, concurrent)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (slot, run_started, step, timing['start'], timing['seconds'], timing['status'], int(concurrent))
+            for step, timing in timings.items()
+        ])
+        
+        conn.commit()
+    
+    def get_slot_timings(self, since: float = 0) -> Dict[str, Dict]:
+        """
+        Average step timings per slot and mode since `since` (epoch seconds)
+        
+        Returns:
+            {'morning': {'concurrent': {'total': {'runs', 'avg_seconds', 'max_seconds'}, 'post': ...},
+                         'sequential': {...}}, ...}
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT slot, concurrent, step, COUNT(*) AS runs,
+                   AVG(seconds) AS avg_seconds, MAX(seconds) AS max_seconds
+            FROM slot_step_timings
+            WHERE run_started >= ? AND status != 'skipped'
+            GROUP BY slot, concurrent, step
+            ORDER BY slot, concurrent, MIN(id)
+        """, (since,))
+        
+        timings: Dict[str, Dict] = {}
+        for row in cursor.fetchall():
+            mode = 'concurrent' if row['concurrent'] else 'sequential'
+            timings.setdefault(row['slot'], {}).setdefault(mode, {})[row['step']] = {
+                'runs': row['runs'],
+                'avg_seconds': round(row['avg_seconds'], 3),
+                'max_seconds': round(row['max_seconds'], 3)
+            }
+        return timings
+    
     # ============= CONVERSIONS =============
     
     def add_conversion(self, wa_messages: int = 0, orders: int = 0, 
                       revenue: float = 0, notes: str = None):
         """Add conversion data"""
-        today = date.today()
+        today = self._today()
         
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -405,22 +886,25 @@ class Database:
             VALUES (?, ?, ?, ?, ?)
         """, (today, wa_messages, orders, revenue, notes))
         
+        cursor.execute("""
+            INSERT INTO stats_daily (date, wa_messages, orders, revenue)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(date) DO UPDATE SET
+                wa_messages = wa_messages + excluded.wa_messages,
+                orders = orders + excluded.orders,
+                revenue = revenue + excluded.revenue
+        """, (today, wa_messages, orders, revenue))
+        
         conn.commit()
-        conn.close()
     
     def get_conversions(self, days: int = 7) -> List[Dict]:
         """Get conversions for last N days"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT * FROM conversions 
-            WHERE date >= date('now', '-' || ? || ' days')
-            ORDER BY date DESC
-        """, (days,))
+        cursor.execute(DASHBOARD_QUERIES['conversions'][0], (self._days_ago(days),))
         
         rows = cursor.fetchall()
-        conn.close()
         
         return [dict(row) for row in rows]
     
@@ -429,17 +913,9 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT 
-                SUM(wa_messages) as total_messages,
-                SUM(orders) as total_orders,
-                SUM(revenue) as total_revenue
-            FROM conversions 
-            WHERE date >= date('now', '-' || ? || ' days')
-        """, (days,))
+        cursor.execute(DASHBOARD_QUERIES['conversion_summary'][0], (self._days_ago(days),))
         
         row = cursor.fetchone()
-        conn.close()
         
         if row:
             return {
@@ -453,7 +929,7 @@ class Database:
     
     def record_keyword_activity(self, keyword: str, tweets_found: int, engaged: int):
         """Record keyword search activity"""
-        today = date.today()
+        today = self._today()
         
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -468,27 +944,15 @@ class Database:
         """, (keyword, today, tweets_found, engaged, tweets_found, engaged))
         
         conn.commit()
-        conn.close()
     
     def get_keyword_performance(self, days: int = 7) -> List[Dict]:
         """Get keyword performance summary"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT 
-                keyword,
-                SUM(tweets_found) as total_found,
-                SUM(engaged) as total_engaged,
-                ROUND(CAST(SUM(engaged) AS FLOAT) / SUM(tweets_found) * 100, 2) as engagement_rate
-            FROM keyword_performance 
-            WHERE date >= date('now', '-' || ? || ' days')
-            GROUP BY keyword
-            ORDER BY total_engaged DESC
-        """, (days,))
+        cursor.execute(DASHBOARD_QUERIES['keyword_performance'][0], (self._days_ago(days), self._days_ago(0)))
         
         rows = cursor.fetchall()
-        conn.close()
         
         return [dict(row) for row in rows]
     
@@ -497,31 +961,31 @@ class Database:
     def log_activity(self, activity_type: str, details: str = None, 
                     success: bool = True, error_message: str = None):
         """Log bot activity"""
+        if self.write_buffer:
+            self.write_buffer.add_log(activity_type, details, success, error_message)
+            return
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute("""
             INSERT INTO activity_log 
-            (activity_type, details, success, error_message)
-            VALUES (?, ?, ?, ?)
-        """, (activity_type, details, success, error_message))
+            (activity_type, details, success, error_message, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, (activity_type, details, success, error_message, self._timestamp()))
         
         conn.commit()
-        conn.close()
     
     def get_recent_logs(self, limit: int = 50) -> List[Dict]:
         """Get recent activity logs"""
+        self._flush_pending()
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT * FROM activity_log 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        """, (limit,))
+        cursor.execute(DASHBOARD_QUERIES['recent_logs'][0], (self._timestamp(), limit))
         
         rows = cursor.fetchall()
-        conn.close()
         
         return [dict(row) for row in rows]
     
@@ -541,9 +1005,9 @@ class Database:
             """, (username, display_name, wa_number, wa_link, cookies_file, notes))
             
             conn.commit()
-            conn.close()
             return True
         except sqlite3.IntegrityError:
+            conn.rollback()
             return False  # Account already exists
     
     def get_accounts(self, active_only: bool = False) -> List[Dict]:
@@ -557,7 +1021,6 @@ class Database:
             cursor.execute("SELECT * FROM accounts ORDER BY username")
         
         rows = cursor.fetchall()
-        conn.close()
         
         return [dict(row) for row in rows]
     
@@ -568,7 +1031,6 @@ class Database:
         
         cursor.execute("SELECT * FROM accounts WHERE id = ?", (account_id,))
         row = cursor.fetchone()
-        conn.close()
         
         return dict(row) if row else None
     
@@ -579,7 +1041,6 @@ class Database:
         
         cursor.execute("SELECT * FROM accounts WHERE username = ?", (username,))
         row = cursor.fetchone()
-        conn.close()
         
         return dict(row) if row else None
     
@@ -610,7 +1071,6 @@ class Database:
         
         success = cursor.rowcount > 0
         conn.commit()
-        conn.close()
         
         return success
     
@@ -623,7 +1083,6 @@ class Database:
         
         success = cursor.rowcount > 0
         conn.commit()
-        conn.close()
         
         return success
     
@@ -641,7 +1100,6 @@ class Database:
         
         success = cursor.rowcount > 0
         conn.commit()
-        conn.close()
         
         return success
     
@@ -654,7 +1112,6 @@ class Database:
         
         cursor.execute("SELECT 1 FROM commented_tweets WHERE tweet_id = ?", (tweet_id,))
         result = cursor.fetchone()
-        conn.close()
         
         return result is not None
     
@@ -663,17 +1120,65 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT 1 FROM commented_tweets 
-            WHERE tweet_author = ? 
-            AND date(timestamp) = date('now')
-        """, (author,))
+        cursor.execute(DASHBOARD_QUERIES['replied_to_author_today'][0], (author, *self._utc_day()))
         
         result = cursor.fetchone()
-        conn.close()
         
         return result is not None
     
+    def get_replied_tweet_ids(self, tweet_ids: List[str]) -> set:
+        """Return the subset of `tweet_ids` we already replied to (one query per 500 ids)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        tweet_ids = [str(tweet_id) for tweet_id in tweet_ids]
+        found = set()
+        
+        for start in range(0, len(tweet_ids), 500):
+            chunk = tweet_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT tweet_id FROM commented_tweets WHERE tweet_id IN ({placeholders})",
+                chunk
+            )
+            found.update(row[0] for row in cursor.fetchall())
+        
+        return found
+    
+    def iter_replied_tweet_ids(self, batch_size: int = 10000) -> Iterator[str]:
+        """Stream every replied tweet_id without loading the table at once"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT tweet_id FROM commented_tweets")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row[0]
+    
+    def get_replied_tweet_count(self) -> int:
+        """Get total number of tracked replies"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT COUNT(*) FROM commented_tweets")
+        
+        return cursor.fetchone()[0]
+    
+    def get_authors_replied_today(self) -> set:
+        """Get authors we replied to today (UTC, same window as has_replied_to_author_today)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT DISTINCT tweet_author FROM commented_tweets
+            WHERE timestamp >= ? AND timestamp < ?
+        """, self._utc_day())
+        
+        return {row[0] for row in cursor.fetchall()}
+    
     def add_replied_tweet(self, tweet_id: str, tweet_author: str, tweet_text: str, 
                           our_reply_id: str, our_reply_text: str) -> bool:
         """Track a tweet we replied to"""
@@ -682,14 +1187,15 @@ class Database:
             cursor = conn.cursor()
             
             cursor.execute("""
-                INSERT INTO commented_tweets (tweet_id, tweet_author, tweet_text, our_reply_id, our_reply_text)
-                VALUES (?, ?, ?, ?, ?)
-            """, (tweet_id, tweet_author, tweet_text, our_reply_id, our_reply_text))
+                INSERT INTO commented_tweets
+                    (tweet_id, tweet_author, tweet_text, our_reply_id, our_reply_text, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (tweet_id, tweet_author, tweet_text, our_reply_id, our_reply_text, self._timestamp()))
             
             conn.commit()
-            conn.close()
             return True
         except sqlite3.IntegrityError:
+            conn.rollback()
             return False  # Already exists
     
     def get_reply_count_today(self) -> int:
@@ -697,13 +1203,9 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT COUNT(*) FROM commented_tweets 
-            WHERE date(timestamp) = date('now')
-        """)
+        cursor.execute(DASHBOARD_QUERIES['reply_count_today'][0], self._utc_day())
         
         count = cursor.fetchone()[0]
-        conn.close()
         
         return count
     
@@ -712,44 +1214,202 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT * FROM commented_tweets 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        """, (limit,))
+        cursor.execute(DASHBOARD_QUERIES['recent_replies'][0], (self._timestamp(), limit))
         
         rows = cursor.fetchall()
-        conn.close()
         
         return [dict(row) for row in rows]
     
+    # ============= LIKED TWEETS TRACKING =============
+    
+    def record_liked_tweet(self, tweet_id: str, keep: int = 5000):
+        """Remember a liked tweet, keeping only the `keep` most recent"""
+        conn = self.get_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO liked_tweets (tweet_id, liked_at) VALUES (?, ?)",
+            (str(tweet_id), self._timestamp())
+        )
+        conn.execute("""
+            DELETE FROM liked_tweets WHERE liked_at < (
+                SELECT liked_at FROM liked_tweets
+                ORDER BY liked_at DESC LIMIT 1 OFFSET ?
+            )
+        """, (keep - 1,))
+        conn.commit()
+    
+    def get_liked_tweet_ids(self, limit: int = 5000) -> List[str]:
+        """Most recently liked tweet ids, oldest first"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT tweet_id FROM liked_tweets
+            ORDER BY liked_at DESC LIMIT ?
+        """, (limit,))
+        
+        return [row[0] for row in reversed(cursor.fetchall())]
+    
+    # ============= RATE LIMITER STATE =============
+    
+    def load_rate_limiter_state(self) -> Dict[str, bytes]:
+        """Get persisted limiter events per action"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT action, events FROM rate_limiter_state")
+        
+        return {row['action']: bytes(row['events']) for row in cursor.fetchall()}
+    
+    def save_rate_limiter_state(self, action: str, events: bytes):
+        """Persist limiter events for one action"""
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT INTO rate_limiter_state (action, events, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(action) DO UPDATE SET
+                events = excluded.events,
+                updated_at = excluded.updated_at
+        """, (action, events))
+        conn.commit()
+    
+    # ============= SESSION PROFILE =============
+    
+    def get_session_profile(self, account_id: str) -> Optional[Dict]:
+        """Get the cached login profile for an account"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM session_profile WHERE account_id = ?", (account_id,))
+        
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    
+    def save_session_profile(self, account_id: str, user_id: str, screen_name: str,
+                             name: Optional[str], followers_count: int, following_count: int,
+                             cookies_sha256: str, fetched_at: float):
+        """Store (or replace) the cached login profile for an account"""
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT OR REPLACE INTO session_profile
+                (account_id, user_id, screen_name, name, followers_count,
+                 following_count, cookies_sha256, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (account_id, user_id, screen_name, name, followers_count,
+              following_count, cookies_sha256, fetched_at))
+        conn.commit()
+    
+    def delete_session_profile(self, account_id: str):
+        """Forget the cached login profile (cookies were rejected)"""
+        conn = self.get_connection()
+        conn.execute("DELETE FROM session_profile WHERE account_id = ?", (account_id,))
+        conn.commit()
+    
+    # ============= CIRCUIT BREAKERS =============
+    
+    def load_circuit_breakers(self) -> Dict[str, Dict]:
+        """Get persisted circuit breaker state per endpoint"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT endpoint, state, failures, trips, open_until, last_error
+            FROM circuit_breakers
+        """)
+        
+        return {row['endpoint']: dict(row) for row in cursor.fetchall()}
+    
+    def save_circuit_breaker(self, endpoint: str, state: str, failures: int,
+                             trips: int, open_until: float, last_error: Optional[str] = None):
+        """Persist circuit breaker state for one endpoint"""
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT INTO circuit_breakers
+                (endpoint, state, failures, trips, open_until, last_error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(endpoint) DO UPDATE SET
+                state = excluded.state,
+                failures = excluded.failures,
+                trips = excluded.trips,
+                open_until = excluded.open_until,
+                last_error = excluded.last_error,
+                updated_at = excluded.updated_at
+        """, (endpoint, state, failures, trips, open_until, last_error))
+        conn.commit()
+    
+    # ============= MEDIA CACHE =============
+    
+    def get_cached_media(self, sha256: str, account_id: str) -> Optional[Dict]:
+        """Get the cached upload of a file for an account"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT * FROM media_cache WHERE sha256 = ? AND account_id = ?
+        """, (sha256, account_id))
+        
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    
+    def save_cached_media(self, sha256: str, account_id: str, media_id: str,
+                          media_type: str, file_path: str, uploaded_at: float,
+                          expires_at: float):
+        """Store (or replace) the upload of a file for an account"""
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT INTO media_cache
+                (sha256, account_id, media_id, media_type, file_path, uploaded_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(sha256, account_id) DO UPDATE SET
+                media_id = excluded.media_id,
+                media_type = excluded.media_type,
+                file_path = excluded.file_path,
+                uploaded_at = excluded.uploaded_at,
+                expires_at = excluded.expires_at
+        """, (sha256, account_id, media_id, media_type, file_path, uploaded_at, expires_at))
+        conn.commit()
+    
+    def get_cached_media_list(self, account_id: str) -> List[Dict]:
+        """Get every cached upload for an account, soonest to expire first"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT * FROM media_cache WHERE account_id = ?
+            ORDER BY expires_at
+        """, (account_id,))
+        
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def delete_expired_media(self, account_id: str, before: float) -> int:
+        """Forget uploads that expired before `before` (epoch seconds)"""
+        conn = self.get_connection()
+        cursor = conn.execute("""
+            DELETE FROM media_cache WHERE account_id = ? AND expires_at < ?
+        """, (account_id, before))
+        conn.commit()
+        return cursor.rowcount
+    
     # ============= DASHBOARD STATS =============
     
     def get_dashboard_stats(self) -> Dict:
-        """Get comprehensive stats for dashboard"""
+        """Get comprehensive stats for dashboard (served from rollup tables)"""
         today_activity = self.get_daily_activity()
         followers, following = self.get_current_follower_count()
-        conversions_7d = self.get_conversion_summary(7)
-        conversions_30d = self.get_conversion_summary(30)
-        
-        # Get growth stats
-        growth_data = self.get_follower_growth(30)
         
-        # Calculate average metrics
+        # Averages, conversion sums and growth from one pass over <= 31 rollup rows
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT 
-                AVG(views) as avg_views,
-                AVG(likes) as avg_likes,
-                AVG(engagement_rate) as avg_engagement
-            FROM tweet_performance
-            WHERE posted_at >= datetime('now', '-7 days')
-        """)
+        cursor.execute(DASHBOARD_QUERIES['dashboard_rollup'][0], {
+            'week': self._days_ago(7),
+            'month': self._days_ago(30)
+        })
+        
+        rollup = cursor.fetchone()
+        tweets_7d = rollup['tweets_7d'] or 0
         
-        avg_stats = cursor.fetchone()
-        conn.close()
+        def average(total):
+            return (total or 0) / tweets_7d if tweets_7d else 0
         
         return {
             'today': today_activity,
@@ -757,15 +1417,83 @@ class Database:
                 'current': followers,
                 'following': following,
                 'ratio': followers / following if following > 0 else 0,
-                'growth_30d': len(growth_data)
+                'growth_30d': rollup['growth_30d'] or 0
             },
             'tweets': {
-                'avg_views': avg_stats['avg_views'] or 0 if avg_stats else 0,
-                'avg_likes': avg_stats['avg_likes'] or 0 if avg_stats else 0,
-                'avg_engagement': avg_stats['avg_engagement'] or 0 if avg_stats else 0
+                'avg_views': average(rollup['views_7d']),
+                'avg_likes': average(rollup['likes_7d']),
+                'avg_engagement': average(rollup['engagement_7d'])
             },
             'conversions': {
-                'week': conversions_7d,
-                'month': conversions_30d
+                'week': {
+                    'total_messages': rollup['messages_7d'] or 0,
+                    'total_orders': rollup['orders_7d'] or 0,
+                    'total_revenue': rollup['revenue_7d'] or 0
+                },
+                'month': {
+                    'total_messages': rollup['messages_30d'] or 0,
+                    'total_orders': rollup['orders_30d'] or 0,
+                    'total_revenue': rollup['revenue_30d'] or 0
+                }
             }
         }
+    
+    def get_hourly_activity(self, hours: int = 24) -> List[Dict]:
+        """Get per-hour activity counters for the last N hours"""
+        self._flush_pending()
+        
+        since = (self.clock.now() - timedelta(hours=hours)).strftime('%Y-%m-%d %H:00')
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(DASHBOARD_QUERIES['hourly_activity'][0], (since,))
+        
+        rows = cursor.fetchall()
+        
+        return [dict(row) for row in rows]
+    
+    def backfill_rollups(self):
+        """Rebuild rollup tables from the raw tables"""
+        self._flush_pending()
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            backfill_rollups(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    # ============= QUERY PLANS =============
+    
+    def explain_dashboard_queries(self) -> Dict[str, List[str]]:
+        """Get EXPLAIN QUERY PLAN details for every dashboard query"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        plans = {}
+        for name, (query, params) in DASHBOARD_QUERIES.items():
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            plans[name] = [row['detail'] for row in cursor.fetchall()]
+        
+        return plans
+    
+    def check_query_plans(self) -> List[Tuple[str, str]]:
+        """
+        Find dashboard queries that scan a table or a whole index.
+        
+        Returns:
+            List of (query name, plan detail) for every scan;
+            empty when all queries are index searches
+        """
+        problems = []
+        
+        for name, details in self.explain_dashboard_queries().items():
+            for detail in details:
+                if detail.startswith('SCAN '):
+                    problems.append((name, detail))
+        
+        return problems
@@ -0,0 +1,183 @@
+"""
+Reply dedupe index
+In-memory front for commented_tweets so reply candidates are checked without a query each
+"""
+
+import hashlib
+import math
+import threading
+import logging
+from datetime import timezone
+from typing import Iterable, List, Optional
+
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys.
+    
+    Answers "definitely not seen" or "maybe seen"; sized for `capacity`
+    keys at `error_rate` false positives (about 1.2 MB per million keys
+    at 1%).
+    """
+    
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, key: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+    
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+    
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+    
+    def is_full(self) -> bool:
+        """True once more keys were added than the filter was sized for"""
+        return self.count > self.capacity
+
+
+class ReplyDedupeIndex:
+    """
+    Dedupe checks for reply candidates.
+    
+    Tweet IDs live in a Bloom filter loaded from commented_tweets; a miss
+    means "never replied" with no query, and the rare hits are confirmed
+    against the database in one IN (...) query per batch. Authors replied
+    to today are kept as an exact set that resets when the UTC day
+    changes, matching has_replied_to_author_today().
+    """
+    
+    def __init__(self, db: Database, min_capacity: int = 100000, error_rate: float = 0.01):
+        """
+        Args:
+            db: Account database
+            min_capacity: Smallest Bloom filter size (tweet IDs)
+            error_rate: Target false-positive rate before DB confirmation
+        """
+        self.db = db
+        self.min_capacity = min_capacity
+        self.error_rate = error_rate
+        
+        self._lock = threading.Lock()
+        self._bloom: Optional[BloomFilter] = None
+        self._authors: set = set()
+        self._authors_day: Optional[str] = None
+        
+        # Stats
+        self.checks = 0
+        self.bloom_hits = 0
+        self.false_positives = 0
+    
+    def _today(self) -> str:
+        # commented_tweets.timestamp is UTC, on the database's clock
+        return self.db.clock.now(timezone.utc).strftime('%Y-%m-%d')
+    
+    def load(self):
+        """(Re)build the index from commented_tweets"""
+        rows = self.db.get_replied_tweet_count()
+        bloom = BloomFilter(max(self.min_capacity, rows * 2), self.error_rate)
+        
+        for tweet_id in self.db.iter_replied_tweet_ids():
+            bloom.add(str(tweet_id))
+        
+        authors = self.db.get_authors_replied_today()
+        
+        with self._lock:
+            self._bloom = bloom
+            self._authors = authors
+            self._authors_day = self._today()
+        
+        logger.debug(f"Reply index loaded: {rows} tweets, {len(authors)} authors today")
+    
+    def _ensure_current(self):
+        """Load on first use, resize a full filter, and roll the author set at midnight"""
+        if self._bloom is None or self._bloom.is_full():
+            self.load()
+            return
+        
+        if self._authors_day != self._today():
+            authors = self.db.get_authors_replied_today()
+            with self._lock:
+                self._authors = authors
+                self._authors_day = self._today()
+    
+    def add(self, tweet_id: str, author: str):
+        """Record a reply we just posted (call after add_replied_tweet)"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(str(tweet_id))
+            if self._authors_day == self._today():
+                self._authors.add(author)
+    
+    def filter_new(self, tweets: Iterable, author_fn) -> List:
+        """
+        Keep tweets we have not replied to, from authors not replied to today.
+        
+        Runs at most one database query (for Bloom filter hits), so call
+        it from the database thread.
+        
+        Args:
+            tweets: Candidate tweets (objects with `.id`)
+            author_fn: tweet -> author key as stored in commented_tweets
+        
+        Returns:
+            Remaining tweets, in input order
+        """
+        self._ensure_current()
+        
+        tweets = list(tweets)
+        with self._lock:
+            maybe_seen = [str(t.id) for t in tweets if str(t.id) in self._bloom]
+            authors = frozenset(self._authors)
+        
+        self.checks += len(tweets)
+        self.bloom_hits += len(maybe_seen)
+        
+        replied = self.db.get_replied_tweet_ids(maybe_seen) if maybe_seen else set()
+        self.false_positives += len(maybe_seen) - len(replied)
+        
+        result = []
+        for tweet in tweets:
+            if str(tweet.id) in replied:
+                logger.debug(f"⏭️  Skip: Already replied to tweet {tweet.id}")
+                continue
+            
+            author = author_fn(tweet)
+            if author in authors:
+                logger.debug(f"⏭️  Skip: Already replied to {author} today")
+                continue
+            
+            result.append(tweet)
+        
+        return result
+    
+    def get_stats(self) -> dict:
+        """Get index statistics"""
+        bloom = self._bloom
+        return {
+            'tweets_indexed': bloom.count if bloom else 0,
+            'capacity': bloom.capacity if bloom else 0,
+            'memory_bytes': len(bloom.bits) if bloom else 0,
+            'authors_today': len(self._authors),
+            'checks': self.checks,
+            'bloom_hits': self.bloom_hits,
+            'false_positives': self.false_positives
+        }
@@ -0,0 +1,720 @@
+"""
+Fake X API
+Local stand-in for the twikit endpoints the bot uses, with latency, error and 429 injection
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+import logging
+from collections import defaultdict, deque
+from email.parser import BytesParser
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+from .clock import SYSTEM_CLOCK, Clock
+
+logger = logging.getLogger(__name__)
+
+# GraphQL operation -> endpoint name
+GRAPHQL_OPERATIONS = {
+    'SearchTimeline': 'search_timeline',
+    'CreateTweet': 'create_tweet',
+    'FavoriteTweet': 'favorite_tweet',
+    'UserByScreenName': 'user_by_screen_name',
+    'UserByRestId': 'user_by_rest_id',
+    'TweetResultsByRestIds': 'tweet_results_by_rest_ids',
+}
+
+# REST path -> endpoint name
+REST_PATHS = {
+    '/1.1/account/settings.json': 'settings',
+    '/i/api/1.1/friendships/create.json': 'follow_user',
+    '/1.1/followers/ids.json': 'followers_ids',
+    '/1.1/friends/ids.json': 'friends_ids',
+    '/i/media/upload.json': 'upload_media',
+    '/i/media/upload2.json': 'upload_media',
+    '/help-center/forms/api/prod/user_state.json': 'user_state',
+}
+
+# Never delayed or failed: page scaffolding and twikit's own 429 follow-up
+INFRA_ENDPOINTS = {'home', 'ondemand', 'user_state', 'stats'}
+
+MEDIA_EXPIRES_AFTER = 86400
+
+# First id handed out for created tweets and uploaded media
+ID_BASE = 1_900_000_000_000_000_000
+
+STATUS_TEXT = {
+    200: 'OK', 204: 'No Content', 400: 'Bad Request', 401: 'Unauthorized',
+    404: 'Not Found', 429: 'Too Many Requests', 503: 'Service Unavailable'
+}
+
+SEARCH_WORDS = [
+    'kuota', 'internet', 'murah', 'paket', 'xl', 'lemot', 'sinyal', 'wifi',
+    'promo', 'data', 'streaming', 'game', 'kuliah', 'wfh', 'habis'
+]
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+def _stable_int(*parts) -> int:
+    """Deterministic positive int64 from arbitrary parts"""
+    digest = hashlib.blake2b('|'.join(map(str, parts)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') >> 2
+
+
+def _twitter_time(ts: float) -> str:
+    return time.strftime('%a %b %d %H:%M:%S +0000 %Y', time.gmtime(ts))
+
+
+def _json(status: int, payload, headers: Optional[Dict[str, str]] = None) -> Response:
+    return status, {'content-type': 'application/json', **(headers or {})}, json.dumps(payload).encode()
+
+
+def fake_cookies(screen_name: str) -> Dict[str, str]:
+    """Cookies that log in to the fake API as `screen_name`"""
+    return {
+        'auth_token': f'fake-{screen_name}',
+        'ct0': hashlib.md5(screen_name.encode()).hexdigest(),
+        'twid': f'u%3D{_stable_int("user", screen_name)}'
+    }
+
+
+class _Account:
+    """Server-side state of a logged-in account"""
+    
+    def __init__(self, screen_name: str, rng: random.Random):
+        self.screen_name = screen_name
+        self.user_id = _stable_int('user', screen_name)
+        self.followers: List[int] = [_stable_int('follower', screen_name, i)
+                                     for i in range(rng.randint(100, 3000))]
+        self.following: Dict[int, None] = dict.fromkeys(
+            _stable_int('following', screen_name, i) for i in range(rng.randint(50, 500))
+        )
+        self.favorites: Set[str] = set()
+        self.tweets = 0
+
+
+class _Tweet:
+    def __init__(self, tweet_id: str, author_id: int, author_name: str, text: str,
+                 created_at: float, reply_to: Optional[str] = None):
+        self.id = tweet_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.text = text
+        self.created_at = created_at
+        self.reply_to = reply_to
+
+
+class FakeXAPI:
+    """
+    In-memory X/Twitter API covering what the bot calls through twikit:
+    login (settings, UserByScreenName/UserByRestId), SearchTimeline (Latest
+    and People), CreateTweet, FavoriteTweet, friendships/create, media
+    upload (INIT/APPEND/FINALIZE/STATUS), TweetResultsByRestIds and the
+    follower/friend id lists, plus the x.com home page and ondemand.s file
+    twikit needs for its transaction ids.
+    
+    Accounts are identified by their `auth_token` cookie (see
+    fake_cookies()); any account logs in and gets deterministic synthetic
+    followers. Search results are generated from the query, so the same
+    query returns the same pages on every run with the same seed.
+    
+    Each API request (not the scaffolding) first waits a random latency,
+    then may be refused: per-account windows from `endpoint_limits` answer
+    429 with an `x-rate-limit-reset` header, like the real API, and
+    `rate_limit_rate` / `error_rate` inject random 429s / 503s.
+    
+    Use it over HTTP with serve() (point the bot at it with
+    `account.api_base_url` or TWITTER_API_BASE_URL), or in-process with
+    FakeXTransport.
+    """
+    
+    def __init__(self, latency: Tuple[float, float] = (0.02, 0.08),
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 endpoint_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+                 rate_limit_reset: float = 60.0, search_pages: int = 5,
+                 seed: int = 0, clock: Clock = SYSTEM_CLOCK):
+        """
+        Args:
+            latency: (min, max) seconds added to every API request
+            error_rate: Fraction of API requests answered with 503
+            rate_limit_rate: Fraction of API requests answered with 429
+            endpoint_limits: endpoint -> (requests, window seconds) per account
+            rate_limit_reset: Reset time of injected 429s, in seconds
+            search_pages: Result pages per search query
+            seed: Seed for injected failures and synthetic data
+            clock: Time source for timestamps, windows and latency
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.endpoint_limits = endpoint_limits or {}
+        self.rate_limit_reset = rate_limit_reset
+        self.search_pages = search_pages
+        self.seed = seed
+        self.clock = clock
+        self.rng = random.Random(seed)
+        
+        self.accounts: Dict[str, _Account] = {}
+        self.tweets: Dict[str, _Tweet] = {}
+        self.media: Dict[str, Dict] = {}
+        self._next_id = ID_BASE
+        self._windows: Dict[Tuple[str, str], Deque[float]] = defaultdict(deque)
+        
+        self.key_bytes = bytes(random.Random(seed).getrandbits(8) for _ in range(48))
+        
+        # Stats: endpoint -> outcome -> count
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.started_at = self.clock.time()
+    
+    # ============= STATE =============
+    
+    def _new_id(self) -> str:
+        self._next_id += 1
+        return str(self._next_id)
+    
+    def _account(self, cookies: Dict[str, str]) -> Optional[_Account]:
+        token = cookies.get('auth_token')
+        if not token:
+            return None
+        
+        screen_name = token[5:] if token.startswith('fake-') else f'user{_stable_int(token) % 10**8}'
+        account = self.accounts.get(screen_name)
+        if account is None:
+            account = _Account(screen_name, random.Random(_stable_int(self.seed, screen_name)))
+            self.accounts[screen_name] = account
+        return account
+    
+    def _account_by_id(self, user_id: int) -> Optional[_Account]:
+        for account in self.accounts.values():
+            if account.user_id == user_id:
+                return account
+        return None
+    
+    # ============= PAYLOADS =============
+    
+    def _user_fields(self, user_id: int, screen_name: Optional[str] = None) -> Dict:
+        account = self._account_by_id(user_id)
+        if account is not None:
+            screen_name = account.screen_name
+            followers = len(account.followers)
+            following = len(account.following)
+            statuses = account.tweets
+        else:
+            screen_name = screen_name or f'user{user_id % 10**8}'
+            followers = 20 + user_id % 8000
+            following = 10 + user_id % 1500
+            statuses = user_id % 5000
+        
+        return {
+            'created_at': _twitter_time(1_600_000_000 + user_id % 10**8),
+            'name': screen_name.replace('_', ' ').title(),
+            'screen_name': screen_name,
+            'profile_image_url_https': '',
+            'location': '',
+            'description': '',
+            'entities': {'description': {'urls': []}},
+            'pinned_tweet_ids_str': [],
+            'verified': False,
+            'possibly_sensitive': False,
+            'can_dm': False,
+            'can_media_tag': True,
+            'want_retweets': False,
+            'default_profile': True,
+            'default_profile_image': False,
+            'has_custom_timelines': False,
+            'followers_count': followers,
+            'fast_followers_count': 0,
+            'normal_followers_count': followers,
+            'friends_count': following,
+            'favourites_count': 0,
+            'listed_count': 0,
+            'media_count': 0,
+            'statuses_count': statuses,
+            'is_translator': False,
+            'translator_type': 'none',
+            'withheld_in_countries': []
+        }
+    
+    def _user_result(self, user_id: int, screen_name: Optional[str] = None) -> Dict:
+        return {
+            '__typename': 'User',
+            'rest_id': str(user_id),
+            'is_blue_verified': False,
+            'legacy': self._user_fields(user_id, screen_name)
+        }
+    
+    def _tweet_result(self, tweet: _Tweet, viewer: Optional[_Account]) -> Dict:
+        # Engagement grows with age so metrics refreshes see movement
+        age = max(0.0, self.clock.time() - tweet.created_at)
+        views = int(age / 4) + _stable_int(tweet.id) % 50
+        return {
+            '__typename': 'Tweet',
+            'rest_id': tweet.id,
+            'core': {'user_results': {'result': self._user_result(tweet.author_id, tweet.author_name)}},
+            'is_translatable': False,
+            'views': {'count': str(views), 'state': 'EnabledWithCount'},
+            'edit_control': {'edit_tweet_ids': [tweet.id], 'editable_until_msecs': '0',
+                             'is_edit_eligible': False, 'edits_remaining': '5'},
+            'legacy': {
+                'created_at': _twitter_time(tweet.created_at),
+                'full_text': tweet.text,
+                'lang': 'in',
+                'is_quote_status': False,
+                'in_reply_to_status_id_str': tweet.reply_to,
+                'possibly_sensitive': False,
+                'possibly_sensitive_editable': True,
+                'quote_count': 0,
+                'entities': {'hashtags': [], 'urls': [], 'user_mentions': [], 'symbols': []},
+                'reply_count': views // 200,
+                'favorite_count': views // 40,
+                'favorited': viewer is not None and tweet.id in viewer.favorites,
+                'retweet_count': views // 150,
+                'bookmark_count': 0,
+                'bookmarked': False,
+                'retweeted': False
+            }
+        }
+    
+    def _search_tweets(self, query: str, page: int, count: int) -> List[_Tweet]:
+        words = [w for w in query.split() if w.isalnum()] or SEARCH_WORDS[:2]
+        tweets = []
+        for i in range(count):
+            tweet_id = str(_stable_int('search', self.seed, query, page, i))
+            tweet = self.tweets.get(tweet_id)
+            if tweet is None:
+                rng = random.Random(int(tweet_id))
+                author_id = _stable_int('author', query, page, i)
+                text = ' '.join(rng.sample(SEARCH_WORDS, 4) + words) + f' #{rng.randint(1, 999)}'
+                tweet = _Tweet(tweet_id, author_id, f'user{author_id % 10**8}', text,
+                               self.clock.time() - rng.randint(60, 86400))
+                self.tweets[tweet_id] = tweet
+            tweets.append(tweet)
+        return tweets
+    
+    # ============= HOME PAGE =============
+    
+    def _home_page(self) -> bytes:
+        """x.com page with what twikit's ClientTransaction scrapes"""
+        rng = random.Random(self.seed)
+        frames = []
+        for n in range(4):
+            rows = ' C '.join(
+                ' '.join(str(rng.randint(0, 255)) for _ in range(11)) for _ in range(16)
+            )
+            frames.append(
+                f'<svg id="loading-x-anim-{n}"><g><path d="M0 0"></path>'
+                f'<path d="M 10,30 C{rows}"></path></g></svg>'
+            )
+        key = base64.b64encode(self.key_bytes).decode()
+        return (
+            '<!DOCTYPE html><html><head>'
+            f'<meta name="twitter-site-verification" content="{key}"/>'
+            '</head><body>'
+            f'{"".join(frames)}'
+            '<script>var chunks={"ondemand.s":"fake"};</script>'
+            '</body></html>'
+        ).encode()
+    
+    @staticmethod
+    def _ondemand_js() -> bytes:
+        return b'function f(a){return [(a[3], 16),(a[17], 16),(a[30], 16),(a[41], 16)]}'
+    
+    # ============= DISPATCH =============
+    
+    @staticmethod
+    def _endpoint(host: str, path: str) -> Optional[str]:
+        if path.startswith('/__fake/stats'):
+            return 'stats'
+        if 'ondemand.s.' in path:
+            return 'ondemand'
+        if path.startswith('/i/api/graphql/'):
+            return GRAPHQL_OPERATIONS.get(path.rstrip('/').rsplit('/', 1)[-1])
+        if path in REST_PATHS:
+            return REST_PATHS[path]
+        if path in ('', '/') and not host.startswith(('api.', 'upload.')):
+            return 'home'
+        return None
+    
+    async def _inject(self, endpoint: str, account: Optional[_Account]) -> Optional[Response]:
+        """Latency, then a refusal if a limit or the dice say so"""
+        low, high = self.latency
+        if high > 0:
+            await self.clock.sleep(self.rng.uniform(low, high))
+        
+        now = self.clock.time()
+        limit = self.endpoint_limits.get(endpoint)
+        if limit and account is not None:
+            requests, window = limit
+            events = self._windows[(account.screen_name, endpoint)]
+            while events and events[0] <= now - window:
+                events.popleft()
+            if len(events) >= requests:
+                return self._too_many_requests(events[0] + window)
+            events.append(now)
+        
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return self._too_many_requests(now + self.rate_limit_reset)
+        if roll < self.rate_limit_rate + self.error_rate:
+            return _json(503, {'errors': [{'code': 130, 'message': 'Over capacity'}]})
+        return None
+    
+    def _too_many_requests(self, reset: float) -> Response:
+        return _json(429, {'errors': [{'code': 88, 'message': 'Rate limit exceeded'}]}, {
+            'x-rate-limit-reset': str(int(reset) + 1),
+            'retry-after': str(max(1, int(reset - self.clock.time()) + 1))
+        })
+    
+    async def handle(self, method: str, url: str, headers: Dict[str, str],
+                     body: bytes = b'') -> Response:
+        """
+        Answer one request
+        
+        Args:
+            method: HTTP method
+            url: Original URL (or path + query with the original Host header)
+            headers: Request headers (any case)
+            body: Request body
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+        parts = urlsplit(url)
+        host = (parts.hostname or headers.get('host', '')).split(':')[0]
+        endpoint = self._endpoint(host, parts.path)
+        
+        if endpoint is None:
+            self.stats['unknown']['not_found'] += 1
+            return _json(404, {'errors': [{'code': 34, 'message': 'Sorry, that page does not exist'}]})
+        
+        cookies = {}
+        for item in headers.get('cookie', '').split(';'):
+            name, _, value = item.strip().partition('=')
+            if name:
+                cookies[name] = value
+        account = self._account(cookies)
+        
+        if endpoint not in INFRA_ENDPOINTS:
+            if account is None:
+                self.stats[endpoint]['unauthorized'] += 1
+                return _json(401, {'errors': [{'code': 32, 'message': 'Could not authenticate you'}]})
+            
+            refused = await self._inject(endpoint, account)
+            if refused is not None:
+                self.stats[endpoint]['rate_limited' if refused[0] == 429 else 'error'] += 1
+                return refused
+        
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        try:
+            response = getattr(self, f'_{endpoint}')(method, params, headers, body, account)
+        except (KeyError, ValueError, json.JSONDecodeError) as e:
+            self.stats[endpoint]['bad_request'] += 1
+            return _json(400, {'errors': [{'code': 214, 'message': f'Bad request: {e}'}]})
+        
+        self.stats[endpoint]['ok'] += 1
+        return response
+    
+    @staticmethod
+    def _variables(method: str, params: Dict, body: bytes) -> Dict:
+        if method == 'GET':
+            return json.loads(params.get('variables', '{}'))
+        return json.loads(body or b'{}').get('variables', {})
+    
+    # ============= ENDPOINTS =============
+    
+    def _home(self, method, params, headers, body, account) -> Response:
+        return 200, {'content-type': 'text/html'}, self._home_page()
+    
+    def _ondemand(self, method, params, headers, body, account) -> Response:
+        return 200, {'content-type': 'application/javascript'}, self._ondemand_js()
+    
+    def _user_state(self, method, params, headers, body, account) -> Response:
+        return _json(200, {'userState': 'normal'})
+    
+    def _stats(self, method, params, headers, body, account) -> Response:
+        return _json(200, self.get_stats())
+    
+    def _settings(self, method, params, headers, body, account) -> Response:
+        return _json(200, {'screen_name': account.screen_name, 'language': 'en'})
+    
+    def _user_by_screen_name(self, method, params, headers, body, account) -> Response:
+        screen_name = self._variables(method, params, body)['screen_name']
+        known = self.accounts.get(screen_name)
+        user_id = known.user_id if known else _stable_int('user', screen_name)
+        return _json(200, {'data': {'user': {'result': self._user_result(user_id, screen_name)}}})
+    
+    def _user_by_rest_id(self, method, params, headers, body, account) -> Response:
+        user_id = int(self._variables(method, params, body)['userId'])
+        return _json(200, {'data': {'user': {'result': self._user_result(user_id)}}})
+    
+    def _search_timeline(self, method, params, headers, body, account) -> Response:
+        variables = self._variables(method, params, body)
+        query = variables['rawQuery']
+        count = min(int(variables.get('count', 20)), 40)
+        cursor = variables.get('cursor') or 'page:0'
+        page = int(cursor.split(':')[1])
+        
+        entries = []
+        if page < self.search_pages:
+            if variables.get('product') == 'People':
+                for i in range(count):
+                    user_id = _stable_int('people', self.seed, query, page, i)
+                    entries.append({
+                        'entryId': f'user-{user_id}',
+                        'content': {'itemContent': {'user_results': {'result': self._user_result(user_id)}}}
+                    })
+            else:
+                for tweet in self._search_tweets(query, page, count):
+                    entries.append({
+                        'entryId': f'tweet-{tweet.id}',
+                        'content': {'itemContent': {'tweet_results': {'result': self._tweet_result(tweet, account)}}}
+                    })
+        
+        entries.append({'entryId': f'cursor-top-{page}', 'content': {'value': f'page:{max(0, page - 1)}'}})
+        entries.append({'entryId': f'cursor-bottom-{page}', 'content': {'value': f'page:{page + 1}'}})
+        
+        return _json(200, {'data': {'search_by_raw_query': {'search_timeline': {'timeline': {
+            'instructions': [{'type': 'TimelineAddEntries', 'entries': entries}]
+        }}}}})
+    
+    def _create_tweet(self, method, params, headers, body, account) -> Response:
+        variables = self._variables(method, params, body)
+        text = variables['tweet_text']
+        
+        for entity in variables.get('media', {}).get('media_entities', []):
+            media = self.media.get(str(entity['media_id']))
+            if media is None or media['expires_at'] < self.clock.time():
+                return _json(200, {'errors': [{'code': 324, 'message': 'Invalid media id'}]})
+        
+        reply_to = (variables.get('reply') or {}).get('in_reply_to_tweet_id')
+        tweet = _Tweet(self._new_id(), account.user_id, account.screen_name, text, self.clock.time(), reply_to)
+        self.tweets[tweet.id] = tweet
+        account.tweets += 1
+        
+        return _json(200, {'data': {'create_tweet': {'tweet_results': {
+            'result': self._tweet_result(tweet, account)
+        }}}})
+    
+    def _favorite_tweet(self, method, params, headers, body, account) -> Response:
+        tweet_id = str(self._variables(method, params, body)['tweet_id'])
+        if tweet_id in account.favorites:
+            return _json(200, {'errors': [{'code': 139, 'message': 'Has already favorited tweet'}]})
+        account.favorites.add(tweet_id)
+        return _json(200, {'data': {'favorite_tweet': 'Done'}})
+    
+    def _follow_user(self, method, params, headers, body, account) -> Response:
+        form = {k: v[-1] for k, v in parse_qs(body.decode()).items()}
+        user_id = int(form['user_id'])
+        # Newest first, like the real id lists
+        account.following.pop(user_id, None)
+        account.following = {user_id: None, **account.following}
+        
+        followed = self._account_by_id(user_id)
+        if followed is not None and account.user_id not in followed.followers:
+            followed.followers.insert(0, account.user_id)
+        
+        user = self._user_fields(user_id)
+        return _json(200, {**user, 'id': user_id, 'id_str': str(user_id), 'following': True})
+    
+    def _tweet_results_by_rest_ids(self, method, params, headers, body, account) -> Response:
+        results = []
+        for tweet_id in self._variables(method, params, body)['tweetIds']:
+            tweet = self.tweets.get(str(tweet_id))
+            results.append({'result': self._tweet_result(tweet, account)} if tweet else {})
+        return _json(200, {'data': {'tweetResult': results}})
+    
+    def _ids_page(self, ids: List[int], params: Dict) -> Response:
+        count = min(int(params.get('count', 5000)), 5000)
+        start = max(0, int(params.get('cursor', 0)))
+        end = start + count
+        next_cursor = end if end < len(ids) else 0
+        return _json(200, {
+            'ids': ids[start:end],
+            'next_cursor': next_cursor,
+            'next_cursor_str': str(next_cursor),
+            'previous_cursor': -start if start else 0,
+            'previous_cursor_str': str(-start if start else 0)
+        })
+    
+    def _followers_ids(self, method, params, headers, body, account) -> Response:
+        return self._ids_page(account.followers, params)
+    
+    def _friends_ids(self, method, params, headers, body, account) -> Response:
+        return self._ids_page(list(account.following), params)
+    
+    def _upload_media(self, method, params, headers, body, account) -> Response:
+        command = params['command']
+        
+        if command == 'INIT':
+            media_id = self._new_id()
+            self.media[media_id] = {
+                'owner': account.screen_name,
+                'media_type': params.get('media_type'),
+                'total_bytes': int(params.get('total_bytes', 0)),
+                'received': 0,
+                'expires_at': self.clock.time() + MEDIA_EXPIRES_AFTER
+            }
+            return _json(202, {
+                'media_id': int(media_id), 'media_id_string': media_id,
+                'expires_after_secs': MEDIA_EXPIRES_AFTER
+            })
+        
+        media = self.media[params['media_id']]
+        
+        if command == 'APPEND':
+            content_type = headers.get('content-type', '')
+            message = BytesParser().parsebytes(
+                f'Content-Type: {content_type}\r\n\r\n'.encode() + body
+            )
+            for part in message.get_payload() if message.is_multipart() else []:
+                media['received'] += len(part.get_payload(decode=True) or b'')
+            return 204, {}, b''
+        
+        info = {
+            'media_id': int(params['media_id']), 'media_id_string': params['media_id'],
+            'size': media['received'],
+            'expires_after_secs': int(media['expires_at'] - self.clock.time())
+        }
+        if (media['media_type'] or '').startswith('video'):
+            info['processing_info'] = {'state': 'succeeded', 'progress_percent': 100}
+        return _json(200, info)
+    
+    # ============= STATS =============
+    
+    def get_stats(self) -> Dict:
+        """Requests per endpoint and outcome"""
+        return {
+            'uptime': round(self.clock.time() - self.started_at, 1),
+            'accounts': len(self.accounts),
+            'tweets': len(self.tweets),
+            'endpoints': {endpoint: dict(outcomes) for endpoint, outcomes in sorted(self.stats.items())}
+        }
+    
+    # ============= HTTP SERVER =============
+    
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                if headers.get('transfer-encoding', '').lower() == 'chunked':
+                    body = b''
+                    while True:
+                        size = int((await reader.readline()).split(b';')[0], 16)
+                        chunk = await reader.readexactly(size + 2)
+                        if size == 0:
+                            break
+                        body += chunk[:-2]
+                else:
+                    body = await reader.readexactly(int(headers.get('content-length', 0)))
+                
+                status, response_headers, payload = await self.handle(method, target, headers, body)
+                
+                lines = [f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "OK")}']
+                lines += [f'{name}: {value}' for name, value in response_headers.items()]
+                lines.append(f'content-length: {len(payload)}')
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+                await writer.drain()
+                
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    async def serve(self, host: str = '127.0.0.1', port: int = 8800) -> asyncio.AbstractServer:
+        """Start serving HTTP on host:port"""
+        server = await asyncio.start_server(self._serve_connection, host, port)
+        logger.info(f"🧪 Fake X API listening on http://{host}:{port}")
+        return server
+
+
+class FakeXTransport(httpx.AsyncBaseTransport):
+    """httpx transport answering from a FakeXAPI in-process (no sockets)"""
+    
+    def __init__(self, api: FakeXAPI):
+        self.api = api
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        status, headers, payload = await self.api.handle(
+            request.method, str(request.url), dict(request.headers), body
+        )
+        return httpx.Response(status, headers=headers, content=payload)
+
+
+def _parse_limit(value: str) -> Tuple[str, Tuple[int, float]]:
+    """'search_timeline=50/900' -> ('search_timeline', (50, 900.0))"""
+    endpoint, _, limit = value.partition('=')
+    requests, _, window = limit.partition('/')
+    return endpoint, (int(requests), float(window or 900))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local fake X/Twitter API for offline runs and benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', default='20-80', help='Added latency in ms, "min-max"')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of 503 responses')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of random 429 responses')
+    parser.add_argument('--limit', action='append', default=[], metavar='ENDPOINT=N/SECONDS',
+                        help='Per-account window, e.g. search_timeline=50/900 (repeatable)')
+    parser.add_argument('--search-pages', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--write-cookies', nargs=2, metavar=('PATH', 'SCREEN_NAME'),
+                        help='Write a cookies.json for SCREEN_NAME and exit')
+    args = parser.parse_args()
+    
+    if args.write_cookies:
+        path, screen_name = args.write_cookies
+        with open(path, 'w') as file:
+            json.dump(fake_cookies(screen_name), file, indent=2)
+        print(f"Wrote fake cookies for @{screen_name} to {path}")
+        return
+    
+    low, _, high = args.latency.partition('-')
+    api = FakeXAPI(
+        latency=(float(low) / 1000, float(high or low) / 1000),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        endpoint_limits=dict(_parse_limit(value) for value in args.limit),
+        search_pages=args.search_pages,
+        seed=args.seed
+    )
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    
+    async def run():
+        server = await api.serve(args.host, args.port)
+        print(f"Point the bot at it with TWITTER_API_BASE_URL=http://{args.host}:{args.port}")
+        print(f"Stats: http://{args.host}:{args.port}/__fake/stats")
+        async with server:
+            await server.serve_forever()
+    
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
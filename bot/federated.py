@@ -0,0 +1,270 @@
+"""
+Federated fleet queries
+Read every account's metrics.db through one SQLite connection using ATTACH
+"""
+
+import os
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .account_manager import AccountManager
+from .database import SQL_TIMESTAMP, Database
+
+logger = logging.getLogger(__name__)
+
+# SQLite's compile-time default; used if the runtime limit can't be read
+DEFAULT_ATTACH_LIMIT = 10
+
+# Idle connections (with their attachments) kept for the next query
+POOL_SIZE = 4
+
+COUNTER_COLUMNS = ['tweets_posted', 'likes_given', 'replies_made', 'follows_made', 'retweets_made']
+
+
+class _FleetConnection:
+    """In-memory connection plus its attachments: alias -> (account_id, path)"""
+    
+    __slots__ = ('conn', 'attached')
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.attached: Dict[str, Tuple[str, str]] = {}
+
+
+class FederatedReader:
+    """
+    Fleet-wide aggregates over per-account databases.
+    
+    Queries run on in-memory connections with the enabled accounts'
+    metrics.db files ATTACHed read-only, so a fleet query is a single
+    UNION ALL pass instead of one Database per account. Fleets larger than
+    SQLite's attach limit are processed in chunks and merged.
+    
+    Connections are borrowed from a small locked pool and returned with
+    their attachments, so later queries (from any thread, e.g. Flask's
+    per-request threads) reuse them instead of attaching every file again.
+    
+    Date filters follow the account databases: `date` columns hold local
+    dates, timestamps are UTC.
+    """
+    
+    def __init__(self, account_manager: AccountManager, enabled_only: bool = True,
+                 pool_size: int = POOL_SIZE):
+        self.account_manager = account_manager
+        self.enabled_only = enabled_only
+        self.pool_size = pool_size
+        
+        self._lock = threading.Lock()
+        self._idle: List[_FleetConnection] = []
+    
+    # ============= CONNECTION =============
+    
+    def _databases(self) -> List[Tuple[str, str]]:
+        """(account_id, absolute db path) for every account with a database"""
+        if self.enabled_only:
+            accounts = self.account_manager.get_enabled_accounts()
+        else:
+            accounts = self.account_manager.get_all_accounts()
+        
+        databases = []
+        for account in accounts:
+            db_path = os.path.abspath(f"{account['folder']}/data/metrics.db")
+            if os.path.exists(db_path):
+                databases.append((account['id'], db_path))
+        
+        return databases
+    
+    @contextmanager
+    def _connection(self) -> Iterator[_FleetConnection]:
+        """Borrow a pooled connection for one query"""
+        with self._lock:
+            fleet_conn = self._idle.pop() if self._idle else None
+        
+        if fleet_conn is None:
+            conn = sqlite3.connect('file::memory:', uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            fleet_conn = _FleetConnection(conn)
+        
+        try:
+            yield fleet_conn
+        except BaseException:
+            # Attachments may be half-updated; don't hand it out again
+            fleet_conn.conn.close()
+            raise
+        
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(fleet_conn)
+                return
+        fleet_conn.conn.close()
+    
+    def _attach_limit(self, conn: sqlite3.Connection) -> int:
+        try:
+            return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        except (AttributeError, sqlite3.Error):
+            return DEFAULT_ATTACH_LIMIT
+    
+    def _attach(self, fleet_conn: _FleetConnection,
+                databases: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Make exactly `databases` attached, reusing existing attachments.
+        
+        Returns:
+            List of (alias, account_id)
+        """
+        conn = fleet_conn.conn
+        attached = fleet_conn.attached
+        wanted = {path for _, path in databases}
+        
+        for alias, (_, path) in list(attached.items()):
+            if path not in wanted:
+                conn.execute(f"DETACH DATABASE {alias}")
+                del attached[alias]
+        
+        by_path = {path: alias for alias, (_, path) in attached.items()}
+        used = set(attached)
+        result = []
+        
+        for account_id, path in databases:
+            alias = by_path.get(path)
+            if alias is None:
+                # Make sure the file has the current schema (rollups etc.)
+                Database(db_path=path)
+                
+                alias = next(f"acc{i}" for i in range(len(used) + 1) if f"acc{i}" not in used)
+                conn.execute("ATTACH DATABASE ? AS " + alias, (f"file:{path}?mode=ro",))
+                attached[alias] = (account_id, path)
+                used.add(alias)
+            result.append((alias, account_id))
+        
+        return result
+    
+    def _chunks(self, fleet_conn: _FleetConnection):
+        """Yield [(alias, account_id)] per attachable chunk"""
+        databases = self._databases()
+        limit = max(1, self._attach_limit(fleet_conn.conn))
+        
+        for start in range(0, len(databases), limit):
+            yield self._attach(fleet_conn, databases[start:start + limit])
+    
+    def _query(self, template: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """
+        Run `template` against every attached database in one UNION ALL.
+        
+        The template selects from `{db}.<table>`; an `account_id` column is
+        prepended to each row.
+        """
+        rows = []
+        
+        with self._connection() as fleet_conn:
+            for aliases in self._chunks(fleet_conn):
+                if not aliases:
+                    continue
+                
+                parts = []
+                args = []
+                for alias, account_id in aliases:
+                    parts.append(f"SELECT ? AS account_id, * FROM ({template.format(db=alias)})")
+                    args.extend((account_id, *params))
+                
+                rows.extend(fleet_conn.conn.execute(" UNION ALL ".join(parts), args).fetchall())
+        
+        return rows
+    
+    def close(self):
+        """Close the idle pooled connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for fleet_conn in idle:
+            fleet_conn.conn.close()
+    
+    @staticmethod
+    def _days_ago(days: float) -> str:
+        """Local date `days` before today, for `date` columns"""
+        return (date.today() - timedelta(days=days)).isoformat()
+    
+    # ============= FLEET AGGREGATES =============
+    
+    def get_today_activity(self, target_date: Optional[date] = None) -> Dict:
+        """Today's counters per account and fleet totals"""
+        day = (target_date or date.today()).isoformat()
+        columns = ", ".join(COUNTER_COLUMNS)
+        
+        rows = self._query(
+            f"SELECT {columns} FROM {{db}}.stats_daily WHERE date = ?", (day,)
+        )
+        
+        accounts = {row['account_id']: {c: row[c] or 0 for c in COUNTER_COLUMNS} for row in rows}
+        totals = {c: sum(a[c] for a in accounts.values()) for c in COUNTER_COLUMNS}
+        
+        return {'date': day, 'totals': totals, 'accounts': accounts}
+    
+    def get_total_tweets_today(self) -> int:
+        """Tweets posted today across the fleet"""
+        return self.get_today_activity()['totals']['tweets_posted']
+    
+    def get_likes_per_account(self, days: int = 1) -> Dict[str, int]:
+        """Likes given per account over the last N days (including today)"""
+        rows = self._query("""
+            SELECT COALESCE(SUM(likes_given), 0) AS likes
+            FROM {db}.stats_daily
+            WHERE date > ?
+        """, (self._days_ago(days),))
+        
+        return {row['account_id']: row['likes'] for row in rows}
+    
+    def get_best_tweet(self, days: int = 7) -> Optional[Dict]:
+        """Best tweet by engagement rate across all accounts"""
+        rows = self._query("""
+            SELECT * FROM {db}.tweet_performance
+            WHERE posted_at >= ?
+            ORDER BY engagement_rate DESC
+            LIMIT 1
+        """, ((datetime.now(timezone.utc) - timedelta(days=days)).strftime(SQL_TIMESTAMP),))
+        
+        if not rows:
+            return None
+        
+        return dict(max(rows, key=lambda row: row['engagement_rate'] or 0))
+    
+    def get_fleet_summary(self) -> Dict:
+        """Fleet totals plus 30-day conversions and follower counts per account"""
+        today = self.get_today_activity()
+        
+        rows = self._query("""
+            SELECT
+                COALESCE(SUM(wa_messages), 0) AS wa_messages,
+                COALESCE(SUM(orders), 0) AS orders,
+                COALESCE(SUM(revenue), 0) AS revenue,
+                (SELECT followers_count FROM {db}.follower_growth
+                 ORDER BY date DESC LIMIT 1) AS followers
+            FROM {db}.stats_daily
+            WHERE date >= ?
+        """, (self._days_ago(30),))
+        
+        accounts = {}
+        for row in rows:
+            accounts[row['account_id']] = {
+                'today': today['accounts'].get(row['account_id'], {c: 0 for c in COUNTER_COLUMNS}),
+                'followers': row['followers'] or 0,
+                'conversions_30d': {
+                    'wa_messages': row['wa_messages'],
+                    'orders': row['orders'],
+                    'revenue': row['revenue']
+                }
+            }
+        
+        return {
+            'today': today['totals'],
+            'followers': sum(a['followers'] for a in accounts.values()),
+            'conversions_30d': {
+                key: sum(a['conversions_30d'][key] for a in accounts.values())
+                for key in ('wa_messages', 'orders', 'revenue')
+            },
+            'best_tweet': self.get_best_tweet(7),
+            'accounts': accounts
+        }
@@ -0,0 +1,292 @@
+"""
+Fleet rate limiter
+Global per-action budget shared by every account, across runner processes
+"""
+
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .account_manager import AccountManager
+from .rate_limiter import WINDOWS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = "data/fleet_limiter.db"
+
+# Accounts that haven't acquired or registered within this many seconds
+# no longer count toward the fair share
+MEMBER_TTL = 3600
+
+
+class FleetRateLimiter:
+    """
+    Global rate limits from accounts.yaml `settings.global_rate_limit`.
+    
+    Every granted action is a row in a small SQLite ledger, and each
+    decision runs in a BEGIN IMMEDIATE transaction, so any number of
+    runner processes (or dashboard-started runners) sharing the ledger
+    file stay under one budget. Each action's budget is split evenly
+    between the active accounts: an account gets at most
+    ceil(limit / active accounts) per window, so a busy account can't
+    starve the others.
+    """
+    
+    def __init__(self, limits: Dict, db_path: str = DEFAULT_LEDGER_PATH,
+                 member_ttl: float = MEMBER_TTL,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], Awaitable] = asyncio.sleep):
+        """
+        Args:
+            limits: e.g. {'tweets_per_hour': 15, 'likes_per_hour': 40}
+            db_path: Shared ledger file
+            member_ttl: Seconds an idle account keeps its share
+            clock: Returns current epoch seconds
+            sleep: Coroutine function used by acquire()
+        """
+        self.db_path = db_path
+        self.member_ttl = member_ttl
+        self.clock = clock
+        self.sleep = sleep
+        
+        # action -> [(window seconds, limit)]
+        self.limits: Dict[str, list] = {}
+        for key, limit in (limits or {}).items():
+            action, _, window = key.partition('_per_')
+            if window in WINDOWS:
+                self.limits.setdefault(action, []).append((WINDOWS[window], int(limit)))
+        
+        self._local = threading.local()
+        self._init_ledger()
+    
+    @classmethod
+    def from_account_manager(cls, account_manager: AccountManager,
+                             db_path: str = DEFAULT_LEDGER_PATH,
+                             clock: Callable[[], float] = time.time,
+                             sleep: Callable[[float], Awaitable] = asyncio.sleep) -> Optional['FleetRateLimiter']:
+        """Build from accounts.yaml, or None if no global limits are configured"""
+        limits = account_manager.get_global_rate_limits()
+        if not limits:
+            return None
+        return cls(limits, db_path=db_path, clock=clock, sleep=sleep)
+    
+    # ============= LEDGER =============
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _init_ledger(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fleet_actions (
+                action TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                ts REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fleet_actions_action_ts
+            ON fleet_actions (action, ts)
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fleet_members (
+                account_id TEXT PRIMARY KEY,
+                last_seen REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+    
+    def _touch(self, conn: sqlite3.Connection, account_id: str, now: float):
+        conn.execute("""
+            INSERT INTO fleet_members (account_id, last_seen) VALUES (?, ?)
+            ON CONFLICT(account_id) DO UPDATE SET last_seen = excluded.last_seen
+        """, (account_id, now))
+    
+    def _active_members(self, conn: sqlite3.Connection, now: float) -> int:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM fleet_members WHERE last_seen >= ?",
+            (now - self.member_ttl,)
+        ).fetchone()
+        return max(1, row[0])
+    
+    def _check(self, conn: sqlite3.Connection, account_id: str, action: str,
+               now: float) -> Tuple[float, Dict]:
+        """
+        Seconds until `account_id` may perform `action` (0 = now), plus usage.
+        
+        Must run inside the ledger transaction.
+        """
+        members = self._active_members(conn, now)
+        wait = 0.0
+        usage = {}
+        
+        for span, limit in self.limits.get(action, []):
+            since = now - span
+            share = math.ceil(limit / members)
+            
+            total = conn.execute(
+                "SELECT COUNT(*) FROM fleet_actions WHERE action = ? AND ts > ?",
+                (action, since)
+            ).fetchone()[0]
+            own = conn.execute(
+                "SELECT COUNT(*) FROM fleet_actions WHERE action = ? AND ts > ? AND account_id = ?",
+                (action, since, account_id)
+            ).fetchone()[0]
+            
+            usage[span] = {'total': total, 'limit': limit, 'own': own, 'share': share}
+            
+            if limit <= 0:
+                return float('inf'), usage
+            
+            # Wait for enough of the oldest fleet-wide / own rows to expire
+            if total >= limit:
+                row = conn.execute("""
+                    SELECT ts FROM fleet_actions WHERE action = ? AND ts > ?
+                    ORDER BY ts LIMIT 1 OFFSET ?
+                """, (action, since, total - limit)).fetchone()
+                wait = max(wait, row[0] + span - now)
+            
+            if own >= share:
+                row = conn.execute("""
+                    SELECT ts FROM fleet_actions WHERE action = ? AND ts > ? AND account_id = ?
+                    ORDER BY ts LIMIT 1 OFFSET ?
+                """, (action, since, account_id, own - share)).fetchone()
+                wait = max(wait, row[0] + span - now)
+        
+        return wait, usage
+    
+    def try_acquire(self, account_id: str, action: str) -> float:
+        """
+        Record `action` for `account_id` if the fleet budget allows it
+        
+        Returns:
+            0 if granted, otherwise seconds until it could be
+        """
+        if action not in self.limits:
+            return 0.0
+        
+        conn = self._connection()
+        now = self.clock()
+        
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._touch(conn, account_id, now)
+            
+            # Rows older than the longest window are never needed again
+            longest = max(span for span, _ in self.limits[action])
+            conn.execute(
+                "DELETE FROM fleet_actions WHERE action = ? AND ts <= ?",
+                (action, now - longest)
+            )
+            
+            wait, _ = self._check(conn, account_id, action, now)
+            if wait <= 0:
+                conn.execute(
+                    "INSERT INTO fleet_actions (action, account_id, ts) VALUES (?, ?, ?)",
+                    (action, account_id, now)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        return max(0.0, wait)
+    
+    def release(self, account_id: str, action: str):
+        """Give back the latest grant (the action itself failed)"""
+        if action not in self.limits:
+            return
+        
+        conn = self._connection()
+        conn.execute("""
+            DELETE FROM fleet_actions WHERE rowid = (
+                SELECT rowid FROM fleet_actions
+                WHERE action = ? AND account_id = ?
+                ORDER BY ts DESC LIMIT 1
+            )
+        """, (action, account_id))
+    
+    def register(self, account_id: str):
+        """Count an account toward the fair share from now on"""
+        conn = self._connection()
+        self._touch(conn, account_id, self.clock())
+    
+    def unregister(self, account_id: str):
+        """Stop counting an account toward the fair share"""
+        conn = self._connection()
+        conn.execute("DELETE FROM fleet_members WHERE account_id = ?", (account_id,))
+    
+    # ============= ASYNC API =============
+    
+    async def acquire(self, account_id: str, action: str,
+                      max_wait: Optional[float] = None) -> bool:
+        """
+        Wait for fleet capacity, then record the action
+        
+        The ledger is re-checked at least every minute since other
+        processes and membership changes can free capacity early.
+        
+        Returns:
+            True once granted, False if it would take longer than max_wait
+        """
+        deadline = None if max_wait is None else self.clock() + max_wait
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            wait = await loop.run_in_executor(None, self.try_acquire, account_id, action)
+            
+            if wait <= 0:
+                return True
+            
+            if deadline is not None and self.clock() + wait > deadline:
+                logger.warning(f"Fleet {action} limit reached for {account_id} (free in {wait:.0f}s)")
+                return False
+            
+            logger.info(f"⏳ Fleet {action} limit reached for {account_id}, waiting {wait:.0f}s")
+            await self.sleep(min(wait, 60))
+    
+    async def release_async(self, account_id: str, action: str):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.release, account_id, action)
+    
+    def get_status(self, account_id: Optional[str] = None) -> Dict:
+        """Fleet usage per action (and the given account's share)"""
+        conn = self._connection()
+        now = self.clock()
+        status = {}
+        
+        conn.execute("BEGIN")
+        try:
+            for action in self.limits:
+                _, usage = self._check(conn, account_id or '', action, now)
+                status[action] = {
+                    f"per_{name}": usage[span]
+                    for name, span in WINDOWS.items() if span in usage
+                }
+        finally:
+            conn.execute("COMMIT")
+        
+        status['active_accounts'] = self._active_members(conn, now)
+        return status
+    
+    def close(self):
+        """Close the calling thread's ledger connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,261 @@
+"""
+HTTP pool registry
+Process-wide keep-alive connection pools shared by every account and client
+"""
+
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees its host slot once closed"""
+    
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+    
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+    
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release:
+                release()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    Shared httpx transport with a per-host in-flight ceiling.
+    
+    Wraps one httpx.AsyncHTTPTransport (one connection pool) for an event
+    loop. A request holds its host's slot until the response body is
+    closed, so at most `per_host_limit` connections are busy per host no
+    matter how many clients share the pool.
+    
+    With `redirect` set (e.g. "http://127.0.0.1:8800") every request is
+    sent to that origin instead, keeping the original Host header; this
+    points twikit at a local stand-in API (see bot.fake_api).
+    """
+    
+    def __init__(self, key: Tuple, per_host_limit: int, limits: httpx.Limits,
+                 proxy: Optional[str] = None, redirect: Optional[str] = None):
+        self.key = key
+        self.per_host_limit = per_host_limit
+        self.redirect = httpx.URL(redirect) if redirect else None
+        self.http2 = HTTP2_AVAILABLE
+        self._transport = httpx.AsyncHTTPTransport(
+            limits=limits, http2=self.http2, proxy=proxy
+        )
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.refs = 0
+        
+        # Stats
+        self.requests = 0
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.waiting = 0
+        self.peak_in_flight = 0
+    
+    def _slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self.per_host_limit)
+            self._host_slots[host] = slot
+        return slot
+    
+    def _redirected(self, request: httpx.Request) -> httpx.Request:
+        url = request.url.copy_with(
+            scheme=self.redirect.scheme, host=self.redirect.host, port=self.redirect.port
+        )
+        return httpx.Request(
+            request.method, url, headers=request.headers,
+            stream=request.stream, extensions=request.extensions
+        )
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.redirect is not None:
+            request = self._redirected(request)
+        
+        host = request.url.host
+        slot = self._slot(host)
+        
+        self.waiting += 1
+        try:
+            await slot.acquire()
+        finally:
+            self.waiting -= 1
+        
+        self.requests += 1
+        self.in_flight[host] += 1
+        self.peak_in_flight = max(self.peak_in_flight, sum(self.in_flight.values()))
+        
+        def release():
+            self.in_flight[host] -= 1
+            slot.release()
+        
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions
+        )
+    
+    async def aclose(self):
+        # Shared: clients closing must not tear down the pool
+        pass
+    
+    async def close_pool(self):
+        """Really close the underlying connection pool"""
+        await self._transport.aclose()
+    
+    def get_stats(self) -> Dict:
+        """Pool utilization"""
+        pool = getattr(self._transport, '_pool', None)
+        connections = list(getattr(pool, 'connections', []) or [])
+        idle = sum(1 for conn in connections if conn.is_idle())
+        
+        return {
+            'upstream': self.key[1],
+            'proxy': bool(self.key[2]),
+            'redirect': str(self.redirect) if self.redirect else None,
+            'http2': self.http2,
+            'clients': self.refs,
+            'requests': self.requests,
+            'connections': len(connections),
+            'idle_connections': idle,
+            'in_flight': sum(self.in_flight.values()),
+            'in_flight_by_host': {h: n for h, n in self.in_flight.items() if n},
+            'peak_in_flight': self.peak_in_flight,
+            'waiting': self.waiting,
+            'per_host_limit': self.per_host_limit
+        }
+
+
+class HTTPPoolRegistry:
+    """
+    One connection pool per (event loop, upstream, proxy, redirect).
+    
+    Clients handed out by client() share their pool's keep-alive
+    connections (and HTTP/2 when `h2` is installed) but each has its own
+    cookie jar, so accounts never see each other's session cookies.
+    Pools are reference counted and closed when their last client is
+    released.
+    """
+    
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, per_host_limit: int = 10):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.per_host_limit = per_host_limit
+        
+        self._lock = threading.Lock()
+        self._pools: Dict[Tuple, Tuple[PooledTransport, weakref.ref]] = {}
+        self._clients: "weakref.WeakKeyDictionary[httpx.AsyncClient, PooledTransport]" = weakref.WeakKeyDictionary()
+    
+    def _prune(self):
+        """Forget pools whose event loop is gone (their sockets died with it)"""
+        for key, (_, loop_ref) in list(self._pools.items()):
+            loop = loop_ref()
+            if loop is None or loop.is_closed():
+                del self._pools[key]
+    
+    def transport(self, upstream: str, proxy: Optional[str] = None,
+                  redirect: Optional[str] = None) -> PooledTransport:
+        """Get (or create) the shared transport for the running loop"""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), upstream, proxy, redirect)
+        
+        with self._lock:
+            self._prune()
+            entry = self._pools.get(key)
+            if entry is None:
+                transport = PooledTransport(key, self.per_host_limit, self.limits, proxy, redirect)
+                self._pools[key] = (transport, weakref.ref(loop))
+                logger.debug(f"Created HTTP pool for {upstream} (http2={transport.http2})")
+            else:
+                transport = entry[0]
+            transport.refs += 1
+        
+        return transport
+    
+    def client(self, upstream: str, proxy: Optional[str] = None,
+               redirect: Optional[str] = None, **kwargs) -> httpx.AsyncClient:
+        """
+        New AsyncClient (own cookies) on the shared pool for `upstream`
+        
+        Args:
+            upstream: Pool name, e.g. 'twitter' or 'ai'
+            proxy: Proxy URL; clients behind different proxies never share sockets
+            redirect: Send every request to this origin instead (local test API)
+            **kwargs: Passed to httpx.AsyncClient (timeout, follow_redirects, ...)
+        """
+        transport = self.transport(upstream, proxy, redirect)
+        client = httpx.AsyncClient(transport=transport, **kwargs)
+        self._clients[client] = transport
+        return client
+    
+    async def release(self, client: httpx.AsyncClient):
+        """Release a client from client(); closes the pool after its last client"""
+        transport = self._clients.pop(client, None)
+        await client.aclose()
+        if transport is None:
+            return
+        
+        with self._lock:
+            transport.refs -= 1
+            last = transport.refs <= 0
+            if last and self._pools.get(transport.key, (None,))[0] is transport:
+                del self._pools[transport.key]
+        
+        if last:
+            await transport.close_pool()
+    
+    def get_stats(self) -> Dict:
+        """Utilization of every live pool"""
+        with self._lock:
+            self._prune()
+            pools = [transport for transport, _ in self._pools.values()]
+        
+        return {
+            'pools': [transport.get_stats() for transport in pools],
+            'http2_available': HTTP2_AVAILABLE,
+            'max_connections': self.limits.max_connections,
+            'per_host_limit': self.per_host_limit
+        }
+
+
+_registry: Optional[HTTPPoolRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> HTTPPoolRegistry:
+    """Process-wide registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = HTTPPoolRegistry()
+        return _registry
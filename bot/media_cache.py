@@ -0,0 +1,237 @@
+"""
+Media upload cache
+Reuses uploaded media_ids by file content so template images aren't re-uploaded every slot
+"""
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import time
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .async_database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+# Uploaded media expires upstream 24h after INIT (`expires_after_secs`);
+# twikit doesn't expose it, so entries are trusted for a bit less
+MEDIA_TTL = 23 * 3600
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaUploadCache:
+    """
+    media_ids keyed by (file SHA-256, account) with their upstream expiry.
+    
+    The same template image is posted several times a day, and a media_id
+    stays attachable until it expires, so an upload is reused for as long
+    as it has more than `min_remaining` seconds left. Keying on the content
+    hash means an edited file is uploaded again even if its path is the
+    same. Hashes are memoized per (path, size, mtime) and computed off the
+    event loop.
+    
+    The background task re-uploads media that will expire within
+    `refresh_ahead` seconds, so a slot always finds a valid id instead of
+    uploading on the critical path right before posting.
+    """
+    
+    def __init__(self, upload: Callable[[str], Awaitable[Optional[str]]],
+                 database: AsyncDatabase, account_id: str = 'default',
+                 ttl: float = MEDIA_TTL, min_remaining: float = 600,
+                 refresh_ahead: float = 7200, check_interval: float = 600,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], Awaitable] = asyncio.sleep):
+        """
+        Args:
+            upload: Coroutine function that uploads a file and returns its media_id
+            database: Account database
+            account_id: Owner of the uploads (media_ids aren't usable by other accounts)
+            ttl: Seconds an upload is trusted after it completes
+            min_remaining: Re-upload instead of reusing an id with less time left
+            refresh_ahead: Background re-upload window before expiry
+            check_interval: Seconds between background checks
+            clock: Returns current epoch seconds
+            sleep: Coroutine function used between background checks
+        """
+        self.upload = upload
+        self.db = database
+        self.account_id = account_id
+        self.ttl = ttl
+        self.min_remaining = min_remaining
+        self.refresh_ahead = refresh_ahead
+        self.check_interval = check_interval
+        self.clock = clock
+        self.sleep = sleep
+        
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+        
+        # Stats
+        self.hits = 0
+        self.uploads = 0
+        self.refreshes = 0
+        self.errors = 0
+    
+    @classmethod
+    def from_settings(cls, upload: Callable[[str], Awaitable[Optional[str]]],
+                      database: AsyncDatabase, account_id: str, settings: Dict,
+                      clock: Callable[[], float] = time.time,
+                      sleep: Callable[[float], Awaitable] = asyncio.sleep) -> 'MediaUploadCache':
+        """Build from the `media_cache` settings block"""
+        return cls(
+            upload,
+            database,
+            account_id=account_id,
+            ttl=settings.get('ttl_hours', MEDIA_TTL / 3600) * 3600,
+            min_remaining=settings.get('min_remaining_minutes', 10) * 60,
+            refresh_ahead=settings.get('refresh_ahead_minutes', 120) * 60,
+            check_interval=settings.get('check_interval', 600),
+            clock=clock,
+            sleep=sleep
+        )
+    
+    async def _hash(self, path: str) -> str:
+        stat = os.stat(path)
+        memo = self._hashes.get(path)
+        if memo and memo[:2] == (stat.st_size, stat.st_mtime_ns):
+            return memo[2]
+        
+        loop = asyncio.get_running_loop()
+        sha256 = await loop.run_in_executor(None, file_sha256, path)
+        self._hashes[path] = (stat.st_size, stat.st_mtime_ns, sha256)
+        return sha256
+    
+    def _lock(self, sha256: str) -> asyncio.Lock:
+        lock = self._locks.get(sha256)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[sha256] = lock
+        return lock
+    
+    async def _upload(self, path: str, sha256: str) -> Optional[str]:
+        started = self.clock()
+        media_id = await self.upload(path)
+        if not media_id:
+            self.errors += 1
+            return None
+        
+        self.uploads += 1
+        # Expiry counts from INIT, i.e. before the upload started
+        await self.db.save_cached_media(
+            sha256, self.account_id, str(media_id), mimetypes.guess_type(path)[0],
+            path, self.clock(), started + self.ttl
+        )
+        return str(media_id)
+    
+    async def get_media_id(self, path: str) -> Optional[str]:
+        """
+        media_id for a file: a still-valid cached upload, or a fresh one
+        
+        Returns:
+            Media ID, or None if the upload failed
+        """
+        sha256 = await self._hash(path)
+        
+        # Slot and background refresh may want the same file at once
+        async with self._lock(sha256):
+            entry = await self.db.get_cached_media(sha256, self.account_id)
+            if entry and entry['expires_at'] - self.clock() > self.min_remaining:
+                self.hits += 1
+                logger.info(f"♻️  Reusing uploaded media {entry['media_id']} for {path}")
+                return entry['media_id']
+            
+            return await self._upload(path, sha256)
+    
+    async def refresh_expiring(self, paths: Iterable[str]) -> int:
+        """
+        Re-upload previously uploaded files that expire within `refresh_ahead`
+        
+        Files that were never uploaded are left for their first use.
+        
+        Returns:
+            Number of files re-uploaded
+        """
+        now = self.clock()
+        refreshed = 0
+        
+        for path in dict.fromkeys(paths):
+            if not os.path.exists(path):
+                continue
+            
+            sha256 = await self._hash(path)
+            async with self._lock(sha256):
+                entry = await self.db.get_cached_media(sha256, self.account_id)
+                if entry is None or entry['expires_at'] - now > self.refresh_ahead:
+                    continue
+                
+                logger.info(f"🔄 Re-uploading media ahead of expiry: {path}")
+                if await self._upload(path, sha256):
+                    refreshed += 1
+        
+        self.refreshes += refreshed
+        
+        # Long-expired rows of files no longer in use
+        await self.db.delete_expired_media(self.account_id, now - self.ttl)
+        
+        return refreshed
+    
+    async def run(self, paths: Callable[[], List[str]]):
+        """
+        Refresh every `check_interval` seconds until cancelled
+        
+        Args:
+            paths: Returns the media files currently in use (templates can change)
+        """
+        while True:
+            try:
+                await self.refresh_expiring(paths())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Media refresh error: {e}")
+            
+            await self.sleep(self.check_interval)
+    
+    def start(self, paths: Callable[[], List[str]]) -> asyncio.Task:
+        """Start the background task on the running loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(paths))
+        return self._task
+    
+    async def stop(self):
+        """Cancel the background task"""
+        if self._task is None:
+            return
+        
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'hits': self.hits,
+            'uploads': self.uploads,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'ttl': self.ttl,
+            'refresh_ahead': self.refresh_ahead
+        }
@@ -0,0 +1,172 @@
+"""
+Tweet metrics refresher
+Periodically pulls views/likes/retweets/replies for our recent tweets into tweet_performance
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .async_database import AsyncDatabase
+from .twitter_client import TwitterClient
+
+logger = logging.getLogger(__name__)
+
+# (max tweet age in hours, refresh interval in minutes): fresh tweets move
+# fast, older ones barely change
+REFRESH_TIERS: List[Tuple[float, float]] = [
+    (1, 10),
+    (24, 60),
+    (72, 360),
+    (168, 1440),
+]
+
+
+class TweetMetricsRefresher:
+    """
+    Background task that keeps tweet_performance stats current.
+    
+    Each cycle picks the tweets whose stats are stale for their age (see
+    REFRESH_TIERS), fetches them `batch_size` at a time with one
+    get_tweets_by_ids request per batch, and writes each batch with a
+    single executemany. At most `max_per_cycle` tweets are looked up per
+    cycle so the refresher never competes with the slot actions for the
+    account's request budget.
+    """
+    
+    def __init__(self, twitter: TwitterClient, database: AsyncDatabase,
+                 interval: float = 900, batch_size: int = 20, max_per_cycle: int = 60,
+                 max_age_days: float = 7, batch_delay: float = 5,
+                 tiers: Optional[List[Tuple[float, float]]] = None,
+                 sleep: Callable[[float], Awaitable] = asyncio.sleep):
+        """
+        Args:
+            twitter: Logged-in Twitter client
+            database: Account database
+            interval: Seconds between cycles
+            batch_size: Tweets per API request
+            max_per_cycle: Maximum tweets looked up per cycle
+            max_age_days: Tweets older than this are no longer refreshed
+            batch_delay: Seconds to wait between batches
+            tiers: Override REFRESH_TIERS
+            sleep: Coroutine function used between batches and cycles
+        """
+        self.twitter = twitter
+        self.db = database
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_per_cycle = max_per_cycle
+        self.max_age_days = max_age_days
+        self.batch_delay = batch_delay
+        self.tiers = tiers or REFRESH_TIERS
+        self.sleep = sleep
+        
+        self._task: Optional[asyncio.Task] = None
+        
+        # Stats
+        self.cycles = 0
+        self.refreshed = 0
+        self.missing = 0
+        self.errors = 0
+    
+    @classmethod
+    def from_settings(cls, twitter: TwitterClient, database: AsyncDatabase,
+                      settings: Dict,
+                      sleep: Callable[[float], Awaitable] = asyncio.sleep) -> 'TweetMetricsRefresher':
+        """Build from the `metrics_refresh` settings block"""
+        return cls(
+            twitter,
+            database,
+            interval=settings.get('interval', 900),
+            batch_size=settings.get('batch_size', 20),
+            max_per_cycle=settings.get('max_per_cycle', 60),
+            max_age_days=settings.get('max_age_days', 7),
+            batch_delay=settings.get('batch_delay', 5),
+            sleep=sleep
+        )
+    
+    async def refresh_once(self) -> int:
+        """
+        Run one refresh cycle
+        
+        Returns:
+            Number of tweets updated
+        """
+        due = await self.db.get_tweets_due_for_refresh(
+            self.tiers, self.max_age_days * 24, self.max_per_cycle
+        )
+        
+        updated = 0
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start:start + self.batch_size]
+            
+            if start:
+                await self.sleep(self.batch_delay)
+            
+            try:
+                metrics = await self.twitter.get_tweets_metrics(batch)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Tweet metrics refresh failed: {e}")
+                break
+            
+            await self.db.update_tweet_stats_batch(
+                [(tweet_id, *stats) for tweet_id, stats in metrics.items()]
+            )
+            
+            # Deleted / unavailable tweets: don't ask again until their next interval
+            missing = [tweet_id for tweet_id in batch if tweet_id not in metrics]
+            await self.db.touch_tweet_stats(missing)
+            
+            updated += len(metrics)
+            self.missing += len(missing)
+        
+        self.cycles += 1
+        self.refreshed += updated
+        
+        if due:
+            logger.info(f"📈 Refreshed stats for {updated}/{len(due)} tweets")
+        
+        return updated
+    
+    async def run(self):
+        """Refresh every `interval` seconds until cancelled"""
+        while True:
+            try:
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Tweet metrics refresher error: {e}")
+            
+            await self.sleep(self.interval)
+    
+    def start(self) -> asyncio.Task:
+        """Start the background task on the running loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+    
+    async def stop(self):
+        """Cancel the background task"""
+        if self._task is None:
+            return
+        
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def get_stats(self) -> Dict:
+        """Get refresher statistics"""
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'cycles': self.cycles,
+            'refreshed': self.refreshed,
+            'missing': self.missing,
+            'errors': self.errors,
+            'max_per_cycle': self.max_per_cycle
+        }
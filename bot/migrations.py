@@ -0,0 +1,496 @@
+"""
+Schema migrations
+Versioned upgrade steps for metrics.db, tracked with PRAGMA user_version
+"""
+
+import sqlite3
+import logging
+from typing import Callable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _base_schema(cursor: sqlite3.Cursor):
+    """v1: original tables"""
+    # Daily activity tracking
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_activity (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE UNIQUE NOT NULL,
+            tweets_posted INTEGER DEFAULT 0,
+            likes_given INTEGER DEFAULT 0,
+            replies_made INTEGER DEFAULT 0,
+            follows_made INTEGER DEFAULT 0,
+            retweets_made INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Tweet performance tracking
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tweet_performance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tweet_id TEXT UNIQUE NOT NULL,
+            tweet_text TEXT,
+            tweet_type TEXT,
+            posted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            views INTEGER DEFAULT 0,
+            likes INTEGER DEFAULT 0,
+            retweets INTEGER DEFAULT 0,
+            replies INTEGER DEFAULT 0,
+            engagement_rate FLOAT DEFAULT 0,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Follower growth tracking
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS follower_growth (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE UNIQUE NOT NULL,
+            followers_count INTEGER NOT NULL,
+            following_count INTEGER NOT NULL,
+            ratio FLOAT,
+            new_followers INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Business conversions
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS conversions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE NOT NULL,
+            wa_messages INTEGER DEFAULT 0,
+            orders INTEGER DEFAULT 0,
+            revenue FLOAT DEFAULT 0,
+            source TEXT DEFAULT 'twitter',
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Keyword performance
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS keyword_performance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            keyword TEXT NOT NULL,
+            date DATE NOT NULL,
+            tweets_found INTEGER DEFAULT 0,
+            engaged INTEGER DEFAULT 0,
+            conversions INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(keyword, date)
+        )
+    """)
+    
+    # Bot activity log
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS activity_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            activity_type TEXT NOT NULL,
+            details TEXT,
+            success BOOLEAN DEFAULT 1,
+            error_message TEXT
+        )
+    """)
+    
+    # Configuration history (for tracking changes)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS config_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            config_type TEXT NOT NULL,
+            changes TEXT,
+            user TEXT DEFAULT 'system'
+        )
+    """)
+    
+    # Twitter accounts management
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            display_name TEXT,
+            wa_number TEXT,
+            wa_link TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            cookies_file TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Tracking for replied tweets (prevent duplicate comments)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS commented_tweets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tweet_id TEXT NOT NULL,
+            tweet_author TEXT NOT NULL,
+            tweet_text TEXT,
+            our_reply_id TEXT,
+            our_reply_text TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(tweet_id)
+        )
+    """)
+
+
+def _index_plan(cursor: sqlite3.Cursor):
+    """v2: secondary indexes for the dashboard and dedupe queries"""
+    # Recent logs / log retention
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_activity_log_timestamp
+        ON activity_log (timestamp)
+    """)
+    
+    # Recent tweets, best tweet, 7-day averages
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tweet_performance_posted_at
+        ON tweet_performance (posted_at)
+    """)
+    
+    # Replied-to-author-today check
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_commented_tweets_author_timestamp
+        ON commented_tweets (tweet_author, timestamp)
+    """)
+    
+    # Replies today / recent replies
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_commented_tweets_timestamp
+        ON commented_tweets (timestamp)
+    """)
+    
+    # Conversion summaries
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_conversions_date
+        ON conversions (date)
+    """)
+    
+    # Keyword performance by date range
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_keyword_performance_date
+        ON keyword_performance (date)
+    """)
+
+
+def _rollup_tables(cursor: sqlite3.Cursor):
+    """v3: pre-aggregated hourly/daily stats, backfilled from raw tables"""
+    # Activity counters per local hour ('YYYY-MM-DD HH:00')
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_hourly (
+            hour TEXT PRIMARY KEY,
+            tweets_posted INTEGER DEFAULT 0,
+            likes_given INTEGER DEFAULT 0,
+            replies_made INTEGER DEFAULT 0,
+            follows_made INTEGER DEFAULT 0,
+            retweets_made INTEGER DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    
+    # One row per day with everything the dashboard summarizes
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_daily (
+            date TEXT PRIMARY KEY,
+            tweets_posted INTEGER DEFAULT 0,
+            likes_given INTEGER DEFAULT 0,
+            replies_made INTEGER DEFAULT 0,
+            follows_made INTEGER DEFAULT 0,
+            retweets_made INTEGER DEFAULT 0,
+            tweet_count INTEGER DEFAULT 0,
+            views_sum INTEGER DEFAULT 0,
+            likes_sum INTEGER DEFAULT 0,
+            engagement_sum FLOAT DEFAULT 0,
+            wa_messages INTEGER DEFAULT 0,
+            orders INTEGER DEFAULT 0,
+            revenue FLOAT DEFAULT 0,
+            followers_count INTEGER,
+            following_count INTEGER,
+            follower_snapshot INTEGER DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    
+    backfill_rollups(cursor)
+
+
+def backfill_rollups(cursor: sqlite3.Cursor):
+    """
+    Rebuild stats_daily / stats_hourly from the raw tables.
+    
+    Hourly counters are rebuilt from activity_log, which only has one row
+    per tweet, reply and follow; likes are logged per search so they only
+    appear in the daily rollup.
+    """
+    cursor.execute("DELETE FROM stats_daily")
+    cursor.execute("DELETE FROM stats_hourly")
+    
+    # Activity counters
+    cursor.execute("""
+        INSERT INTO stats_daily 
+        (date, tweets_posted, likes_given, replies_made, follows_made, retweets_made)
+        SELECT date, tweets_posted, likes_given, replies_made, follows_made, retweets_made
+        FROM daily_activity
+    """)
+    
+    # Tweet performance by local posting day (posted_at is UTC)
+    cursor.execute("""
+        INSERT INTO stats_daily (date, tweet_count, views_sum, likes_sum, engagement_sum)
+        SELECT date(posted_at, 'localtime'), COUNT(*), SUM(views), SUM(likes), SUM(engagement_rate)
+        FROM tweet_performance
+        WHERE posted_at IS NOT NULL
+        GROUP BY date(posted_at, 'localtime')
+        ON CONFLICT(date) DO UPDATE SET
+            tweet_count = excluded.tweet_count,
+            views_sum = excluded.views_sum,
+            likes_sum = excluded.likes_sum,
+            engagement_sum = excluded.engagement_sum
+    """)
+    
+    # Conversions
+    cursor.execute("""
+        INSERT INTO stats_daily (date, wa_messages, orders, revenue)
+        SELECT date, SUM(wa_messages), SUM(orders), SUM(revenue)
+        FROM conversions
+        WHERE true
+        GROUP BY date
+        ON CONFLICT(date) DO UPDATE SET
+            wa_messages = excluded.wa_messages,
+            orders = excluded.orders,
+            revenue = excluded.revenue
+    """)
+    
+    # Follower snapshots
+    cursor.execute("""
+        INSERT INTO stats_daily (date, followers_count, following_count, follower_snapshot)
+        SELECT date, followers_count, following_count, 1
+        FROM follower_growth
+        WHERE true
+        ON CONFLICT(date) DO UPDATE SET
+            followers_count = excluded.followers_count,
+            following_count = excluded.following_count,
+            follower_snapshot = 1
+    """)
+    
+    # Hourly counters from the activity log (timestamps are UTC)
+    cursor.execute("""
+        INSERT INTO stats_hourly (hour, tweets_posted, replies_made, follows_made)
+        SELECT 
+            strftime('%Y-%m-%d %H:00', timestamp, 'localtime'),
+            SUM(activity_type = 'post_tweet'),
+            SUM(activity_type = 'reply_tweet'),
+            SUM(activity_type = 'follow')
+        FROM activity_log
+        WHERE success = 1
+        AND activity_type IN ('post_tweet', 'reply_tweet', 'follow')
+        GROUP BY 1
+    """)
+
+
+def _rate_limiter_state(cursor: sqlite3.Cursor):
+    """v4: persisted sliding-window rate limiter events"""
+    # One row per action; events is a packed array of epoch timestamps
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rate_limiter_state (
+            action TEXT PRIMARY KEY,
+            events BLOB NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    """)
+
+
+def _media_cache(cursor: sqlite3.Cursor):
+    """v5: uploaded media ids reusable until they expire upstream"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS media_cache (
+            sha256 TEXT NOT NULL,
+            account_id TEXT NOT NULL,
+            media_id TEXT NOT NULL,
+            media_type TEXT,
+            file_path TEXT,
+            uploaded_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (sha256, account_id)
+        ) WITHOUT ROWID
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_media_cache_expires
+        ON media_cache (account_id, expires_at)
+    """)
+
+
+def _circuit_breakers(cursor: sqlite3.Cursor):
+    """v6: per-endpoint circuit breaker state"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS circuit_breakers (
+            endpoint TEXT PRIMARY KEY,
+            state TEXT NOT NULL DEFAULT 'closed',
+            failures INTEGER NOT NULL DEFAULT 0,
+            trips INTEGER NOT NULL DEFAULT 0,
+            open_until REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    """)
+
+
+def _session_profile(cursor: sqlite3.Cursor):
+    """v7: cached login profile for warm starts"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS session_profile (
+            account_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            screen_name TEXT NOT NULL,
+            name TEXT,
+            followers_count INTEGER DEFAULT 0,
+            following_count INTEGER DEFAULT 0,
+            cookies_sha256 TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+
+def _social_graph(cursor: sqlite3.Cursor):
+    """v8: follower/following id snapshots with resumable sync"""
+    # ids / pending are packed arrays of int64 user ids (ids sorted)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS social_graph (
+            kind TEXT PRIMARY KEY,
+            ids BLOB NOT NULL,
+            pending BLOB,
+            cursor TEXT,
+            pass_started_at REAL,
+            completed_at REAL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS follower_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            event TEXT NOT NULL,
+            detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_follower_events_detected
+        ON follower_events (detected_at)
+    """)
+
+
+def _schedule_state(cursor: sqlite3.Cursor):
+    """v9: last fire time per scheduled slot, for catch-up after restarts"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schedule_state (
+            slot TEXT PRIMARY KEY,
+            last_fire REAL NOT NULL,
+            last_status TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    """)
+
+
+def _slot_step_timings(cursor: sqlite3.Cursor):
+    """v10: per-step wall times of slot runs"""
+    # step 'total' is the slot's own wall time; concurrent = steps overlapped
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS slot_step_timings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            slot TEXT NOT NULL,
+            run_started REAL NOT NULL,
+            step TEXT NOT NULL,
+            start_offset REAL,
+            seconds REAL NOT NULL,
+            status TEXT NOT NULL,
+            concurrent INTEGER NOT NULL
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_slot_step_timings_run
+        ON slot_step_timings (run_started)
+    """)
+
+
+def _liked_tweets(cursor: sqlite3.Cursor):
+    """v11: tweets this account liked, so restarts don't like them again"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS liked_tweets (
+            tweet_id TEXT PRIMARY KEY,
+            liked_at TIMESTAMP NOT NULL
+        ) WITHOUT ROWID
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_liked_tweets_liked_at
+        ON liked_tweets (liked_at)
+    """)
+
+
+# Ordered upgrade steps: (version, description, step)
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, 'base schema', _base_schema),
+    (2, 'index plan', _index_plan),
+    (3, 'rollup tables', _rollup_tables),
+    (4, 'rate limiter state', _rate_limiter_state),
+    (5, 'media cache', _media_cache),
+    (6, 'circuit breakers', _circuit_breakers),
+    (7, 'session profile', _session_profile),
+    (8, 'social graph', _social_graph),
+    (9, 'schedule state', _schedule_state),
+    (10, 'slot step timings', _slot_step_timings),
+    (11, 'liked tweets', _liked_tweets),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get current schema version of a database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply pending migrations in order.
+    
+    Each step runs in its own IMMEDIATE transaction together with the
+    user_version bump, so concurrent processes opening the same file
+    (bot runner + dashboards) never apply a step twice.
+    
+    Returns:
+        Schema version after migrating
+    """
+    version = get_schema_version(conn)
+    
+    for step_version, description, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock
+            version = get_schema_version(conn)
+            if step_version <= version:
+                conn.rollback()
+                continue
+            
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(step_version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        version = step_version
+        logger.info(f"Database migrated to v{step_version} ({description})")
+    
+    return version
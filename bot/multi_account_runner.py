@@ -6,10 +6,13 @@ Run multiple Twitter accounts concurrently
 import asyncio
 import logging
 from typing import Dict, List, Optional, Set
-from datetime import datetime
 
 from .account_manager import AccountManager
 from .automation import BotAutomation
+from .fleet_limiter import FleetRateLimiter
+from .clock import SYSTEM_CLOCK, Clock
+from .runtime_stats import RuntimeStats, get_runtime_stats
+from .scheduler import SlotScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -24,15 +27,44 @@ class MultiAccountRunner:
     - Monitor account health
     - Isolate errors per account
     - Resource management
+    
+    All accounts' slots are fired by one SlotScheduler task, which sleeps
+    until the next slot of any account is due. Each account's slots start
+    at a fixed offset into `slot_stagger_minutes`, and at most
+    `max_concurrent_accounts` slots execute at the same time.
+    
+    While accounts are running, the process's search cache, call metrics
+    and HTTP pool stats are published to the shared runtime stats file
+    for the dashboards.
     """
     
-    def __init__(self):
-        """Initialize MultiAccountRunner."""
+    def __init__(self, clock: Clock = SYSTEM_CLOCK, stats: Optional[RuntimeStats] = None):
+        """
+        Initialize MultiAccountRunner.
+        
+        Args:
+            clock: Time source and sleep for every account (a VirtualClock for simulations)
+            stats: Where to publish runtime stats (default: the shared stats file)
+        """
         self.account_manager = AccountManager()
+        self.clock = clock
+        self.stats = stats or get_runtime_stats()
+        self.stats_task: Optional[asyncio.Task] = None
+        
+        # Global rate limits from accounts.yaml, shared by every account
+        # (and every runner process using the same ledger file)
+        self.fleet_limiter: Optional[FleetRateLimiter] = FleetRateLimiter.from_account_manager(
+            self.account_manager, clock=clock.time, sleep=clock.sleep
+        )
         
-        # Active bots and tasks
+        # Active bots
         self.bots: Dict[str, BotAutomation] = {}
-        self.tasks: Dict[str, asyncio.Task] = {}
+        
+        # One timer heap for every account's slots; starts are staggered
+        # per account and at most max_concurrent_accounts slots execute at once
+        self.slot_stagger = self.account_manager.get_slot_stagger_minutes() * 60
+        self.scheduler = SlotScheduler(clock, max_concurrent=self.account_manager.get_max_concurrent())
+        self.scheduler_task: Optional[asyncio.Task] = None
         
         # Account status tracking
         self.statuses: Dict[str, Dict] = {}
@@ -73,23 +105,38 @@ class MultiAccountRunner:
             logger.info(f"🚀 Starting account: {account['name']} ({account['username']})")
             
             # Create bot instance
-            bot = BotAutomation(account_folder=account['folder'])
+            bot = BotAutomation(
+                account_folder=account['folder'],
+                fleet_limiter=self.fleet_limiter,
+                account_id=account_id,
+                clock=self.clock
+            )
             
             # Initialize bot
             success = await bot.initialize()
             
             if not success:
                 logger.error(f"❌ Failed to initialize account {account_id}")
+                await bot.cleanup()
+                return False
+            
+            try:
+                slots = bot.schedule_slots(stagger=self.slot_stagger)
+            except ValueError as e:
+                logger.error(f"❌ Invalid schedule for account {account_id}: {e}")
+                await bot.cleanup()
                 return False
             
             # Store bot
             self.bots[account_id] = bot
+            if self.fleet_limiter:
+                self.fleet_limiter.register(account_id)
             
-            # Create and store task
-            task = asyncio.create_task(
-                self._run_account_with_error_handling(account_id, bot)
-            )
-            self.tasks[account_id] = task
+            # Hand the account's slots to the shared scheduler
+            bot.is_running = True
+            bot.start_background(self.scheduler)
+            await self.scheduler.add(slots)
+            self._ensure_scheduler()
             
             # Update status
             self.statuses[account_id] = {
@@ -97,7 +144,7 @@ class MultiAccountRunner:
                 'name': account['name'],
                 'username': account['username'],
                 'status': 'running',
-                'started_at': datetime.now().isoformat(),
+                'started_at': self.clock.now().isoformat(),
                 'error': None
             }
             
@@ -109,42 +156,28 @@ class MultiAccountRunner:
             self._record_error(account_id, str(e))
             return False
     
-    async def _run_account_with_error_handling(self, account_id: str, bot: BotAutomation):
-        """
-        Run account with error handling and isolation.
-        
-        Args:
-            account_id: Account ID
-            bot: BotAutomation instance
-        """
+    def _ensure_scheduler(self):
+        """Start the scheduler (and stats publishing) tasks if they aren't running"""
+        if self.scheduler_task is None or self.scheduler_task.done():
+            self.scheduler_task = asyncio.create_task(self._run_scheduler())
+        if self.stats_task is None or self.stats_task.done():
+            self.stats_task = asyncio.create_task(self.stats.run(self.clock.sleep))
+    
+    async def _run_scheduler(self):
+        """Run the shared scheduler (slot errors are isolated per slot)"""
         try:
-            logger.info(f"🏃 Running scheduled mode for account {account_id}")
-            await bot.run_scheduled()
-            
+            logger.info("🏃 Running scheduled mode")
+            await self.scheduler.run()
         except asyncio.CancelledError:
-            logger.info(f"⚠️  Account {account_id} task cancelled")
+            logger.info("⚠️  Scheduler task cancelled")
             raise
-            
         except Exception as e:
-            logger.error(f"❌ Account {account_id} error: {e}")
-            self._record_error(account_id, str(e))
-            
-            # Update status
-            if account_id in self.statuses:
-                self.statuses[account_id]['status'] = 'error'
-                self.statuses[account_id]['error'] = str(e)
-        
-        finally:
-            # Cleanup
-            try:
-                await bot.cleanup()
-            except Exception as e:
-                logger.error(f"❌ Cleanup error for {account_id}: {e}")
-            
-            # Update status
-            if account_id in self.statuses:
-                self.statuses[account_id]['status'] = 'stopped'
-                self.statuses[account_id]['stopped_at'] = datetime.now().isoformat()
+            logger.error(f"❌ Scheduler error: {e}")
+            for account_id in self.bots:
+                self._record_error(account_id, str(e))
+                if account_id in self.statuses:
+                    self.statuses[account_id]['status'] = 'error'
+                    self.statuses[account_id]['error'] = str(e)
     
     async def stop_account(self, account_id: str) -> bool:
         """
@@ -167,28 +200,21 @@ class MultiAccountRunner:
             bot = self.bots[account_id]
             bot.stop()
             
-            # Cancel task
-            if account_id in self.tasks:
-                task = self.tasks[account_id]
-                task.cancel()
-                
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
+            # Unschedule its slots (cancels a running slot)
+            await self.scheduler.remove_account(account_id)
             
             # Cleanup
             await bot.cleanup()
             
             # Remove from active
             del self.bots[account_id]
-            if account_id in self.tasks:
-                del self.tasks[account_id]
+            if self.fleet_limiter:
+                self.fleet_limiter.unregister(account_id)
             
             # Update status
             if account_id in self.statuses:
                 self.statuses[account_id]['status'] = 'stopped'
-                self.statuses[account_id]['stopped_at'] = datetime.now().isoformat()
+                self.statuses[account_id]['stopped_at'] = self.clock.now().isoformat()
             
             logger.info(f"✅ Account {account_id} stopped successfully")
             return True
@@ -237,6 +263,23 @@ class MultiAccountRunner:
         
         self.is_running = False
         
+        self.scheduler.stop()
+        if self.scheduler_task:
+            try:
+                await self.scheduler_task
+            except asyncio.CancelledError:
+                pass
+            self.scheduler_task = None
+        
+        if self.stats_task:
+            self.stats_task.cancel()
+            try:
+                await self.stats_task
+            except asyncio.CancelledError:
+                pass
+            self.stats_task = None
+        self.stats.withdraw()
+        
         logger.info(f"✅ Stopped {sum(results.values())}/{len(results)} accounts")
         return results
     
@@ -257,6 +300,7 @@ class MultiAccountRunner:
             if account_id in self.bots:
                 bot = self.bots[account_id]
                 status['bot_status'] = bot.get_status()
+                status['schedule'] = self.scheduler.get_status(account_id).get(account_id, {})
             
             return status
         
@@ -311,6 +355,8 @@ class MultiAccountRunner:
             'enabled_accounts': len(enabled_accounts),
             'running_accounts': self.get_running_count(),
             'is_running': self.is_running,
+            'fleet_limits': self.fleet_limiter.get_status() if self.fleet_limiter else None,
+            'slot_dispatch': self.scheduler.get_dispatch_status(),
             'statuses': self.get_all_statuses()
         }
     
@@ -320,7 +366,7 @@ class MultiAccountRunner:
             self.errors[account_id] = []
         
         self.errors[account_id].append({
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self.clock.now().isoformat(),
             'error': error
         })
         
@@ -346,7 +392,7 @@ class MultiAccountRunner:
         # Stop if running
         if account_id in self.bots:
             await self.stop_account(account_id)
-            await asyncio.sleep(2)  # Wait a bit
+            await self.clock.sleep(2)  # Wait a bit
         
         # Start
         return await self.start_account(account_id)
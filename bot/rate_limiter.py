@@ -0,0 +1,206 @@
+"""
+Rate limiter
+Sliding-window action limits persisted in metrics.db so restarts don't reset them
+"""
+
+import asyncio
+import time
+import logging
+from array import array
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from .async_database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+# Window name -> length in seconds; limits come from `<action>_per_<window>`
+WINDOWS = {
+    'hour': 3600,
+    'day': 86400,
+}
+
+DEFAULT_LIMIT = 999
+
+
+class SlidingWindowLimiter:
+    """
+    Per-action limits over sliding windows (last hour, last 24 hours).
+    
+    Every window keeps a deque of the action timestamps that are still
+    inside it, so checks are amortized O(1): expired entries are popped
+    from the left and the count is the deque length. After each recorded
+    action the longest window is saved to the `rate_limiter_state` table
+    as a packed array of timestamps, and loaded again on start, so a
+    restart (PM2 cron_restart, crash loop) does not hand out a fresh
+    budget. Saves are queued on the AsyncDatabase writer thread and not
+    waited for, so recording an action never blocks the event loop.
+    
+    `clock` and `sleep` are injectable for tests and simulation; the clock
+    must be wall time (epoch seconds) because state outlives the process.
+    """
+    
+    def __init__(self, config: Dict, database: Optional[AsyncDatabase] = None,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], Awaitable] = asyncio.sleep):
+        """
+        Args:
+            config: Safety config with a `rate_limits` mapping
+            database: Account database for persistence (None = memory only)
+            clock: Returns current epoch seconds
+            sleep: Coroutine function used by acquire()
+        """
+        self.config = config
+        self.db = database
+        self.clock = clock
+        self.sleep = sleep
+        
+        self._longest = max(WINDOWS, key=WINDOWS.get)
+        self._events: Dict[str, Dict[str, Deque[float]]] = {}
+        
+        self._load()
+    
+    # ============= STATE =============
+    
+    def _load(self):
+        """Restore events still inside the longest window"""
+        if self.db is None:
+            return
+        
+        try:
+            state = self.db.sync.load_rate_limiter_state()
+        except Exception as e:
+            logger.warning(f"Could not load rate limiter state: {e}")
+            return
+        
+        now = self.clock()
+        for action, blob in state.items():
+            events = array('d')
+            events.frombytes(blob)
+            windows = self._windows(action)
+            for ts in sorted(events):
+                for name, span in WINDOWS.items():
+                    if ts > now - span:
+                        windows[name].append(ts)
+    
+    def _save(self, action: str):
+        if self.db is None:
+            return
+        
+        # Snapshot now; the writer thread applies saves in order
+        events = array('d', self._events[action][self._longest])
+        self.db.submit(self.db.sync.save_rate_limiter_state, action, events.tobytes())
+    
+    def _windows(self, action: str) -> Dict[str, Deque[float]]:
+        windows = self._events.get(action)
+        if windows is None:
+            windows = {name: deque() for name in WINDOWS}
+            self._events[action] = windows
+        return windows
+    
+    def _expire(self, action: str, now: float) -> Dict[str, Deque[float]]:
+        """Drop timestamps that slid out of each window"""
+        windows = self._windows(action)
+        for name, span in WINDOWS.items():
+            events = windows[name]
+            cutoff = now - span
+            while events and events[0] <= cutoff:
+                events.popleft()
+        return windows
+    
+    def _limit(self, action: str, window: str) -> int:
+        return self.config['rate_limits'].get(f'{action}_per_{window}', DEFAULT_LIMIT)
+    
+    # ============= API =============
+    
+    def wait_time(self, action_type: str) -> float:
+        """Seconds until `action_type` can be performed (0 if now)"""
+        now = self.clock()
+        windows = self._expire(action_type, now)
+        
+        wait = 0.0
+        for name, span in WINDOWS.items():
+            events = windows[name]
+            limit = self._limit(action_type, name)
+            if len(events) >= limit:
+                if limit <= 0:
+                    return float('inf')
+                # Enough of the oldest events must expire to get below the limit
+                wait = max(wait, events[len(events) - limit] + span - now)
+        
+        return wait
+    
+    def can_perform(self, action_type: str) -> bool:
+        """Check if action can be performed"""
+        now = self.clock()
+        windows = self._expire(action_type, now)
+        
+        for name in WINDOWS:
+            if len(windows[name]) >= self._limit(action_type, name):
+                logger.warning(f"{name.capitalize()} limit reached for {action_type}")
+                return False
+        
+        return True
+    
+    def remaining(self, action_type: str) -> int:
+        """Actions still allowed right now (in the tightest window)"""
+        windows = self._expire(action_type, self.clock())
+        return max(0, min(self._limit(action_type, name) - len(windows[name]) for name in WINDOWS))
+    
+    def record_action(self, action_type: str):
+        """Record that action was performed"""
+        now = self.clock()
+        windows = self._expire(action_type, now)
+        
+        for events in windows.values():
+            events.append(now)
+        
+        self._save(action_type)
+    
+    def release(self, action_type: str):
+        """Give back the most recent action (e.g. the API call behind acquire() failed)"""
+        windows = self._windows(action_type)
+        for events in windows.values():
+            if events:
+                events.pop()
+        
+        self._save(action_type)
+    
+    async def acquire(self, action_type: str, max_wait: Optional[float] = None) -> bool:
+        """
+        Wait until `action_type` is allowed, then record it
+        
+        Args:
+            action_type: Action name (tweets, likes, replies, follows, ...)
+            max_wait: Give up instead of waiting longer than this (seconds)
+        
+        Returns:
+            True once recorded, False if it would take longer than max_wait
+        """
+        deadline = None if max_wait is None else self.clock() + max_wait
+        
+        while True:
+            wait = self.wait_time(action_type)
+            
+            if wait <= 0:
+                self.record_action(action_type)
+                return True
+            
+            if deadline is not None and self.clock() + wait > deadline:
+                return False
+            
+            logger.info(f"⏳ {action_type} limit reached, waiting {wait:.0f}s")
+            await self.sleep(wait)
+    
+    def get_status(self, action_type: str) -> Dict:
+        """Get current status for action type"""
+        windows = self._expire(action_type, self.clock())
+        
+        return {
+            'hour_count': len(windows['hour']),
+            'hour_limit': self._limit(action_type, 'hour'),
+            'day_count': len(windows['day']),
+            'day_limit': self._limit(action_type, 'day'),
+            'can_perform': self.wait_time(action_type) <= 0,
+            'wait_seconds': round(self.wait_time(action_type), 1)
+        }
@@ -0,0 +1,384 @@
+"""
+Resilience layer
+Error classification, retries with backoff and per-endpoint circuit breakers for twikit calls
+"""
+
+import asyncio
+import random
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+from twikit.errors import (
+    AccountLocked, AccountSuspended, RequestTimeout,
+    ServerError, TooManyRequests, Unauthorized
+)
+
+from .async_database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+# Error kinds
+RATE_LIMITED = 'rate_limited'   # 429: wait for the reset, then retry
+TRANSIENT = 'transient'         # 5xx, timeouts, dropped connections: back off and retry
+AUTH = 'auth'                   # Bad cookies, suspended or locked: retrying won't help
+FATAL = 'fatal'                 # Client errors (duplicate tweet, not found, ...): not retried
+
+# Breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Endpoint's circuit breaker is open; the call was not attempted"""
+    
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def classify_error(error: BaseException) -> str:
+    """Map a twikit/httpx exception to an error kind"""
+    if isinstance(error, TooManyRequests):
+        return RATE_LIMITED
+    if isinstance(error, (Unauthorized, AccountSuspended, AccountLocked)):
+        return AUTH
+    if isinstance(error, (ServerError, RequestTimeout, httpx.TransportError)):
+        return TRANSIENT
+    return FATAL
+
+
+def _was_sent(error: BaseException) -> bool:
+    """False if the request certainly never reached the server"""
+    if isinstance(error, TooManyRequests):
+        return False
+    return not isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def retry_after(error: BaseException, now: float) -> Optional[float]:
+    """
+    Seconds the server asked us to wait, from `x-rate-limit-reset`
+    (epoch seconds) or `Retry-After` (seconds or HTTP date)
+    """
+    reset = getattr(error, 'rate_limit_reset', None)
+    if reset:
+        return max(0.0, reset - now)
+    
+    headers = getattr(error, 'headers', None) or {}
+    headers = {k.lower(): v for k, v in headers.items()}
+    
+    value = headers.get('retry-after')
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+        except (TypeError, ValueError):
+            pass
+    
+    value = headers.get('x-rate-limit-reset')
+    if value is not None:
+        try:
+            return max(0.0, float(value) - now)
+        except ValueError:
+            pass
+    
+    return None
+
+
+class CircuitBreaker:
+    """
+    Breaker for one endpoint.
+    
+    Opens after `failure_threshold` consecutive transient/auth failures,
+    or immediately on a 429 until the server's reset time. Once the open
+    period is over one trial call is let through (half-open): success
+    closes the breaker, failure opens it again for twice as long, up to
+    `max_reset_timeout`.
+    """
+    
+    def __init__(self, endpoint: str, failure_threshold: int, reset_timeout: float,
+                 max_reset_timeout: float):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.last_error: Optional[str] = None
+        self._trial_running = False
+    
+    def restore(self, row: Dict):
+        self.state = row['state']
+        self.failures = row['failures']
+        self.trips = row['trips']
+        self.open_until = row['open_until']
+        self.last_error = row['last_error']
+        if self.state == HALF_OPEN:
+            # The trial call died with the process
+            self.state = OPEN
+    
+    def before_call(self, now: float):
+        """Raise CircuitOpenError unless a call may go through"""
+        if self.state == CLOSED:
+            return
+        
+        if now < self.open_until:
+            raise CircuitOpenError(self.endpoint, self.open_until - now)
+        
+        if self._trial_running:
+            # Another call is already probing the endpoint
+            raise CircuitOpenError(self.endpoint, 0)
+        
+        self.state = HALF_OPEN
+        self._trial_running = True
+    
+    def cancel_trial(self):
+        """The trial call was cancelled before it finished"""
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+        self._trial_running = False
+    
+    def on_success(self) -> bool:
+        """Record a success; returns True if persisted state changed"""
+        self._trial_running = False
+        changed = self.state != CLOSED or self.failures != 0
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        return changed
+    
+    def on_failure(self, kind: str, now: float, error: str,
+                   wait: Optional[float] = None) -> bool:
+        """Record a failure; returns True if persisted state changed"""
+        self._trial_running = False
+        
+        if kind == FATAL:
+            # The endpoint works, the request was wrong
+            if self.state == HALF_OPEN:
+                return self.on_success()
+            return False
+        
+        self.last_error = error[:500]
+        
+        if kind == RATE_LIMITED:
+            self._open(now, wait if wait is not None else self._backoff())
+            return True
+        
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open(now, self._backoff())
+        return True
+    
+    def _backoff(self) -> float:
+        return min(self.max_reset_timeout, self.reset_timeout * (2 ** self.trips))
+    
+    def _open(self, now: float, duration: float):
+        self.state = OPEN
+        self.trips += 1
+        self.open_until = now + duration
+        logger.warning(f"🔌 Circuit opened for {self.endpoint} ({duration:.0f}s)")
+    
+    def get_status(self, now: float) -> Dict:
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'trips': self.trips,
+            'retry_in': round(max(0.0, self.open_until - now), 1) if self.state != CLOSED else 0,
+            'last_error': self.last_error
+        }
+
+
+class ResilientCaller:
+    """
+    Runs twikit calls with retries and per-endpoint circuit breakers.
+    
+    Rate limits and transient errors are retried up to `max_attempts`
+    times with exponential backoff and full jitter, honoring the server's
+    reset time when it fits in `max_retry_after`. Calls that are not
+    idempotent (posting a tweet) are only retried when the request never
+    reached the server. Breaker state is saved to the account database on
+    every change, so a throttled endpoint stays closed off across restarts.
+    
+    `clock`, `sleep` and `rng` are injectable for tests and simulation.
+    """
+    
+    def __init__(self, database: Optional[AsyncDatabase] = None, max_attempts: int = 3,
+                 base_delay: float = 2.0, max_delay: float = 60.0,
+                 max_retry_after: float = 120.0, failure_threshold: int = 5,
+                 reset_timeout: float = 60.0, max_reset_timeout: float = 3600.0,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], Awaitable] = asyncio.sleep,
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            database: Account database for breaker persistence (None = memory only)
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff base in seconds
+            max_delay: Backoff ceiling in seconds
+            max_retry_after: Longest server-requested wait that is retried in place
+            failure_threshold: Consecutive failures that open a breaker
+            reset_timeout: First open period in seconds (doubles per trip)
+            max_reset_timeout: Longest open period in seconds
+            clock: Returns current epoch seconds
+            sleep: Coroutine function used between attempts
+            rng: Random source for jitter
+        """
+        self.db = database
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._load()
+        
+        # Stats
+        self.retries = 0
+        self.rejected = 0
+    
+    @classmethod
+    def from_settings(cls, database: Optional[AsyncDatabase], safety: Dict,
+                      clock: Callable[[], float] = time.time,
+                      sleep: Callable[[float], Awaitable] = asyncio.sleep) -> 'ResilientCaller':
+        """Build from the `safety.retry` and `safety.circuit_breaker` settings"""
+        retry = safety.get('retry', {})
+        breaker = safety.get('circuit_breaker', {})
+        return cls(
+            database,
+            max_attempts=retry.get('max_attempts', 3),
+            base_delay=retry.get('base_delay', 2),
+            max_delay=retry.get('max_delay', 60),
+            max_retry_after=retry.get('max_retry_after', 120),
+            failure_threshold=breaker.get('failure_threshold', 5),
+            reset_timeout=breaker.get('reset_timeout', 60),
+            max_reset_timeout=breaker.get('max_reset_timeout', 3600),
+            clock=clock,
+            sleep=sleep
+        )
+    
+    def _load(self):
+        if self.db is None:
+            return
+        
+        try:
+            rows = self.db.sync.load_circuit_breakers()
+        except Exception as e:
+            logger.warning(f"Could not load circuit breaker state: {e}")
+            return
+        
+        for endpoint, row in rows.items():
+            self.breaker(endpoint).restore(row)
+    
+    async def _save(self, breaker: CircuitBreaker):
+        if self.db is None:
+            return
+        
+        try:
+            await self.db.save_circuit_breaker(
+                breaker.endpoint, breaker.state, breaker.failures,
+                breaker.trips, breaker.open_until, breaker.last_error
+            )
+        except Exception as e:
+            logger.warning(f"Could not save circuit breaker state: {e}")
+    
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                endpoint, self.failure_threshold, self.reset_timeout, self.max_reset_timeout
+            )
+            self.breakers[endpoint] = breaker
+        return breaker
+    
+    def is_open(self, endpoint: str) -> bool:
+        """True while `endpoint`'s breaker rejects calls"""
+        breaker = self.breakers.get(endpoint)
+        return breaker is not None and breaker.state != CLOSED and self.clock() < breaker.open_until
+    
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform over [0, base * 2^attempt]
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+    
+    async def call(self, endpoint: str, fn: Callable[..., Awaitable], *args,
+                   idempotent: bool = True, **kwargs) -> Any:
+        """
+        Await `fn(*args, **kwargs)` under `endpoint`'s breaker, retrying
+        retryable errors
+        
+        Raises:
+            CircuitOpenError: The breaker is open
+            Exception: The last error once retries are exhausted or not allowed
+        """
+        breaker = self.breaker(endpoint)
+        
+        for attempt in range(self.max_attempts):
+            try:
+                breaker.before_call(self.clock())
+            except CircuitOpenError:
+                self.rejected += 1
+                raise
+            
+            try:
+                result = await fn(*args, **kwargs)
+            except asyncio.CancelledError:
+                breaker.cancel_trial()
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                now = self.clock()
+                wait = retry_after(e, now) if kind == RATE_LIMITED else None
+                
+                if breaker.on_failure(kind, now, f"{type(e).__name__}: {e}", wait):
+                    await self._save(breaker)
+                
+                retryable = kind in (RATE_LIMITED, TRANSIENT) and (idempotent or not _was_sent(e))
+                if not retryable or attempt + 1 >= self.max_attempts:
+                    raise
+                
+                if kind == RATE_LIMITED:
+                    # The breaker is open until the reset; the retry is its trial call
+                    delay = max(0.0, breaker.open_until - now)
+                    if delay > self.max_retry_after:
+                        raise
+                else:
+                    delay = self._backoff(attempt)
+                    if breaker.state != CLOSED:
+                        # Breaker opened on this failure; don't wait it out in place
+                        raise
+                
+                self.retries += 1
+                logger.info(f"↻ {endpoint} failed ({kind}), retry {attempt + 1} in {delay:.1f}s")
+                await self.sleep(delay)
+                continue
+            
+            if breaker.on_success():
+                await self._save(breaker)
+            return result
+    
+    def get_status(self) -> Dict:
+        """Breaker state per endpoint"""
+        now = self.clock()
+        return {
+            'breakers': {
+                endpoint: breaker.get_status(now)
+                for endpoint, breaker in sorted(self.breakers.items())
+            },
+            'retries': self.retries,
+            'rejected': self.rejected
+        }
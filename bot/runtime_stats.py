@@ -0,0 +1,229 @@
+"""
+Runtime stats
+Process-local stats published to a shared SQLite file for the dashboards
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .call_metrics import CallMetrics, get_call_metrics
+from .http_pool import get_registry
+from .search_cache import get_search_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATS_PATH = "data/runtime_stats.db"
+
+# Seconds between snapshots of a running process
+PUBLISH_INTERVAL = 30
+
+# Snapshots older than this belong to a process that is gone
+MAX_AGE = 300
+
+# Counters that add up across processes
+_SEARCH_CACHE_SUMS = ('entries', 'max_entries', 'hits', 'misses', 'coalesced',
+                      'evictions', 'in_flight')
+
+
+def _collect_search_cache() -> Dict:
+    return get_search_cache().get_stats()
+
+
+def _collect_calls() -> Dict:
+    return get_call_metrics().export()
+
+
+def _collect_http_pools() -> Dict:
+    return get_registry().get_stats()
+
+
+# Section name -> collector of this process's stats
+SECTIONS: Dict[str, Callable[[], Dict]] = {
+    'search_cache': _collect_search_cache,
+    'calls': _collect_calls,
+    'http_pools': _collect_http_pools,
+}
+
+
+class RuntimeStats:
+    """
+    Snapshots of in-memory stats shared between processes.
+    
+    The search cache, call metrics and HTTP pools live in the memory of
+    whichever process runs the accounts (the PM2 runner, or a dashboard
+    that started them), so the dashboards can't read them directly. Runners
+    publish a snapshot of every section into a small SQLite file every
+    PUBLISH_INTERVAL seconds, one row per (process, section); readers
+    merge the fresh rows of every process.
+    """
+    
+    def __init__(self, db_path: str = DEFAULT_STATS_PATH,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            db_path: Shared stats file
+            clock: Returns current epoch seconds
+        """
+        self.db_path = db_path
+        self.clock = clock
+        self.source = f"{socket.gethostname()}:{os.getpid()}"
+        
+        self._local = threading.local()
+        self._init_db()
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _init_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS runtime_stats (
+                source TEXT NOT NULL,
+                section TEXT NOT NULL,
+                stats TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (source, section)
+            ) WITHOUT ROWID
+        """)
+    
+    # ============= PUBLISHING =============
+    
+    def publish(self):
+        """Write this process's snapshot of every section"""
+        now = self.clock()
+        rows = [
+            (self.source, section, json.dumps(collect()), now)
+            for section, collect in SECTIONS.items()
+        ]
+        
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("""
+                INSERT INTO runtime_stats (source, section, stats, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(source, section) DO UPDATE SET
+                    stats = excluded.stats, updated_at = excluded.updated_at
+            """, rows)
+            # Forget processes that stopped without withdrawing
+            conn.execute("DELETE FROM runtime_stats WHERE updated_at < ?", (now - MAX_AGE,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def withdraw(self):
+        """Drop this process's snapshots (its counters die with it)"""
+        self._connection().execute(
+            "DELETE FROM runtime_stats WHERE source = ?", (self.source,)
+        )
+    
+    async def run(self, sleep: Callable[[float], Awaitable],
+                  interval: float = PUBLISH_INTERVAL):
+        """Publish every `interval` seconds until cancelled"""
+        while True:
+            try:
+                self.publish()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️  Failed to publish runtime stats: {e}")
+            await sleep(interval)
+    
+    # ============= READING =============
+    
+    def read(self, section: str) -> List[Dict]:
+        """Fresh snapshots of `section`, one per process"""
+        rows = self._connection().execute("""
+            SELECT source, stats, updated_at FROM runtime_stats
+            WHERE section = ? AND updated_at >= ?
+            ORDER BY source
+        """, (section, self.clock() - MAX_AGE)).fetchall()
+        
+        return [
+            {'source': source, 'updated_at': updated_at, 'stats': json.loads(stats)}
+            for source, stats, updated_at in rows
+        ]
+    
+    def get_search_cache_stats(self) -> Dict:
+        """Search cache counters summed over every publishing process"""
+        snapshots = self.read('search_cache')
+        
+        merged = dict.fromkeys(_SEARCH_CACHE_SUMS, 0)
+        for snapshot in snapshots:
+            for key in _SEARCH_CACHE_SUMS:
+                merged[key] += snapshot['stats'].get(key, 0)
+        
+        lookups = merged['hits'] + merged['misses'] + merged['coalesced']
+        merged['ttl'] = snapshots[0]['stats'].get('ttl') if snapshots else None
+        merged['hit_rate'] = round((merged['hits'] + merged['coalesced']) / lookups, 3) if lookups else 0.0
+        merged['processes'] = [
+            {'source': s['source'], 'updated_at': s['updated_at']} for s in snapshots
+        ]
+        return merged
+    
+    def get_call_stats(self, account_id: Optional[str] = None) -> Dict:
+        """Call metrics of every publishing process (see CallMetrics.get_stats)"""
+        snapshots = self.read('calls')
+        
+        combined = CallMetrics()
+        for snapshot in snapshots:
+            combined.merge_export(snapshot['stats'])
+        
+        stats = combined.get_stats(account_id)
+        stats['processes'] = [
+            {'source': s['source'], 'updated_at': s['updated_at']} for s in snapshots
+        ]
+        return stats
+    
+    def get_http_pool_stats(self) -> Dict:
+        """HTTP pools of every publishing process (see HTTPPoolRegistry.get_stats)"""
+        snapshots = self.read('http_pools')
+        
+        settings = snapshots[0]['stats'] if snapshots else {}
+        return {
+            'pools': [
+                {**pool, 'source': snapshot['source']}
+                for snapshot in snapshots
+                for pool in snapshot['stats']['pools']
+            ],
+            'http2_available': settings.get('http2_available'),
+            'max_connections': settings.get('max_connections'),
+            'per_host_limit': settings.get('per_host_limit'),
+            'processes': [
+                {'source': s['source'], 'updated_at': s['updated_at']} for s in snapshots
+            ]
+        }
+    
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_stats: Optional[RuntimeStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_runtime_stats() -> RuntimeStats:
+    """Process-wide handle on the default stats file"""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = RuntimeStats()
+        return _stats
@@ -0,0 +1,554 @@
+"""
+Slot scheduler
+Cron-style slot timers for every account, driven from one heap
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import heapq
+import itertools
+import logging
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .async_database import AsyncDatabase
+from .clock import SYSTEM_CLOCK, Clock
+
+logger = logging.getLogger(__name__)
+
+# Catch-up policies for occurrences that could not run on time
+SKIP = 'skip'       # Only run on time; missed occurrences are dropped
+LATEST = 'latest'   # Run the most recent missed occurrence, if within the grace period
+ALL = 'all'         # Run every missed occurrence within the grace period, oldest first
+CATCH_UP_POLICIES = (SKIP, LATEST, ALL)
+
+# Lateness that still counts as on time (timer and event loop jitter)
+ON_TIME_TOLERANCE = 60
+
+# Most occurrences queued at once by the 'all' policy
+MAX_CATCH_UP = 50
+
+# How far ahead next_after() looks for a matching day (covers Feb 29 schedules)
+MAX_SEARCH_DAYS = 366 * 8
+
+
+class CronExpression:
+    """
+    Five-field cron expression: minute hour day-of-month month day-of-week.
+    
+    Fields take `*`, numbers, lists (`1,15`), ranges (`1-5`) and steps
+    (`*/15`, `8-20/4`); day-of-week is 0-7 with both 0 and 7 meaning
+    Sunday. As in cron, if both day fields are restricted a day matching
+    either one fires. A plain `HH:MM` is shorthand for a daily time.
+    """
+    
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+    
+    def __init__(self, expression):
+        # Unquoted 8:00 in YAML 1.1 is the sexagesimal int 480
+        if isinstance(expression, int):
+            expression = '%d:%02d' % divmod(expression, 60)
+        
+        self.expression = str(expression).strip()
+        text = self.expression
+        if ':' in text and len(text.split()) == 1:
+            hour, _, minute = text.partition(':')
+            text = f'{int(minute)} {int(hour)} * * *'
+        
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression: {expression!r}")
+        
+        minutes, hours, days, months, weekdays = (
+            self._parse(field, low, high, expression)
+            for field, (low, high) in zip(fields, self.FIELDS)
+        )
+        self.minutes = minutes
+        self.hours = hours
+        self.days = set(days)
+        self.months = set(months)
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+    
+    @staticmethod
+    def _parse(field: str, low: int, high: int, expression) -> List[int]:
+        values = set()
+        for part in field.split(','):
+            body, slash, step = part.partition('/')
+            try:
+                step = int(step) if slash else 1
+                if body == '*':
+                    start, end = low, high
+                elif '-' in body:
+                    start, end = (int(value) for value in body.split('-', 1))
+                else:
+                    start = int(body)
+                    end = high if slash else start
+            except ValueError:
+                raise ValueError(f"Invalid cron field {field!r} in {expression!r}") from None
+            
+            if step < 1 or start < low or end > high or start > end:
+                raise ValueError(f"Cron field {field!r} out of range in {expression!r}")
+            values.update(range(start, end + 1, step))
+        return sorted(values)
+    
+    def _day_matches(self, day: date) -> bool:
+        in_days = day.day in self.days
+        # Python: Monday = 0; cron: Sunday = 0
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return in_weekdays
+        if self.any_weekday:
+            return in_days
+        return in_days or in_weekdays
+    
+    def next_after(self, ts: float, tz: Optional[tzinfo] = None) -> float:
+        """
+        First fire time strictly after `ts`
+        
+        Args:
+            ts: Epoch seconds
+            tz: Timezone the expression is in (None = local time)
+        
+        Returns:
+            Epoch seconds (local times skipped by a DST change never fire)
+        """
+        start = datetime.fromtimestamp(ts, tz).replace(tzinfo=None, second=0, microsecond=0)
+        start += timedelta(minutes=1)
+        day = start.date()
+        
+        for _ in range(MAX_SEARCH_DAYS):
+            if day.month in self.months and self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        wall = datetime(day.year, day.month, day.day, hour, minute)
+                        if wall < start:
+                            continue
+                        
+                        fire = wall.replace(tzinfo=tz).timestamp() if tz else wall.timestamp()
+                        if datetime.fromtimestamp(fire, tz).replace(tzinfo=None) != wall:
+                            continue
+                        if fire > ts:
+                            return fire
+            day += timedelta(days=1)
+        
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+def stagger_offset(account_id: str, window: float) -> float:
+    """
+    Deterministic start offset for an account within `window` seconds
+    
+    Derived from a hash of the account ID, so an account keeps its offset
+    across restarts and accounts spread evenly over the window.
+    """
+    if window <= 0:
+        return 0.0
+    digest = hashlib.sha256(account_id.encode('utf-8')).digest()
+    return float(int(window * int.from_bytes(digest[:8], 'big') / 2 ** 64))
+
+
+def get_timezone(name: Optional[str]) -> Optional[tzinfo]:
+    """ZoneInfo for `name`, or None (local time) if unset or unknown"""
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown schedule timezone {name!r}, using local time")
+        return None
+
+
+class ScheduledSlot:
+    """One recurring slot of one account"""
+    
+    def __init__(self, account_id: str, name: str, cron: CronExpression,
+                 run: Callable[[], Awaitable], tz: Optional[tzinfo] = None,
+                 catch_up: str = LATEST, misfire_grace: float = 3600,
+                 database: Optional[AsyncDatabase] = None, offset: float = 0.0):
+        """
+        Args:
+            account_id: Account the slot belongs to (slots of one account never overlap)
+            name: Slot name, unique per account
+            cron: When the slot fires
+            run: Coroutine function running the slot
+            tz: Timezone of `cron` (None = local time)
+            catch_up: SKIP, LATEST or ALL
+            misfire_grace: Seconds an occurrence may start late and still run
+            database: Account database remembering the last fire time across restarts
+            offset: Seconds every occurrence is shifted by (see stagger_offset)
+        """
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch_up policy {catch_up!r} for slot {name}")
+        
+        self.account_id = account_id
+        self.name = name
+        self.cron = cron
+        self.run = run
+        self.tz = tz
+        self.catch_up = catch_up
+        self.misfire_grace = misfire_grace
+        self.db = database
+        self.offset = offset
+        
+        self.next_fire: Optional[float] = None
+        self.last_fire: Optional[float] = None
+        self.removed = False
+        
+        # Stats
+        self.runs = 0
+        self.errors = 0
+        self.skipped = 0
+        self.max_lateness = 0.0
+    
+    def next_after(self, ts: float) -> float:
+        return self.cron.next_after(ts - self.offset, self.tz) + self.offset
+    
+    def get_status(self) -> Dict:
+        def iso(ts):
+            return datetime.fromtimestamp(ts, self.tz).isoformat() if ts else None
+        
+        return {
+            'cron': self.cron.expression,
+            'timezone': str(self.tz) if self.tz else 'local',
+            'catch_up': self.catch_up,
+            'offset': self.offset,
+            'next_fire': iso(self.next_fire),
+            'last_fire': iso(self.last_fire),
+            'runs': self.runs,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'max_lateness': round(self.max_lateness, 1)
+        }
+
+
+def slots_from_settings(account_id: str, schedule: Dict,
+                        run_slot: Callable[[str], Awaitable],
+                        database: Optional[AsyncDatabase] = None,
+                        stagger: float = 0.0) -> List[ScheduledSlot]:
+    """
+    Slots from a `schedule` settings block
+    
+    Every mapping entry with a `time` ("HH:MM") or `cron` key is a slot;
+    `timezone`, `catch_up` and `misfire_grace_minutes` apply to all slots
+    and can be overridden per slot. With a `stagger` window (seconds) all
+    slots of the account start at the same deterministic offset into it.
+    """
+    offset = stagger_offset(account_id, stagger)
+    tz = get_timezone(schedule.get('timezone'))
+    catch_up = schedule.get('catch_up', LATEST)
+    grace_minutes = schedule.get('misfire_grace_minutes', 60)
+    
+    slots = []
+    for name, slot in schedule.items():
+        if not isinstance(slot, dict) or not ('cron' in slot or 'time' in slot):
+            continue
+        if not slot.get('enabled', True):
+            continue
+        
+        slots.append(ScheduledSlot(
+            account_id,
+            name,
+            CronExpression(slot.get('cron') or slot['time']),
+            lambda name=name: run_slot(name),
+            tz=get_timezone(slot['timezone']) if slot.get('timezone') else tz,
+            catch_up=slot.get('catch_up', catch_up),
+            misfire_grace=slot.get('misfire_grace_minutes', grace_minutes) * 60,
+            database=database,
+            offset=offset
+        ))
+    return slots
+
+
+class SlotScheduler:
+    """
+    Fires the slots of any number of accounts from one timer heap.
+    
+    The scheduler sleeps until the earliest next fire time and nothing
+    else; there is no polling. Slots of different accounts run
+    concurrently, slots of the same account one after another, so an
+    overrunning slot delays the next one instead of overlapping it. An
+    occurrence that starts late is handled by the slot's catch-up policy
+    (see SKIP / LATEST / ALL), and the last handled fire time is stored in
+    the account database so occurrences missed while the bot was down are
+    caught up the same way after a restart.
+    
+    With `max_concurrent` at most that many slots (of different accounts)
+    execute at once; the rest wait for a free place, in fire order.
+    Together with staggered offsets this keeps a large fleet from hitting
+    the CPU, sockets and X at the same second. Work an account does
+    between its slots (queued actions) takes a place through permit()
+    too; it shares the place of that account's executing slot, so a slot
+    waiting on its own queue never starves it.
+    """
+    
+    def __init__(self, clock: Clock = SYSTEM_CLOCK, max_concurrent: Optional[int] = None):
+        """
+        Args:
+            clock: Time source and sleep (a VirtualClock for simulations)
+            max_concurrent: Slots allowed to execute at once (None = unlimited)
+        """
+        self.clock = clock
+        self.max_concurrent = max_concurrent
+        self._limit = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+        self.peak_concurrent = 0
+        self._executing = 0
+        
+        self._heap: List[Tuple[float, int, ScheduledSlot]] = []
+        self._seq = itertools.count()
+        self._slots: Dict[Tuple[str, str], ScheduledSlot] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._holders: Dict[str, int] = {}
+        self._place_locks: Dict[str, asyncio.Lock] = {}
+        self._running: Dict[str, Set[asyncio.Task]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopped = False
+    
+    # ============= SLOTS =============
+    
+    async def add(self, slots: List[ScheduledSlot]):
+        """Schedule slots, resuming from their stored last fire time"""
+        now = self.clock.time()
+        states: Dict[int, Dict] = {}
+        
+        for slot in slots:
+            previous = self._slots.pop((slot.account_id, slot.name), None)
+            if previous is not None:
+                previous.removed = True
+            
+            state = None
+            if slot.db is not None:
+                if id(slot.db) not in states:
+                    try:
+                        states[id(slot.db)] = await slot.db.get_schedule_state()
+                    except Exception as e:
+                        logger.warning(f"Could not load schedule state for {slot.account_id}: {e}")
+                        states[id(slot.db)] = {}
+                state = states[id(slot.db)].get(slot.name)
+            
+            if state is not None:
+                # Occurrences since the last handled one are due (catch-up)
+                slot.last_fire = state['last_fire']
+                fire = slot.next_after(slot.last_fire)
+            else:
+                fire = slot.next_after(now)
+            
+            self._slots[(slot.account_id, slot.name)] = slot
+            self._push(slot, fire)
+            logger.info(
+                f"🗓️  {slot.account_id}/{slot.name} ({slot.cron.expression}) next at "
+                f"{datetime.fromtimestamp(fire, slot.tz).strftime('%Y-%m-%d %H:%M %Z').strip()}"
+            )
+        
+        self._wake()
+    
+    async def remove_account(self, account_id: str):
+        """Unschedule an account's slots and cancel its running slot, if any"""
+        for key in [key for key in self._slots if key[0] == account_id]:
+            self._slots.pop(key).removed = True
+        
+        tasks = self._running.pop(account_id, set())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def _push(self, slot: ScheduledSlot, fire: float):
+        slot.next_fire = fire
+        heapq.heappush(self._heap, (fire, next(self._seq), slot))
+    
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    # ============= LOOP =============
+    
+    async def _sleep(self, seconds: float):
+        """Sleep until `seconds` pass or the heap changes"""
+        sleeper = asyncio.ensure_future(self.clock.sleep(seconds))
+        waiter = asyncio.ensure_future(self._wakeup.wait())
+        try:
+            await asyncio.wait({sleeper, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sleeper.cancel()
+            waiter.cancel()
+        self._wakeup.clear()
+    
+    async def run(self):
+        """Fire slots until stop(); running slots are cancelled on exit"""
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+        
+        try:
+            while not self._stopped:
+                # Entries of removed slots and superseded fire times
+                while self._heap and (self._heap[0][2].removed or
+                                      self._heap[0][0] != self._heap[0][2].next_fire):
+                    heapq.heappop(self._heap)
+                
+                if not self._heap:
+                    await self._wakeup.wait()
+                    self._wakeup.clear()
+                    continue
+                
+                fire, _, slot = self._heap[0]
+                delay = fire - self.clock.time()
+                if delay > 0:
+                    await self._sleep(delay)
+                    continue
+                
+                heapq.heappop(self._heap)
+                self._dispatch(slot, fire)
+        finally:
+            tasks = [task for tasks in self._running.values() for task in tasks]
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._running.clear()
+    
+    def stop(self):
+        """Stop firing slots (run() returns)"""
+        self._stopped = True
+        self._wake()
+    
+    def _dispatch(self, slot: ScheduledSlot, fire: float):
+        # Occurrences that are already due as well (bot was down or busy)
+        now = self.clock.time()
+        due = [fire]
+        next_fire = slot.next_after(fire)
+        while next_fire <= now:
+            due.append(next_fire)
+            next_fire = slot.next_after(next_fire)
+        self._push(slot, next_fire)
+        
+        if slot.catch_up != ALL and len(due) > 1:
+            slot.skipped += len(due) - 1
+            logger.warning(f"⏭️  {slot.account_id}/{slot.name}: {len(due) - 1} missed occurrence(s) dropped")
+            due = due[-1:]
+        elif len(due) > MAX_CATCH_UP:
+            slot.skipped += len(due) - MAX_CATCH_UP
+            due = due[-MAX_CATCH_UP:]
+        
+        task = asyncio.create_task(self._run_slot(slot, due))
+        running = self._running.setdefault(slot.account_id, set())
+        running.add(task)
+        task.add_done_callback(running.discard)
+    
+    def _lock(self, account_id: str) -> asyncio.Lock:
+        lock = self._locks.get(account_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[account_id] = lock
+        return lock
+    
+    async def _run_slot(self, slot: ScheduledSlot, fires: List[float]):
+        async with self._lock(slot.account_id):
+            for fire in fires:
+                if slot.removed:
+                    return
+                
+                lateness = self.clock.time() - fire
+                grace = ON_TIME_TOLERANCE if slot.catch_up == SKIP else max(slot.misfire_grace, ON_TIME_TOLERANCE)
+                
+                if lateness > grace:
+                    slot.skipped += 1
+                    logger.warning(
+                        f"⏭️  {slot.account_id}/{slot.name}: skipped, {lateness / 60:.0f} min late "
+                        f"(catch_up: {slot.catch_up})"
+                    )
+                    await self._save(slot, fire, 'skipped')
+                    continue
+                
+                async with self.permit(slot.account_id):
+                    # Waiting for a permit counts toward lateness
+                    lateness = self.clock.time() - fire
+                    if lateness > grace:
+                        slot.skipped += 1
+                        logger.warning(
+                            f"⏭️  {slot.account_id}/{slot.name}: skipped, {lateness / 60:.0f} min late "
+                            f"waiting for a free slot (max_concurrent: {self.max_concurrent})"
+                        )
+                        await self._save(slot, fire, 'skipped')
+                        continue
+                    
+                    if lateness > ON_TIME_TOLERANCE:
+                        logger.info(f"⏰ {slot.account_id}/{slot.name}: running {lateness / 60:.0f} min late")
+                    slot.max_lateness = max(slot.max_lateness, lateness)
+                    
+                    status = 'ok'
+                    try:
+                        await slot.run()
+                        slot.runs += 1
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        status = 'error'
+                        slot.errors += 1
+                        logger.error(f"❌ {slot.account_id}/{slot.name} failed: {e}")
+                
+                await self._save(slot, fire, status)
+    
+    @contextlib.asynccontextmanager
+    async def permit(self, account_id: str):
+        """
+        One of the max_concurrent execution places for `account_id`
+        
+        Everything of one account holding a permit at the same time
+        (a slot and its queued actions) shares a single place.
+        """
+        lock = self._place_locks.get(account_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._place_locks[account_id] = lock
+        
+        async with lock:
+            if not self._holders.get(account_id):
+                if self._limit is not None:
+                    await self._limit.acquire()
+                self._executing += 1
+                self.peak_concurrent = max(self.peak_concurrent, self._executing)
+            self._holders[account_id] = self._holders.get(account_id, 0) + 1
+        
+        try:
+            yield
+        finally:
+            self._holders[account_id] -= 1
+            if not self._holders[account_id]:
+                del self._holders[account_id]
+                self._executing -= 1
+                if self._limit is not None:
+                    self._limit.release()
+    
+    async def _save(self, slot: ScheduledSlot, fire: float, status: str):
+        slot.last_fire = fire
+        if slot.db is None:
+            return
+        try:
+            await slot.db.save_schedule_state(slot.name, fire, status)
+        except Exception as e:
+            logger.warning(f"Could not save schedule state for {slot.account_id}/{slot.name}: {e}")
+    
+    # ============= STATUS =============
+    
+    def get_dispatch_status(self) -> Dict:
+        """Concurrency of slot execution"""
+        return {
+            'max_concurrent': self.max_concurrent,
+            'executing': self._executing,
+            'peak_concurrent': self.peak_concurrent
+        }
+    
+    def get_status(self, account_id: Optional[str] = None) -> Dict[str, Dict[str, Dict]]:
+        """Slot status per account"""
+        status: Dict[str, Dict[str, Dict]] = {}
+        for (slot_account, name), slot in sorted(self._slots.items()):
+            if account_id is None or slot_account == account_id:
+                status.setdefault(slot_account, {})[name] = slot.get_status()
+        return status
@@ -0,0 +1,180 @@
+"""
+Search result cache
+Short-lived, process-wide cache for twikit searches with single-flight lookups
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Result fields describing the fetching account's relation to the item
+VIEWER_TWEET_FIELDS = ('favorited', 'retweeted', 'bookmarked')
+VIEWER_USER_FIELDS = ('following', 'followed_by', 'can_dm', 'can_media_tag', 'want_retweets')
+
+
+def strip_viewer_fields(result):
+    """
+    Reset viewer-relative fields of twikit search results to None (unknown)
+    
+    Cached results are shared by every account, so e.g. `tweet.favorited`
+    would otherwise tell all of them whether the fetching account liked
+    the tweet. Callers decide per account instead.
+    """
+    for item in result or ():
+        legacy = getattr(item, '_legacy', None)
+        if isinstance(legacy, dict):
+            # Tweet: its flags live in the raw legacy data, the author is a User
+            for field in VIEWER_TWEET_FIELDS:
+                if field in legacy:
+                    legacy[field] = None
+            item = getattr(item, 'user', None)
+        
+        for field in VIEWER_USER_FIELDS:
+            if item is not None and hasattr(item, field):
+                setattr(item, field, None)
+    
+    return result
+
+
+class _LeaderCancelled(Exception):
+    """The request being waited on was cancelled; waiters fetch themselves"""
+
+
+class SearchCache:
+    """
+    TTL + LRU cache keyed by (kind, query, product, count).
+    
+    Several accounts search the same keywords.yaml terms within minutes
+    of each other, and search is the most rate-limited endpoint, so
+    results are reused for `ttl` seconds by every account in the process.
+    Concurrent lookups of a key that is being fetched wait for that one
+    request instead of issuing their own (single-flight); this works
+    across event loops since waiters block on a concurrent.futures.Future.
+    
+    Viewer-relative fields (e.g. `tweet.favorited`) are reset to None
+    before a result is shared (see strip_viewer_fields).
+    """
+    
+    def __init__(self, ttl: float = 120, max_entries: int = 256,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: Seconds a result stays fresh
+            max_entries: Least recently used entries are evicted past this
+            clock: Monotonic time source
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, concurrent.futures.Future] = {}
+        
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+    
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value for `key`, or the result of `await fetch()`
+        
+        Exceptions from fetch() are passed to every waiter and not cached.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    expires, value = entry
+                    if expires > self.clock():
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return value
+                    del self._entries[key]
+                
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    self._inflight[key] = future
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+            
+            if not leader:
+                try:
+                    # Shielded: a cancelled waiter must not cancel the shared future
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _LeaderCancelled:
+                    continue
+            
+            try:
+                value = await fetch()
+            except asyncio.CancelledError:
+                self._finish(key)
+                future.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as e:
+                self._finish(key)
+                future.set_exception(e)
+                raise
+            
+            with self._lock:
+                # Store before leaving in-flight so no second leader sneaks in
+                self._entries[key] = (self.clock() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+                self._inflight.pop(key, None)
+            
+            future.set_result(value)
+            return value
+    
+    def _finish(self, key: Hashable):
+        with self._lock:
+            self._inflight.pop(key, None)
+    
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key, or everything"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'in_flight': len(self._inflight),
+            'hit_rate': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+        }
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide search cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+        return _cache
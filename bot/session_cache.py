@@ -0,0 +1,120 @@
+"""
+Session profile cache
+Remembers the logged-in profile so startup doesn't need a client.user() round trip
+"""
+
+import os
+import time
+import logging
+from typing import Callable, Dict, Optional
+
+from .async_database import AsyncDatabase
+from .media_cache import file_sha256
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE = 12 * 3600
+
+
+class SessionProfile:
+    """The parts of twikit's User that the bot reads from `TwitterClient.me`"""
+    
+    def __init__(self, id: str, screen_name: str, name: Optional[str] = None,
+                 followers_count: int = 0, following_count: int = 0,
+                 fetched_at: float = 0.0):
+        self.id = id
+        self.screen_name = screen_name
+        self.name = name
+        self.followers_count = followers_count
+        self.following_count = following_count
+        self.fetched_at = fetched_at
+
+
+class SessionProfileCache:
+    """
+    Last known profile per account, tied to the cookies it was fetched with.
+    
+    A cached profile is used on startup while it is younger than `max_age`
+    and the cookies file still has the same content (a replaced cookies
+    file always means a real login). The cookies themselves are then only
+    checked by the first real request; if that is rejected as
+    unauthorized the cached profile is dropped, so the next start logs in
+    properly.
+    """
+    
+    def __init__(self, database: AsyncDatabase, account_id: str, cookies_file: str,
+                 max_age: float = DEFAULT_MAX_AGE,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            database: Account database
+            account_id: Account the profile belongs to
+            cookies_file: Cookies the profile was fetched with
+            max_age: Seconds a cached profile may be used for startup
+            clock: Returns current epoch seconds
+        """
+        self.db = database
+        self.account_id = account_id
+        self.cookies_file = cookies_file
+        self.max_age = max_age
+        self.clock = clock
+    
+    @classmethod
+    def from_settings(cls, database: AsyncDatabase, account_id: str,
+                      cookies_file: str, settings: Dict,
+                      clock: Callable[[], float] = time.time) -> 'SessionProfileCache':
+        """Build from the `session` settings block"""
+        return cls(
+            database,
+            account_id,
+            cookies_file,
+            max_age=settings.get('profile_max_age_hours', DEFAULT_MAX_AGE / 3600) * 3600,
+            clock=clock
+        )
+    
+    def _cookies_sha256(self) -> Optional[str]:
+        if not os.path.exists(self.cookies_file):
+            return None
+        return file_sha256(self.cookies_file)
+    
+    async def load(self) -> Optional[SessionProfile]:
+        """Fresh cached profile for the current cookies, or None"""
+        row = await self.db.get_session_profile(self.account_id)
+        if row is None:
+            return None
+        
+        if self.clock() - row['fetched_at'] > self.max_age:
+            return None
+        
+        if row['cookies_sha256'] != self._cookies_sha256():
+            return None
+        
+        return SessionProfile(
+            row['user_id'],
+            row['screen_name'],
+            name=row['name'],
+            followers_count=row['followers_count'],
+            following_count=row['following_count'],
+            fetched_at=row['fetched_at']
+        )
+    
+    async def save(self, user) -> None:
+        """Cache a freshly fetched twikit User"""
+        cookies_sha256 = self._cookies_sha256()
+        if cookies_sha256 is None:
+            return
+        
+        await self.db.save_session_profile(
+            self.account_id,
+            str(user.id),
+            user.screen_name,
+            getattr(user, 'name', None),
+            user.followers_count or 0,
+            user.following_count or 0,
+            cookies_sha256,
+            self.clock()
+        )
+    
+    async def invalidate(self) -> None:
+        """Drop the cached profile"""
+        await self.db.delete_session_profile(self.account_id)
@@ -0,0 +1,247 @@
+"""
+Simulation
+Replays days of scheduled slots for many accounts on a virtual clock against the fake X API
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import yaml
+
+from .automation import BotAutomation
+from .call_metrics import get_call_metrics
+from .clock import VirtualClock
+from .fake_api import FakeXAPI, FakeXTransport, fake_cookies
+from .scheduler import SlotScheduler
+from .search_cache import get_search_cache
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILES = ('settings.yaml', 'templates.yaml', 'keywords.yaml')
+
+# Stand-in for template media missing from the source config
+PLACEHOLDER_MEDIA = b'\x89PNG\r\n\x1a\n' + bytes(2048)
+
+
+class Simulation:
+    """
+    Runs the scheduled slots of several accounts on one VirtualClock
+    through a single SlotScheduler (as MultiAccountRunner does), with
+    twikit talking to an in-process FakeXAPI.
+    
+    Each account gets a scratch folder with a copy of `config_dir` (AI
+    rewriting, write-behind buffering and proxies are switched off), fake
+    cookies and placeholder template media. The real automation code runs
+    unchanged: slots, delays, rate limiters, circuit breakers and the
+    background refreshers all sleep on the virtual clock, so `days` of
+    schedule take as long as the work between the sleeps. The account
+    databases read "today" and stamp rows on the same clock, so daily
+    counters and the replies-per-day cap follow the simulated days.
+    """
+    
+    def __init__(self, accounts: int = 3, days: float = 1.0,
+                 start: Optional[datetime] = None, config_dir: str = 'config',
+                 workdir: Optional[str] = None, seed: int = 0,
+                 api_options: Optional[Dict] = None, stagger_minutes: float = 0.0,
+                 max_concurrent: Optional[int] = None, concurrent_steps: bool = True):
+        """
+        Args:
+            accounts: Number of simulated accounts
+            days: Simulated days to run
+            start: Simulated start time (default: today 00:00 local time)
+            config_dir: Config copied into every account
+            workdir: Where account folders are created (default: a temp dir, removed afterwards)
+            seed: Seed for the bot's random choices and the fake API
+            api_options: Extra FakeXAPI arguments (latency, error_rate, ...)
+            stagger_minutes: Window slot starts are spread over (as accounts.yaml slot_stagger_minutes)
+            max_concurrent: Slots executing at once (as accounts.yaml max_concurrent_accounts)
+            concurrent_steps: Overlap independent slot steps (schedule.concurrent_steps)
+        """
+        self.accounts = accounts
+        self.days = days
+        start = start or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.clock = VirtualClock(start.timestamp())
+        self.config_dir = config_dir
+        self.workdir = workdir
+        self.seed = seed
+        self.api_options = api_options or {}
+        self.stagger_minutes = stagger_minutes
+        self.max_concurrent = max_concurrent
+        self.concurrent_steps = concurrent_steps
+    
+    def _prepare_account(self, root: str, index: int) -> str:
+        folder = os.path.join(root, f'sim{index}')
+        os.makedirs(os.path.join(folder, 'config'), exist_ok=True)
+        
+        for filename in CONFIG_FILES:
+            shutil.copy(os.path.join(self.config_dir, filename), os.path.join(folder, 'config', filename))
+        
+        settings_path = os.path.join(folder, 'config', 'settings.yaml')
+        with open(settings_path) as file:
+            settings = yaml.safe_load(file)
+        
+        settings['ai']['enabled'] = False
+        settings['schedule']['concurrent_steps'] = self.concurrent_steps
+        settings.setdefault('database', {}).setdefault('write_behind', {})['enabled'] = False
+        account = settings.setdefault('account', {})
+        account['proxy'] = None
+        account['api_base_url'] = None
+        
+        with open(settings_path, 'w') as file:
+            yaml.safe_dump(settings, file, allow_unicode=True, sort_keys=False)
+        
+        with open(os.path.join(folder, 'cookies.json'), 'w') as file:
+            json.dump(fake_cookies(f'sim{index}'), file)
+        
+        with open(os.path.join(folder, 'config', 'templates.yaml')) as file:
+            templates = yaml.safe_load(file) or {}
+        for item in templates.get('promo_templates', []):
+            media = item.get('media') if isinstance(item, dict) else None
+            if not media:
+                continue
+            target = os.path.join(folder, media)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(media):
+                shutil.copy(media, target)
+            else:
+                with open(target, 'wb') as file:
+                    file.write(PLACEHOLDER_MEDIA)
+        
+        return folder
+    
+    @staticmethod
+    def _activity_counts(bot: BotAutomation) -> Dict[str, Dict[str, int]]:
+        rows = bot.db.get_connection().execute(
+            "SELECT activity_type, success, COUNT(*) AS n FROM activity_log GROUP BY activity_type, success"
+        ).fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            counts.setdefault(row['activity_type'], {})['ok' if row['success'] else 'failed'] = row['n']
+        return counts
+    
+    async def _run(self, root: str) -> Dict:
+        random.seed(self.seed)
+        api = FakeXAPI(clock=self.clock, seed=self.seed, **self.api_options)
+        transport = FakeXTransport(api)
+        
+        bots: List[BotAutomation] = []
+        for index in range(self.accounts):
+            folder = self._prepare_account(root, index)
+            bots.append(BotAutomation(
+                account_folder=folder, account_id=f'sim{index}',
+                clock=self.clock, transport=transport
+            ))
+        
+        started = time.perf_counter()
+        scheduler = SlotScheduler(self.clock, max_concurrent=self.max_concurrent)
+        errors = {}
+        for bot in bots:
+            if not await bot.initialize():
+                errors[bot.account_id] = 'initialize failed'
+                continue
+            bot.is_running = True
+            bot.start_background(scheduler)
+            await scheduler.add(bot.schedule_slots(stagger=self.stagger_minutes * 60))
+        task = asyncio.create_task(scheduler.run())
+        
+        await self.clock.sleep(self.days * 86400)
+        
+        schedule = scheduler.get_status()
+        scheduler.stop()
+        await task
+        
+        report_accounts = {}
+        for bot in bots:
+            bot.stop()
+            report_accounts[bot.account_id] = {
+                'activity': self._activity_counts(bot),
+                'schedule': schedule.get(bot.account_id, {}),
+                'action_queue': bot.action_queue.get_status() if bot.action_queue else None,
+                'slot_timings': bot.db.get_slot_timings(),
+                'rate_limits': await bot.twitter.get_rate_limit_status(),
+                'error': errors.get(bot.account_id)
+            }
+            await bot.cleanup()
+        
+        wall = time.perf_counter() - started
+        return {
+            'accounts': self.accounts,
+            'simulated_days': self.days,
+            'wall_seconds': round(wall, 2),
+            'speedup': round(self.days * 86400 / wall) if wall else None,
+            'clock_wakeups': self.clock.wakeups,
+            'slot_dispatch': scheduler.get_dispatch_status(),
+            'api': api.get_stats(),
+            'calls': get_call_metrics().get_stats()['endpoints'],
+            'per_account': report_accounts
+        }
+    
+    def run(self) -> Dict:
+        """Run the simulation and return a report"""
+        root = self.workdir or tempfile.mkdtemp(prefix='bot-sim-')
+        
+        # The process-wide search cache must expire on simulated time too
+        search_cache = get_search_cache()
+        cache_clock = search_cache.clock
+        search_cache.clock = self.clock.monotonic
+        try:
+            return self.clock.run(self._run(root))
+        finally:
+            search_cache.clock = cache_clock
+            if self.workdir is None:
+                shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay scheduled slots on a virtual clock against the fake X API')
+    parser.add_argument('--accounts', type=int, default=3)
+    parser.add_argument('--days', type=float, default=1.0)
+    parser.add_argument('--start', help='Simulated start, e.g. 2026-01-05T00:00')
+    parser.add_argument('--config', default='config', help='Config folder copied into every account')
+    parser.add_argument('--workdir', help='Keep account folders here instead of a temp dir')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', default='50-300', help='Fake API latency in ms (simulated), "min-max"')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--stagger-minutes', type=float, default=0.0, help='Spread slot starts over this window')
+    parser.add_argument('--max-concurrent', type=int, help='Slots executing at once (default: unlimited)')
+    parser.add_argument('--sequential-steps', action='store_true', help='Run slot steps one by one (for comparison)')
+    parser.add_argument('--verbose', action='store_true', help='Show the bot logs')
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    low, _, high = args.latency.partition('-')
+    simulation = Simulation(
+        accounts=args.accounts,
+        days=args.days,
+        start=datetime.fromisoformat(args.start) if args.start else None,
+        config_dir=args.config,
+        workdir=args.workdir,
+        seed=args.seed,
+        stagger_minutes=args.stagger_minutes,
+        max_concurrent=args.max_concurrent,
+        concurrent_steps=not args.sequential_steps,
+        api_options={
+            'latency': (float(low) / 1000, float(high or low) / 1000),
+            'error_rate': args.error_rate,
+            'rate_limit_rate': args.rate_limit_rate
+        }
+    )
+    print(json.dumps(simulation.run(), indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Social graph sync
+Incremental follower/following id sync with resumable cursors and gained/lost diffs
+"""
+
+import time
+import logging
+from array import array
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .async_database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('followers', 'following')
+
+# (ids, next_cursor) for one page of follower/following ids
+FetchPage = Callable[[str, Optional[str], int], Awaitable[Tuple[List[int], Optional[str]]]]
+
+
+def _pack(ids: Iterable[int]) -> bytes:
+    return array('q', ids).tobytes()
+
+
+def _unpack(blob: Optional[bytes]) -> array:
+    ids = array('q')
+    if blob:
+        ids.frombytes(blob)
+    return ids
+
+
+class SocialGraphSync:
+    """
+    Follower and following id sets, kept current a few pages at a time.
+    
+    The ids endpoints return up to 5000 ids per page, newest first. A full
+    pass walks every page; only `max_pages` are fetched per sync() call and
+    the cursor plus the ids collected so far are checkpointed, so a pass
+    spans several slots (and restarts) without starting over. When a pass
+    completes, the new set is diffed against the previous snapshot and the
+    gained/lost ids are written to `follower_events`.
+    
+    Between full passes (`full_sync_interval`) a sync only fetches the
+    first page and picks up new ids from its head, which is where new
+    followers and follows appear. Snapshots are stored as sorted int64
+    arrays; in memory they are sets, so `is_following()` is O(1).
+    """
+    
+    def __init__(self, fetch_page: FetchPage, database: AsyncDatabase,
+                 page_size: int = 5000, max_pages: int = 2,
+                 full_sync_interval: float = 86400,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            fetch_page: Coroutine function (kind, cursor, count) -> (ids, next_cursor)
+            database: Account database
+            page_size: Ids per request (endpoint maximum is 5000)
+            max_pages: Requests per kind per sync() call
+            full_sync_interval: Seconds between full passes
+            clock: Returns current epoch seconds
+        """
+        self.fetch_page = fetch_page
+        self.db = database
+        self.page_size = page_size
+        self.max_pages = max(1, max_pages)
+        self.full_sync_interval = full_sync_interval
+        self.clock = clock
+        
+        self._ids: Dict[str, Set[int]] = {kind: set() for kind in KINDS}
+        self._state: Dict[str, Dict] = {}
+        # Follows made while a following pass was already past them
+        self._followed_during_pass: Set[int] = set()
+        
+        # Stats
+        self.requests = 0
+        self.gained = 0
+        self.lost = 0
+    
+    @classmethod
+    def from_settings(cls, fetch_page: FetchPage, database: AsyncDatabase, settings: Dict,
+                      clock: Callable[[], float] = time.time) -> 'SocialGraphSync':
+        """Build from the `social_graph` settings block"""
+        return cls(
+            fetch_page,
+            database,
+            page_size=settings.get('page_size', 5000),
+            max_pages=settings.get('max_pages_per_sync', 2),
+            full_sync_interval=settings.get('full_sync_hours', 24) * 3600,
+            clock=clock
+        )
+    
+    def load(self):
+        """Load snapshots and checkpoints (blocking; run on the DB thread)"""
+        for kind, row in self.db.sync.load_social_graph().items():
+            if kind not in self._ids:
+                continue
+            self._ids[kind] = set(_unpack(row['ids']))
+            self._state[kind] = row
+    
+    # ============= LOOKUPS =============
+    
+    def is_following(self, user_id) -> bool:
+        """True if we follow `user_id` (as of the last sync or our own follow)"""
+        return int(user_id) in self._ids['following']
+    
+    def is_follower(self, user_id) -> bool:
+        return int(user_id) in self._ids['followers']
+    
+    def mark_following(self, user_id):
+        """Record a follow made by the bot"""
+        user_id = int(user_id)
+        self._ids['following'].add(user_id)
+        self._followed_during_pass.add(user_id)
+    
+    # ============= SYNC =============
+    
+    async def _save(self, kind: str, ids: Set[int], state: Dict,
+                    events: Optional[List[Tuple[str, str]]] = None):
+        await self.db.save_social_graph(
+            kind, _pack(sorted(ids)), state.get('pending'), state.get('cursor'),
+            state.get('pass_started_at'), state.get('completed_at'), events
+        )
+        self._state[kind] = state
+    
+    async def _fetch(self, kind: str, cursor: Optional[str]) -> Tuple[List[int], Optional[str]]:
+        self.requests += 1
+        ids, next_cursor = await self.fetch_page(kind, cursor, self.page_size)
+        if next_cursor in (None, 0, '0', ''):
+            next_cursor = None
+        return ids, next_cursor and str(next_cursor)
+    
+    async def _head_check(self, kind: str, state: Dict) -> Dict:
+        ids, _ = await self._fetch(kind, None)
+        
+        known = self._ids[kind]
+        gained = [user_id for user_id in ids if user_id not in known]
+        if gained:
+            known.update(gained)
+            await self._save(kind, known, dict(state), [(str(u), 'gained') for u in gained])
+            self.gained += len(gained)
+        
+        return {'gained': gained, 'lost': [], 'complete': False}
+    
+    async def sync(self, kind: str) -> Dict:
+        """
+        One incremental step for `kind` ('followers' or 'following')
+        
+        Returns:
+            {'gained': [...], 'lost': [...], 'complete': bool}
+        """
+        now = self.clock()
+        state = dict(self._state.get(kind) or {})
+        in_pass = state.get('pass_started_at') is not None
+        completed_at = state.get('completed_at')
+        
+        if not in_pass and completed_at is not None and now - completed_at < self.full_sync_interval:
+            return await self._head_check(kind, state)
+        
+        if in_pass:
+            pending = _unpack(state.get('pending'))
+            cursor = state.get('cursor')
+        else:
+            pending = array('q')
+            cursor = None
+            state['pass_started_at'] = now
+            if kind == 'following':
+                self._followed_during_pass.clear()
+        
+        done = False
+        for _ in range(self.max_pages):
+            ids, cursor = await self._fetch(kind, cursor)
+            pending.extend(ids)
+            if cursor is None:
+                done = True
+                break
+        
+        if not done:
+            # Checkpoint and continue next time
+            state.update(pending=pending.tobytes(), cursor=cursor)
+            await self._save(kind, self._ids[kind], state)
+            return {'gained': [], 'lost': [], 'complete': False}
+        
+        new = set(pending)
+        if kind == 'following':
+            new |= self._followed_during_pass
+        
+        old = self._ids[kind]
+        if completed_at is None:
+            # First snapshot is a baseline, not a wave of new followers
+            gained, lost = [], []
+        else:
+            gained = sorted(new - old)
+            lost = sorted(old - new)
+        
+        events = [(str(u), 'gained') for u in gained] + [(str(u), 'lost') for u in lost]
+        state = {'pending': None, 'cursor': None, 'pass_started_at': None, 'completed_at': now}
+        await self._save(kind, new, state, events)
+        self._ids[kind] = new
+        
+        self.gained += len(gained)
+        self.lost += len(lost)
+        
+        if gained or lost:
+            logger.info(f"👥 {kind}: +{len(gained)} / -{len(lost)} (total {len(new)})")
+        
+        return {'gained': gained, 'lost': lost, 'complete': True}
+    
+    async def sync_all(self) -> Dict[str, Dict]:
+        """One step for every kind; a failing kind doesn't stop the others"""
+        results = {}
+        for kind in KINDS:
+            try:
+                results[kind] = await self.sync(kind)
+            except Exception as e:
+                logger.warning(f"{kind} sync failed: {e}")
+        return results
+    
+    def get_stats(self) -> Dict:
+        """Get sync statistics"""
+        stats = {
+            'requests': self.requests,
+            'gained': self.gained,
+            'lost': self.lost
+        }
+        for kind in KINDS:
+            state = self._state.get(kind) or {}
+            stats[kind] = {
+                'count': len(self._ids[kind]),
+                'in_pass': state.get('pass_started_at') is not None,
+                'completed_at': state.get('completed_at')
+            }
+        return stats
@@ -4,117 +4,175 @@ Wrapper around Twikit with safety features
 """
 
 import asyncio
+import os
 import random
 import logging
-from typing import Optional, List, Dict
-from datetime import datetime
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, List, Dict, Tuple
 import httpx
 from twikit import Client
 
-from .database import Database
+from .async_database import AsyncDatabase
 from .config_loader import ConfigLoader
+from .rate_limiter import SlidingWindowLimiter
+from .fleet_limiter import FleetRateLimiter
+from .http_pool import get_registry
+from .search_cache import get_search_cache, strip_viewer_fields
+from .media_cache import MediaUploadCache
+from .resilience import AUTH, RATE_LIMITED, CircuitOpenError, ResilientCaller, classify_error
+from .call_metrics import ERROR, REJECTED, get_call_metrics
+from .clock import SYSTEM_CLOCK, Clock
+from .action_queue import FOLLOW, LIKE, DeferredActionQueue
+from .session_cache import SessionProfileCache
+from .social_graph import SocialGraphSync
 
 logger = logging.getLogger(__name__)
 
+# Rate-limited action -> twikit endpoint that performs it
+ACTION_ENDPOINTS = {
+    'tweets': 'create_tweet',
+    'replies': 'create_tweet',
+    'likes': 'favorite_tweet',
+    'follows': 'follow_user',
+}
+
+# Account action -> fleet budget it draws from (a reply is a tweet upstream)
+FLEET_ACTIONS = {
+    'replies': 'tweets',
+}
+
+# Recently liked tweet / followed user ids kept per account
+REMEMBERED_IDS = 5000
 
-class SafetyLimiter:
-    """Rate limiter for bot safety"""
-    
-    def __init__(self, config: Dict):
-        self.config = config
-        self.counters = {
-            'tweets': {'hour': 0, 'day': 0, 'last_reset_hour': datetime.now().hour},
-            'follows': {'hour': 0, 'day': 0, 'last_reset_hour': datetime.now().hour},
-            'likes': {'hour': 0, 'day': 0, 'last_reset_hour': datetime.now().hour},
-            'replies': {'hour': 0, 'day': 0, 'last_reset_hour': datetime.now().hour},
-        }
-    
-    def _reset_if_needed(self, action_type: str):
-        """Reset counters if hour changed"""
-        current_hour = datetime.now().hour
-        counter = self.counters[action_type]
-        
-        if current_hour != counter['last_reset_hour']:
-            counter['hour'] = 0
-            counter['last_reset_hour'] = current_hour
-        
-        # Reset daily counter at midnight
-        if current_hour == 0 and counter['day'] > 0:
-            counter['day'] = 0
-    
-    def can_perform(self, action_type: str) -> bool:
-        """Check if action can be performed"""
-        self._reset_if_needed(action_type)
-        
-        counter = self.counters[action_type]
-        limits = self.config['rate_limits']
-        
-        hourly_limit = limits.get(f'{action_type}_per_hour', 999)
-        daily_limit = limits.get(f'{action_type}_per_day', 999)
-        
-        if counter['hour'] >= hourly_limit:
-            logger.warning(f"Hourly limit reached for {action_type}")
-            return False
-        
-        if counter['day'] >= daily_limit:
-            logger.warning(f"Daily limit reached for {action_type}")
-            return False
-        
-        return True
-    
-    def record_action(self, action_type: str):
-        """Record that action was performed"""
-        self._reset_if_needed(action_type)
-        counter = self.counters[action_type]
-        counter['hour'] += 1
-        counter['day'] += 1
-    
-    def get_status(self, action_type: str) -> Dict:
-        """Get current status for action type"""
-        self._reset_if_needed(action_type)
-        counter = self.counters[action_type]
-        limits = self.config['rate_limits']
-        
-        return {
-            'hour_count': counter['hour'],
-            'hour_limit': limits.get(f'{action_type}_per_hour', 999),
-            'day_count': counter['day'],
-            'day_limit': limits.get(f'{action_type}_per_day', 999),
-            'can_perform': self.can_perform(action_type)
-        }
+
+def _call_outcome(error: BaseException) -> str:
+    """Call metrics outcome of a failed twikit call"""
+    return RATE_LIMITED if classify_error(error) == RATE_LIMITED else ERROR
 
 
 class TwitterClient:
     """Safe Twitter client wrapper"""
     
-    def __init__(self, cookies_file: str, config: ConfigLoader, database: Database):
+    def __init__(self, cookies_file: str, config: ConfigLoader, database: AsyncDatabase,
+                 fleet_limiter: Optional[FleetRateLimiter] = None, account_id: str = 'default',
+                 clock: Clock = SYSTEM_CLOCK,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
         self.cookies_file = cookies_file
         self.config = config
         self.db = database
         
+        # Time source for delays, limits and caches (a VirtualClock in simulations)
+        self.clock = clock
+        
+        # Held by each write action through its safety delay, so slot steps
+        # running concurrently never act faster than one at a time would
+        self.write_lock = asyncio.Lock()
+        
+        # In-process transport instead of the shared pool (e.g. bot.fake_api.FakeXTransport)
+        self.transport = transport
+        
         # Get safety config
         settings = config.get_settings()
         self.safety_config = settings['safety']
-        self.limiter = SafetyLimiter(self.safety_config)
+        self.proxy = settings.get('account', {}).get('proxy')
+        
+        # Local stand-in API (bot.fake_api) for offline runs and benchmarks
+        self.api_base_url = (
+            settings.get('account', {}).get('api_base_url')
+            or os.environ.get('TWITTER_API_BASE_URL')
+        )
+        
+        # Sliding-window limits, persisted in the account's metrics.db
+        self.limiter = SlidingWindowLimiter(
+            self.safety_config, database, clock=clock.time, sleep=clock.sleep
+        )
+        
+        # Optional fleet-wide budget shared with the other accounts
+        self.fleet_limiter = fleet_limiter
+        self.account_id = account_id
+        self.fleet_max_wait = self.safety_config.get('fleet_max_wait', 300)
+        
+        # Max result pages fetched per search before giving up on the quota
+        self.search_page_budget = self.safety_config.get('search_page_budget', 3)
+        
+        # Search results shared with the other accounts in this process
+        self.search_cache = get_search_cache()
+        
+        # Tweets this account liked and users it followed recently (shared
+        # search results can't say, see strip_viewer_fields); liked ids are
+        # also stored in the account database and reloaded by setup()
+        self.liked_ids: "OrderedDict[str, None]" = OrderedDict()
+        self.followed_ids: "OrderedDict[str, None]" = OrderedDict()
+        
+        # Retries and per-endpoint circuit breakers around every twikit call
+        self.resilience = ResilientCaller.from_settings(
+            database, self.safety_config, clock=clock.time, sleep=clock.sleep
+        )
+        
+        # Latency and outcome per endpoint, shared with the other accounts
+        self.call_metrics = get_call_metrics()
+        
+        # Uploaded media_ids reused until they expire upstream
+        media_settings = settings.get('media_cache', {})
+        self.media_cache = None
+        if media_settings.get('enabled', True):
+            self.media_cache = MediaUploadCache.from_settings(
+                self._upload_media, database, account_id, media_settings,
+                clock=clock.time, sleep=clock.sleep
+            )
+        
+        # Last known profile, so restarts can skip the client.user() call
+        session_settings = settings.get('session', {})
+        self.session_cache = None
+        if session_settings.get('cache_profile', True):
+            self.session_cache = SessionProfileCache.from_settings(
+                database, account_id, cookies_file, session_settings, clock=clock.time
+            )
+        
+        # Follower/following id sets, synced a few pages per slot
+        graph_settings = settings.get('social_graph', {})
+        self.social_graph = None
+        if graph_settings.get('enabled', True):
+            self.social_graph = SocialGraphSync.from_settings(
+                self.get_friendship_ids, database, graph_settings, clock=clock.time
+            )
         
         # Setup client
         self.client = None
         self.http_client = None
         self.me = None
+        self.session_verified = False
     
-    async def setup(self) -> bool:
-        """Initialize Twitter client"""
+    async def setup(self, verify: bool = False) -> bool:
+        """
+        Initialize Twitter client
+        
+        Args:
+            verify: Always fetch the profile instead of trusting a cached one
+                    (connection tests)
+        """
         try:
             # Setup timeout
             timeout_config = httpx.Timeout(
                 connect=30.0, read=300.0, write=300.0, pool=30.0
             )
             
-            self.http_client = httpx.AsyncClient(
-                timeout=timeout_config,
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
-                follow_redirects=True
-            )
+            if self.transport is not None:
+                self.http_client = httpx.AsyncClient(
+                    transport=self.transport,
+                    timeout=timeout_config,
+                    follow_redirects=True
+                )
+            else:
+                # Own cookie jar, connections shared with the other accounts
+                self.http_client = get_registry().client(
+                    'twitter',
+                    proxy=self.proxy,
+                    redirect=self.api_base_url,
+                    timeout=timeout_config,
+                    follow_redirects=True
+                )
             
             # Setup client
             user_agent = (
@@ -129,28 +187,176 @@ class TwitterClient:
             # Load cookies
             self.client.load_cookies(self.cookies_file)
             
+            if self.social_graph:
+                await self.db.run(self.social_graph.load)
+            
+            for tweet_id in await self.db.get_liked_tweet_ids(REMEMBERED_IDS):
+                self._remember(self.liked_ids, tweet_id)
+            
+            # Warm start: cookies are checked by the first real request
+            if self.session_cache and not verify:
+                profile = await self.session_cache.load()
+                if profile:
+                    self.me = profile
+                    logger.info(f"✅ Resumed session as @{self.me.screen_name} (cached profile)")
+                    await self.db.log_activity('login', f'Resumed session as @{self.me.screen_name}', True)
+                    return True
+            
             # Verify login
-            self.me = await self.client.user()
+            self.me = await self._call('user', self.client.user)
+            
+            if self.session_cache:
+                await self.session_cache.save(self.me)
             
             logger.info(f"✅ Logged in as @{self.me.screen_name}")
             logger.info(f"   Followers: {self.me.followers_count}")
             logger.info(f"   Following: {self.me.following_count}")
             
             # Record follower count
-            self.db.record_follower_count(
+            await self.db.record_follower_count(
                 self.me.followers_count,
                 self.me.following_count
             )
             
-            self.db.log_activity('login', f'Logged in as @{self.me.screen_name}', True)
+            await self.db.log_activity('login', f'Logged in as @{self.me.screen_name}', True)
             
             return True
             
         except Exception as e:
             logger.error(f"Failed to setup Twitter client: {e}")
-            self.db.log_activity('login', None, False, str(e))
+            await self.db.log_activity('login', None, False, str(e))
             return False
     
+    async def _call(self, endpoint: str, fn, *args, **kwargs):
+        """Run a twikit call through the resilience layer, timing every attempt"""
+        async def attempt(*args, **kwargs):
+            with self.call_metrics.timed(self.account_id, endpoint, _call_outcome,
+                                         clock=self.clock.monotonic):
+                return await fn(*args, **kwargs)
+        
+        try:
+            result = await self.resilience.call(endpoint, attempt, *args, **kwargs)
+        except Exception as e:
+            if isinstance(e, CircuitOpenError):
+                self.call_metrics.record(self.account_id, endpoint, REJECTED)
+            if classify_error(e) == AUTH and self.session_cache:
+                # Cookies no longer work: next start must log in for real
+                logger.error(f"Session rejected for @{self.me.screen_name if self.me else '?'}: {e}")
+                await self.session_cache.invalidate()
+            raise
+        
+        self.session_verified = True
+        return result
+    
+    async def _acquire(self, action_type: str) -> bool:
+        """Check the endpoint's breaker, then reserve account and fleet capacity (if any)"""
+        endpoint = ACTION_ENDPOINTS.get(action_type)
+        if endpoint and self.resilience.is_open(endpoint):
+            logger.warning(f"Circuit open for {endpoint}, skipping {action_type}")
+            return False
+        
+        # Recorded right away; _release() gives it back if the action fails
+        if not await self.limiter.acquire(action_type, max_wait=0):
+            return False
+        
+        if self.fleet_limiter is not None:
+            acquired = await self.fleet_limiter.acquire(
+                self.account_id, FLEET_ACTIONS.get(action_type, action_type),
+                max_wait=self.fleet_max_wait
+            )
+            if not acquired:
+                self.limiter.release(action_type)
+            return acquired
+        
+        return True
+    
+    async def _release(self, action_type: str):
+        """Return the account and fleet reservations of an action that failed"""
+        self.limiter.release(action_type)
+        if self.fleet_limiter is not None:
+            await self.fleet_limiter.release_async(
+                self.account_id, FLEET_ACTIONS.get(action_type, action_type)
+            )
+    
+    async def _search_tweet(self, query: str, product: str = 'Latest', count: int = 20,
+                            cursor: Optional[str] = None):
+        """client.search_tweet through the shared search cache"""
+        return await self.search_cache.get_or_fetch(
+            ('tweet', query, product, count, cursor),
+            lambda: self._shared_search(
+                'search_tweet', self.client.search_tweet,
+                query, product=product, count=count, cursor=cursor
+            )
+        )
+    
+    async def _search_user(self, query: str, count: int = 20, cursor: Optional[str] = None):
+        """client.search_user through the shared search cache"""
+        return await self.search_cache.get_or_fetch(
+            ('user', query, None, count, cursor),
+            lambda: self._shared_search(
+                'search_user', self.client.search_user, query, count=count, cursor=cursor
+            )
+        )
+    
+    async def _shared_search(self, endpoint: str, fn, *args, **kwargs):
+        """A search call whose result is fit for every account"""
+        return strip_viewer_fields(await self._call(endpoint, fn, *args, **kwargs))
+    
+    @staticmethod
+    def _remember(ids: "OrderedDict[str, None]", item_id):
+        ids[str(item_id)] = None
+        ids.move_to_end(str(item_id))
+        while len(ids) > REMEMBERED_IDS:
+            ids.popitem(last=False)
+    
+    async def _iter_pages(self, search, query: str, max_pages: Optional[int], **kwargs) -> AsyncIterator[list]:
+        """Follow next_cursor page by page, up to the page budget"""
+        max_pages = self.search_page_budget if max_pages is None else max_pages
+        cursor = None
+        
+        for _ in range(max_pages):
+            result = await search(query, cursor=cursor, **kwargs)
+            if not result:
+                return
+            
+            yield list(result)
+            
+            cursor = getattr(result, 'next_cursor', None)
+            if not cursor:
+                return
+    
+    def iter_search_tweet_pages(self, query: str, product: str = 'Latest', count: int = 20,
+                                max_pages: Optional[int] = None) -> AsyncIterator[list]:
+        """
+        Stream tweet search results one page at a time
+        
+        Stop iterating (or aclose()) as soon as you have enough; later
+        pages are only requested when asked for.
+        
+        Args:
+            query: Search query string
+            product: 'Latest', 'Top' or 'Media'
+            count: Results per page
+            max_pages: Page budget (default: safety.search_page_budget)
+        """
+        return self._iter_pages(self._search_tweet, query, max_pages, product=product, count=count)
+    
+    async def iter_search_tweets(self, query: str, product: str = 'Latest', count: int = 20,
+                                 max_pages: Optional[int] = None) -> AsyncIterator:
+        """Stream tweet search results one tweet at a time (see iter_search_tweet_pages)"""
+        async with aclosing(self.iter_search_tweet_pages(query, product, count, max_pages)) as pages:
+            async for page in pages:
+                for tweet in page:
+                    yield tweet
+    
+    async def iter_search_users(self, query: str, count: int = 20,
+                                max_pages: Optional[int] = None) -> AsyncIterator:
+        """Stream user search results one user at a time, page by page"""
+        async with aclosing(self._iter_pages(self._search_user, query, max_pages, count=count)) as pages:
+            async for page in pages:
+                for user in page:
+                    yield user
+    
     async def random_delay(self, delay_type: str = 'default'):
         """Random delay for natural behavior"""
         delays = self.safety_config['delays']
@@ -163,7 +369,7 @@ class TwitterClient:
         
         delay = random.uniform(min_delay, max_delay)
         logger.debug(f"Waiting {delay:.1f}s...")
-        await asyncio.sleep(delay)
+        await self.clock.sleep(delay)
     
     async def post_tweet(self, text: str, media_ids: Optional[List[str]] = None,
                         tweet_type: str = 'promo') -> Optional[str]:
@@ -173,37 +379,43 @@ class TwitterClient:
         Returns:
             Tweet ID if successful, None otherwise
         """
-        if not self.limiter.can_perform('tweets'):
+        if not await self._acquire('tweets'):
             logger.warning("Tweet rate limit reached!")
             return None
         
-        try:
-            tweet = await self.client.create_tweet(
-                text=text,
-                media_ids=media_ids
-            )
-            
-            tweet_id = tweet.id
-            
-            # Record metrics
-            self.limiter.record_action('tweets')
-            self.db.increment_activity('tweet')
-            self.db.add_tweet(tweet_id, text, tweet_type)
-            
-            media_note = f" (with {len(media_ids)} media)" if media_ids else ""
-            self.db.log_activity('post_tweet', f'Posted{media_note}: {text[:50]}...', True)
-            
-            logger.info(f"✅ Tweet posted: {tweet_id}{media_note}")
-            
-            # Delay after tweet
-            await self.random_delay('after_tweet')
-            
-            return tweet_id
+        async with self.write_lock:
+            try:
+                try:
+                    tweet = await self._call(
+                        'create_tweet', self.client.create_tweet,
+                        text=text,
+                        media_ids=media_ids,
+                        idempotent=False
+                    )
+                except Exception:
+                    await self._release('tweets')
+                    raise
+                
+                tweet_id = tweet.id
+                
+                # Record metrics
+                await self.db.increment_activity('tweet')
+                await self.db.add_tweet(tweet_id, text, tweet_type)
+                
+                media_note = f" (with {len(media_ids)} media)" if media_ids else ""
+                await self.db.log_activity('post_tweet', f'Posted{media_note}: {text[:50]}...', True)
+                
+                logger.info(f"✅ Tweet posted: {tweet_id}{media_note}")
+                
+                # Delay after tweet
+                await self.random_delay('after_tweet')
+                
+                return tweet_id
             
-        except Exception as e:
-            logger.error(f"Failed to post tweet: {e}")
-            self.db.log_activity('post_tweet', text[:50], False, str(e))
-            return None
+            except Exception as e:
+                logger.error(f"Failed to post tweet: {e}")
+                await self.db.log_activity('post_tweet', text[:50], False, str(e))
+                return None
     
     async def search_tweets(self, query: str, count: int = 20):
         """
@@ -217,10 +429,10 @@ class TwitterClient:
             List of tweet objects
         """
         try:
-            self.db.log_activity('search_tweets', f'Query: {query}', True)
+            await self.db.log_activity('search_tweets', f'Query: {query}', True)
             
             # Use twikit's search
-            tweets = await self.client.search_tweet(query, product='Latest', count=count)
+            tweets = await self._search_tweet(query, product='Latest', count=count)
             
             logger.info(f"🔍 Found {len(tweets) if tweets else 0} tweets for '{query}'")
             
@@ -228,9 +440,56 @@ class TwitterClient:
             
         except Exception as e:
             logger.error(f"Error searching tweets: {e}")
-            self.db.log_activity('search_tweets', f'Failed: {str(e)}', False)
+            await self.db.log_activity('search_tweets', f'Failed: {str(e)}', False)
             return []
     
+    async def get_tweets_metrics(self, tweet_ids: List[str]) -> Dict[str, Tuple[int, int, int, int]]:
+        """
+        Fetch current stats for several tweets in one request
+        
+        Args:
+            tweet_ids: Tweet IDs to look up
+        
+        Returns:
+            tweet_id -> (views, likes, retweets, replies); deleted or
+            unavailable tweets are missing from the result
+        """
+        tweets = await self._call(
+            'get_tweets_by_ids', self.client.get_tweets_by_ids, list(tweet_ids)
+        )
+        
+        metrics = {}
+        for tweet in tweets:
+            if tweet is None:
+                continue
+            
+            try:
+                views = int(tweet.view_count or 0)
+            except (TypeError, ValueError):
+                views = 0
+            
+            metrics[str(tweet.id)] = (
+                views,
+                tweet.favorite_count or 0,
+                tweet.retweet_count or 0,
+                tweet.reply_count or 0
+            )
+        
+        return metrics
+    
+    async def get_friendship_ids(self, kind: str, cursor: Optional[str] = None,
+                                 count: int = 5000) -> Tuple[List[int], Optional[str]]:
+        """
+        One page of our follower ('followers') or followed ('following') ids
+        
+        Returns:
+            (user ids, next cursor or None on the last page)
+        """
+        fetch = self.client.get_followers_ids if kind == 'followers' else self.client.get_friends_ids
+        result = await self._call(f'{kind}_ids', fetch, user_id=self.me.id, count=count, cursor=cursor)
+        
+        return [int(user_id) for user_id in result], result.next_cursor
+    
     async def reply_to_tweet(self, tweet_id: str, reply_text: str) -> Optional[str]:
         """
         Reply to a specific tweet with safety checks
@@ -242,48 +501,68 @@ class TwitterClient:
         Returns:
             Reply tweet ID if successful, None otherwise
         """
-        if not self.limiter.can_perform('replies'):
+        if not await self._acquire('replies'):
             logger.warning("Reply rate limit reached!")
             return None
         
-        try:
-            # Create reply tweet
-            reply = await self.client.create_tweet(
-                text=reply_text,
-                reply_to=tweet_id
-            )
-            
-            reply_id = reply.id
-            
-            # Record metrics
-            self.limiter.record_action('replies')
-            self.db.increment_activity('reply')
-            self.db.add_tweet(reply_id, reply_text, 'reply')
-            
-            self.db.log_activity('reply_tweet', f'Replied to {tweet_id}: {reply_text[:50]}...', True)
-            
-            logger.info(f"✅ Reply posted: {reply_id}")
-            
-            # Longer delay after reply (be more cautious)
-            await self.random_delay('after_like')
-            
-            return reply_id
+        async with self.write_lock:
+            try:
+                # Create reply tweet
+                try:
+                    reply = await self._call(
+                        'create_tweet', self.client.create_tweet,
+                        text=reply_text,
+                        reply_to=tweet_id,
+                        idempotent=False
+                    )
+                except Exception:
+                    await self._release('replies')
+                    raise
+                
+                reply_id = reply.id
+                
+                # Record metrics
+                await self.db.increment_activity('reply')
+                await self.db.add_tweet(reply_id, reply_text, 'reply')
+                
+                await self.db.log_activity('reply_tweet', f'Replied to {tweet_id}: {reply_text[:50]}...', True)
+                
+                logger.info(f"✅ Reply posted: {reply_id}")
+                
+                # Longer delay after reply (be more cautious)
+                await self.random_delay('after_like')
+                
+                return reply_id
             
-        except Exception as e:
-            logger.error(f"Error replying to tweet {tweet_id}: {e}")
-            self.db.log_activity('reply_tweet', f'Failed: {str(e)}', False)
-            return None
+            except Exception as e:
+                logger.error(f"Error replying to tweet {tweet_id}: {e}")
+                await self.db.log_activity('reply_tweet', f'Failed: {str(e)}', False)
+                return None
     
     async def upload_media_file(self, file_path: str) -> Optional[str]:
         """
         Upload media file and return media_id
         
+        Reuses a still-valid upload of the same file content when the
+        media cache is enabled.
+        
         Args:
             file_path: Path to media file
         
         Returns:
             Media ID if successful, None otherwise
         """
+        if self.media_cache is None:
+            return await self._upload_media(file_path)
+        
+        try:
+            return await self.media_cache.get_media_id(file_path)
+        except Exception as e:
+            logger.error(f"Failed to upload media: {e}")
+            return None
+    
+    async def _upload_media(self, file_path: str) -> Optional[str]:
+        """Upload media file to Twitter (no cache)"""
         try:
             # Detect media type
             if file_path.lower().endswith(('.mp4', '.mov')):
@@ -298,7 +577,8 @@ class TwitterClient:
             
             logger.info(f"📤 Uploading media: {file_path}")
             
-            media_id = await self.client.upload_media(
+            media_id = await self._call(
+                'upload_media', self.client.upload_media,
                 file_path,
                 media_type=media_type,
                 wait_for_completion=True
@@ -312,123 +592,187 @@ class TwitterClient:
             logger.error(f"Failed to upload media: {e}")
             return None
     
-    async def search_and_like(self, keyword: str, max_like: int = 5) -> int:
+    async def like_tweet(self, tweet) -> Optional[bool]:
         """
-        Search keyword and like relevant tweets
+        Like a tweet with safety checks
         
         Returns:
-            Number of tweets liked
+            True if liked, False if it failed, None if the rate limit is reached
         """
-        try:
-            tweets = await self.client.search_tweet(
-                keyword,
-                product='Latest',
-                count=20
-            )
-            
-            liked_count = 0
-            found_count = len(tweets) if tweets else 0
-            
-            if not tweets:
-                logger.info(f"No tweets found for: {keyword}")
-                return 0
-            
-            for tweet in tweets:
-                if liked_count >= max_like:
-                    break
+        if not await self._acquire('likes'):
+            logger.warning("Like rate limit reached!")
+            return None
+        
+        async with self.write_lock:
+            try:
+                try:
+                    await self._call(
+                        'favorite_tweet', self.client.favorite_tweet, tweet.id
+                    )
+                except Exception:
+                    await self._release('likes')
+                    raise
                 
-                if not self.limiter.can_perform('likes'):
-                    logger.warning("Like rate limit reached!")
-                    break
+                self._remember(self.liked_ids, tweet.id)
+                await self.db.record_liked_tweet(tweet.id, REMEMBERED_IDS)
+                await self.db.increment_activity('like')
                 
-                # Skip own tweets
-                if tweet.user.id == self.me.id:
-                    continue
+                logger.info(f"❤️  Liked tweet from @{tweet.user.screen_name}")
                 
-                # Skip already liked
-                if tweet.favorited:
-                    continue
+                await self.random_delay()
                 
-                try:
-                    await self.client.favorite_tweet(tweet.id)
+                return True
+            
+            except Exception as e:
+                logger.error(f"Failed to like tweet: {e}")
+                return False
+    
+    async def search_and_like(self, keyword: str, max_like: int = 5,
+                              queue: Optional[DeferredActionQueue] = None) -> int:
+        """
+        Search keyword and like relevant tweets
+        
+        Args:
+            queue: Queue the likes there instead of liking inline
+        
+        Returns:
+            Number of tweets liked (or queued)
+        """
+        try:
+            liked_count = 0
+            found_count = 0
+            
+            # Pages are fetched lazily; stop as soon as the quota is met
+            async with aclosing(self.iter_search_tweets(keyword, product='Latest', count=20)) as tweets:
+                async for tweet in tweets:
+                    if liked_count >= max_like:
+                        break
+                    
+                    found_count += 1
                     
-                    self.limiter.record_action('likes')
-                    self.db.increment_activity('like')
+                    # Skip own tweets
+                    if tweet.user.id == self.me.id:
+                        continue
                     
-                    liked_count += 1
-                    logger.info(f"❤️  Liked tweet from @{tweet.user.screen_name}")
+                    # Skip already liked (by this account)
+                    if str(tweet.id) in self.liked_ids:
+                        continue
                     
-                    await self.random_delay()
+                    if queue is not None:
+                        # Likes already queued will spend the budget first
+                        if queue.pending(LIKE) >= self.limiter.remaining('likes'):
+                            logger.warning("Like rate limit reached (queued likes included)!")
+                            break
+                        
+                        if queue.enqueue(LIKE, lambda tweet=tweet: self.like_tweet(tweet),
+                                         key=f"{LIKE}:{tweet.id}",
+                                         description=f"@{tweet.user.screen_name}"):
+                            liked_count += 1
+                        continue
                     
-                except Exception as e:
-                    logger.error(f"Failed to like tweet: {e}")
+                    liked = await self.like_tweet(tweet)
+                    if liked is None:
+                        break
+                    if liked:
+                        liked_count += 1
+            
+            if not found_count:
+                logger.info(f"No tweets found for: {keyword}")
+                return 0
             
             # Record keyword performance
-            self.db.record_keyword_activity(keyword, found_count, liked_count)
-            self.db.log_activity('search_like', f'{keyword}: {liked_count}/{found_count}', True)
+            queued_note = ' queued' if queue is not None else ''
+            await self.db.record_keyword_activity(keyword, found_count, liked_count)
+            await self.db.log_activity('search_like', f'{keyword}: {liked_count}/{found_count}{queued_note}', True)
             
             return liked_count
             
         except Exception as e:
             logger.error(f"Search and like error: {e}")
-            self.db.log_activity('search_like', keyword, False, str(e))
+            await self.db.log_activity('search_like', keyword, False, str(e))
             return 0
     
     async def follow_user(self, user_id: str) -> bool:
         """Follow user with safety checks"""
-        if not self.limiter.can_perform('follows'):
+        if not await self._acquire('follows'):
             logger.warning("Follow rate limit reached!")
             return False
         
-        try:
-            await self.client.follow_user(user_id)
-            
-            self.limiter.record_action('follows')
-            self.db.increment_activity('follow')
-            self.db.log_activity('follow', f'Followed user {user_id}', True)
-            
-            logger.info(f"✅ Followed user: {user_id}")
-            
-            await self.random_delay('after_follow')
-            
-            return True
+        async with self.write_lock:
+            try:
+                try:
+                    await self._call('follow_user', self.client.follow_user, user_id)
+                except Exception:
+                    await self._release('follows')
+                    raise
+                
+                self._remember(self.followed_ids, user_id)
+                if self.social_graph:
+                    self.social_graph.mark_following(user_id)
+                await self.db.increment_activity('follow')
+                await self.db.log_activity('follow', f'Followed user {user_id}', True)
+                
+                logger.info(f"✅ Followed user: {user_id}")
+                
+                await self.random_delay('after_follow')
+                
+                return True
             
-        except Exception as e:
-            logger.error(f"Failed to follow user: {e}")
-            self.db.log_activity('follow', user_id, False, str(e))
-            return False
+            except Exception as e:
+                logger.error(f"Failed to follow user: {e}")
+                await self.db.log_activity('follow', user_id, False, str(e))
+                return False
     
-    async def search_and_follow(self, keyword: str, max_follow: int = 5) -> int:
-        """Search users by keyword and follow"""
+    async def search_and_follow(self, keyword: str, max_follow: int = 5,
+                                queue: Optional[DeferredActionQueue] = None) -> int:
+        """Search users by keyword and follow (or queue the follows)"""
         try:
-            users = await self.client.search_user(keyword, count=20)
-            
             followed_count = 0
+            found_count = 0
             
-            if not users:
+            # Keep paging while the follower-range filter rejects most users
+            async with aclosing(self.iter_search_users(keyword, count=20)) as users:
+                async for user in users:
+                    if followed_count >= max_follow:
+                        break
+                    
+                    found_count += 1
+                    
+                    # Skip self
+                    if user.id == self.me.id:
+                        continue
+                    
+                    # Skip if already following (synced following set, or followed since)
+                    if str(user.id) in self.followed_ids:
+                        continue
+                    if self.social_graph and self.social_graph.is_following(user.id):
+                        continue
+                    
+                    # Filter by followers (100-5000 sweet spot)
+                    if user.followers_count < 100 or user.followers_count > 5000:
+                        continue
+                    
+                    # No point paging further once the follow limit is hit
+                    # (follows already queued will spend the budget first)
+                    queued = queue.pending(FOLLOW) if queue is not None else 0
+                    if queued >= self.limiter.remaining('follows'):
+                        break
+                    
+                    if queue is not None:
+                        if queue.enqueue(FOLLOW, lambda user_id=user.id: self.follow_user(user_id),
+                                         key=f"{FOLLOW}:{user.id}",
+                                         description=f"@{user.screen_name}"):
+                            followed_count += 1
+                        continue
+                    
+                    success = await self.follow_user(user.id)
+                    if success:
+                        followed_count += 1
+            
+            if not found_count:
                 logger.info(f"No users found for: {keyword}")
                 return 0
             
-            for user in users:
-                if followed_count >= max_follow:
-                    break
-                
-                # Skip self
-                if user.id == self.me.id:
-                    continue
-                
-                # Skip if already following (check if attribute exists)
-                if hasattr(user, 'following') and user.following:
-                    continue
-                
-                # Filter by followers (100-5000 sweet spot)
-                if user.followers_count < 100 or user.followers_count > 5000:
-                    continue
-                
-                success = await self.follow_user(user.id)
-                if success:
-                    followed_count += 1
-            
             logger.info(f"Followed {followed_count} users for keyword: {keyword}")
             return followed_count
             
@@ -443,25 +787,39 @@ class TwitterClient:
             'follows': self.limiter.get_status('follows'),
             'likes': self.limiter.get_status('likes'),
             'replies': self.limiter.get_status('replies'),
+            'fleet': self.fleet_limiter.get_status(self.account_id) if self.fleet_limiter else None,
+            'circuits': self.resilience.get_status(),
+            'calls': self.call_metrics.get_stats(self.account_id)['endpoints'],
         }
     
     async def update_follower_count(self):
         """Update follower count in database"""
         try:
             # Refresh user data
-            self.me = await self.client.user()
+            self.me = await self._call('user', self.client.user)
+            
+            if self.session_cache:
+                await self.session_cache.save(self.me)
             
-            self.db.record_follower_count(
+            await self.db.record_follower_count(
                 self.me.followers_count,
-                self.me.friends_count
+                self.me.following_count
             )
             
             logger.info(f"Updated follower count: {self.me.followers_count}")
             
+            # Next step of the follower/following id sync
+            if self.social_graph:
+                await self.social_graph.sync_all()
+            
         except Exception as e:
             logger.error(f"Failed to update follower count: {e}")
     
     async def cleanup(self):
         """Cleanup resources"""
         if self.http_client:
-            await self.http_client.aclose()
+            if self.transport is not None:
+                await self.http_client.aclose()
+            else:
+                await get_registry().release(self.http_client)
+            self.http_client = None
@@ -0,0 +1,162 @@
+"""
+Write-behind buffer for activity logging
+Collects log rows and counter bumps in memory and flushes them in one transaction
+"""
+
+import threading
+import logging
+from collections import Counter
+from datetime import timezone
+from typing import Callable, List, Tuple, Optional
+
+from .clock import SYSTEM_CLOCK, Clock
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    In-memory buffer for activity_log rows and daily_activity counters.
+
+    Events are flushed as a single transaction when `max_events` are
+    pending or `flush_interval` seconds have passed, whichever comes first.
+    Counter bumps for the same day / hour are coalesced into one UPDATE
+    per flush.
+    """
+
+    def __init__(self, flush_fn: Callable[[List[Tuple], Counter], None],
+                 max_events: int = 50, flush_interval: float = 5.0,
+                 clock: Clock = SYSTEM_CLOCK):
+        """
+        Args:
+            flush_fn: Called with (log_rows, counters) to persist a batch
+            max_events: Flush as soon as this many events are pending
+            flush_interval: Flush pending events at least this often (seconds)
+            clock: Stamps log rows and counter hours when they are queued
+        """
+        self.flush_fn = flush_fn
+        self.max_events = max_events
+        self.flush_interval = flush_interval
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._logs: List[Tuple] = []
+        self._counters: Counter = Counter()
+        self._pending = 0
+
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Stats
+        self.flush_count = 0
+        self.event_count = 0
+
+    def start(self):
+        """Start background flusher thread"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="db-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        """Flush on size threshold (wakeup) or time threshold (timeout)"""
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+
+    def add_log(self, activity_type: str, details: str = None,
+                success: bool = True, error_message: str = None):
+        """Queue an activity_log row (timestamped now, in UTC like CURRENT_TIMESTAMP)"""
+        timestamp = self.clock.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._logs.append((activity_type, details, success, error_message, timestamp))
+            self._pending += 1
+            pending = self._pending
+
+        self._maybe_wakeup(pending)
+
+    def add_counter(self, column: str, count: int = 1, hour: Optional[str] = None):
+        """Queue a counter bump, keyed by local hour ('YYYY-MM-DD HH:00')"""
+        if hour is None:
+            hour = self.clock.now().strftime('%Y-%m-%d %H:00')
+        
+        with self._lock:
+            self._counters[(hour, column)] += count
+            self._pending += 1
+            pending = self._pending
+
+        self._maybe_wakeup(pending)
+
+    def _maybe_wakeup(self, pending: int):
+        if pending < self.max_events:
+            return
+
+        if self._thread and self._thread.is_alive():
+            self._wakeup.set()
+        else:
+            # No flusher thread running: flush inline
+            self.flush()
+
+    def has_pending(self) -> bool:
+        """Check if there are unflushed events"""
+        return self._pending > 0
+
+    def flush(self) -> int:
+        """
+        Write all pending events in one transaction
+
+        Returns:
+            Number of events flushed
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                logs, counters, pending = self._logs, self._counters, self._pending
+                self._logs, self._counters, self._pending = [], Counter(), 0
+
+            try:
+                self.flush_fn(logs, counters)
+            except Exception:
+                # Put events back so the next flush retries them
+                with self._lock:
+                    self._logs = logs + self._logs
+                    self._counters.update(counters)
+                    self._pending += pending
+                raise
+
+            self.flush_count += 1
+            self.event_count += pending
+            logger.debug(f"Flushed {pending} buffered events")
+            return pending
+
+    def close(self):
+        """Stop flusher thread and flush remaining events"""
+        self._stopped = True
+        self._wakeup.set()
+
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self._thread = None
+
+        self.flush()
+
+    def get_stats(self) -> dict:
+        """Get buffer statistics"""
+        return {
+            'pending': self._pending,
+            'flushes': self.flush_count,
+            'events_flushed': self.event_count,
+            'max_events': self.max_events,
+            'flush_interval': self.flush_interval
+        }
@@ -15,6 +15,10 @@ from bot.database import Database
 from bot.config_loader import ConfigLoader
 from bot.automation import BotAutomation
 from bot.multi_account_runner import MultiAccountRunner
+from bot.account_manager import AccountManager
+from bot.federated import FederatedReader
+from bot.http_pool import get_registry
+from bot.runtime_stats import get_runtime_stats
 
 # Setup logging
 logging.basicConfig(
@@ -34,6 +38,9 @@ bot_thread = None
 # Multi-account runner (singleton)
 multi_runner = None
 
+# Fleet-wide queries over all enabled accounts' databases
+fleet_reader = FederatedReader(AccountManager())
+
 # Load config
 settings = config.get_settings()
 app.config['SECRET_KEY'] = settings['dashboard']['secret_key']
@@ -111,6 +118,44 @@ def get_stats():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/fleet/summary')
+def get_fleet_summary():
+    """Get fleet-wide statistics across all enabled accounts"""
+    try:
+        fleet_reader.account_manager.reload()
+        return jsonify({'success': True, 'data': fleet_reader.get_fleet_summary()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/http/pools')
+def get_http_pools():
+    """Get shared HTTP connection pool utilization (as published by the runners)"""
+    try:
+        return jsonify({'success': True, 'data': get_runtime_stats().get_http_pool_stats()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/search/cache')
+def get_search_cache_stats():
+    """Get shared search cache hit/miss counters (as published by the runners)"""
+    try:
+        return jsonify({'success': True, 'data': get_runtime_stats().get_search_cache_stats()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/calls')
+def get_call_stats():
+    """Get latency histograms and outcome counts per endpoint (and per account) from the runners"""
+    try:
+        account_id = request.args.get('account_id')
+        return jsonify({'success': True, 'data': get_runtime_stats().get_call_stats(account_id)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/activity/today')
 def get_today_activity():
     """Get today's activity"""
@@ -1379,6 +1424,9 @@ def upload_cookies(account_id):
             asyncio.set_event_loop(loop)
             
             async def validate():
+                # Shared pool instead of a throwaway client per upload
+                http_client = get_registry().client('twitter', follow_redirects=True)
+                client.http = http_client
                 try:
                     user = await client.user()
                     return {
@@ -1393,6 +1441,8 @@ def upload_cookies(account_id):
                         'valid': False,
                         'error': str(e)
                     }
+                finally:
+                    await get_registry().release(http_client)
             
             result = loop.run_until_complete(validate())
             loop.close()
@@ -1731,7 +1781,7 @@ def test_cookies(account_id):
             
             async def run_test():
                 bot = BotAutomation(account_folder=account['folder'])
-                success = await bot.initialize()
+                success = await bot.initialize(verify=True)
                 
                 if success:
                     user_info = {
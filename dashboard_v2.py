@@ -25,10 +25,15 @@ from bot.account_manager import AccountManager
 from bot.database import Database
 from bot.config_loader import ConfigLoader
 from bot.multi_account_runner import MultiAccountRunner
+from bot.federated import FederatedReader
+from bot.runtime_stats import get_runtime_stats
 
 # Initialize account manager
 account_manager = AccountManager()
 
+# Fleet-wide queries over all enabled accounts' databases
+fleet_reader = FederatedReader(account_manager)
+
 # Initialize multi-account runner
 multi_runner = None
 runner_threads = {}  # Store thread references to keep them alive
@@ -187,6 +192,61 @@ def get_stats(account_id):
         logger.error(f"Error getting stats for {account_id}: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/v2/fleet/summary')
+def get_fleet_summary():
+    """Get fleet-wide statistics across all enabled accounts"""
+    try:
+        account_manager.reload()
+        
+        return jsonify({
+            'success': True,
+            'data': fleet_reader.get_fleet_summary()
+        })
+    except Exception as e:
+        logger.error(f"Error getting fleet summary: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/v2/fleet/likes')
+def get_fleet_likes():
+    """Get likes per account across the fleet"""
+    try:
+        days = request.args.get('days', 1, type=int)
+        account_manager.reload()
+        
+        return jsonify({
+            'success': True,
+            'data': fleet_reader.get_likes_per_account(days)
+        })
+    except Exception as e:
+        logger.error(f"Error getting fleet likes: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/v2/search/cache')
+def get_search_cache_stats():
+    """Get shared search cache hit/miss counters (as published by the runners)"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': get_runtime_stats().get_search_cache_stats()
+        })
+    except Exception as e:
+        logger.error(f"Error getting search cache stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/v2/calls')
+def get_call_stats():
+    """Get latency histograms and outcome counts per endpoint (and per account) from the runners"""
+    try:
+        account_id = request.args.get('account_id')
+        
+        return jsonify({
+            'success': True,
+            'data': get_runtime_stats().get_call_stats(account_id)
+        })
+    except Exception as e:
+        logger.error(f"Error getting call stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/v2/tweets/<account_id>')
 def get_tweets(account_id):
     """Get recent tweets for specific account"""
@@ -11,6 +11,8 @@ import sys
 from pathlib import Path
 
 from bot.automation import BotAutomation
+from bot.account_manager import AccountManager
+from bot.fleet_limiter import FleetRateLimiter
 
 # Setup logging
 logging.basicConfig(
@@ -38,12 +40,25 @@ def print_banner():
     """)
 
 
-async def run_once(slot: str, account_folder: str = None):
+def create_bot(account_folder: str = None, account_id: str = None) -> BotAutomation:
+    """Create bot; named accounts share the fleet-wide rate limit ledger"""
+    fleet_limiter = None
+    if account_id:
+        fleet_limiter = FleetRateLimiter.from_account_manager(AccountManager())
+    
+    return BotAutomation(
+        account_folder=account_folder,
+        fleet_limiter=fleet_limiter,
+        account_id=account_id
+    )
+
+
+async def run_once(slot: str, account_folder: str = None, account_id: str = None):
     """Run bot once (manual trigger)"""
     print_banner()
     print(f"\n🔧 Running {slot} slot...\n")
     
-    bot = BotAutomation(account_folder=account_folder)
+    bot = create_bot(account_folder, account_id)
     
     try:
         await bot.run_once(slot)
@@ -57,13 +72,13 @@ async def run_once(slot: str, account_folder: str = None):
         await bot.cleanup()
 
 
-async def run_scheduled(account_folder: str = None):
+async def run_scheduled(account_folder: str = None, account_id: str = None):
     """Run bot with schedule (daemon mode)"""
     print_banner()
     print("\n🕐 Starting bot in scheduled mode...")
     print("Press Ctrl+C to stop\n")
     
-    bot = BotAutomation(account_folder=account_folder)
+    bot = create_bot(account_folder, account_id)
     
     try:
         await bot.run_scheduled()
@@ -78,6 +93,77 @@ async def run_scheduled(account_folder: str = None):
         print("\n👋 Bot stopped!")
 
 
+def get_database_paths(account_id: str = None) -> list:
+    """Get metrics.db paths for one account or for all accounts"""
+    from bot.account_manager import AccountManager
+    
+    manager = AccountManager()
+    
+    if account_id:
+        account = manager.get_account(account_id)
+        return [f"{account['folder']}/data/metrics.db"] if account else []
+    
+    paths = [f"{account['folder']}/data/metrics.db" for account in manager.get_all_accounts()]
+    if Path('data/metrics.db').exists():
+        paths.insert(0, 'data/metrics.db')
+    return paths
+
+
+def check_indexes(account_id: str = None) -> bool:
+    """Migrate databases and verify dashboard queries use indexes"""
+    from bot.database import Database
+    
+    all_ok = True
+    
+    for db_path in get_database_paths(account_id):
+        print(f"\n🗄️  {db_path}")
+        
+        db = Database(db_path=db_path)
+        problems = db.check_query_plans()
+        
+        for name, details in db.explain_dashboard_queries().items():
+            print(f"   {name}: {' | '.join(details)}")
+        
+        if problems:
+            all_ok = False
+            for name, detail in problems:
+                print(f"   ❌ Scan in {name}: {detail}")
+        else:
+            print("   ✅ All dashboard queries use indexes")
+    
+    return all_ok
+
+
+def backfill_rollups(account_id: str = None):
+    """Rebuild rollup tables from existing metrics.db files"""
+    from bot.database import Database
+    
+    for db_path in get_database_paths(account_id):
+        db = Database(db_path=db_path)
+        db.backfill_rollups()
+        print(f"   ✅ {db_path}")
+
+
+def archive_logs(account_id: str = None):
+    """Apply activity_log retention to existing metrics.db files"""
+    from bot.database import Database
+    from bot.archive import ActivityLogArchiver
+    from bot.config_loader import ConfigLoader
+    
+    for db_path in get_database_paths(account_id):
+        config_dir = str(Path(db_path).parent.parent / 'config')
+        settings = ConfigLoader(config_dir=config_dir).get_settings() or {}
+        retention = settings.get('database', {}).get('retention', {})
+        
+        if not retention.get('enabled', False):
+            print(f"   ⏭️  {db_path} (retention disabled)")
+            continue
+        
+        archiver = ActivityLogArchiver(Database(db_path=db_path))
+        archived = archiver.archive(retention.get('activity_log_days', 30))
+        print(f"   ✅ {db_path}: archived {archived} rows")
+
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
@@ -93,6 +179,11 @@ Multi-Account Examples:
   python main.py --account account1 --run-once morning
   python main.py --account account2 --daemon
   python main.py --list-accounts        List all accounts
+  
+Database Maintenance:
+  python main.py --check-indexes        Migrate DBs and check query plans
+  python main.py --backfill-rollups     Rebuild dashboard rollup tables
+  python main.py --archive-logs         Archive old activity logs
         """
     )
     
@@ -126,6 +217,24 @@ Multi-Account Examples:
         help='List all available accounts'
     )
     
+    parser.add_argument(
+        '--check-indexes',
+        action='store_true',
+        help='Migrate databases and verify dashboard queries use indexes'
+    )
+    
+    parser.add_argument(
+        '--backfill-rollups',
+        action='store_true',
+        help='Rebuild dashboard rollup tables from existing data'
+    )
+    
+    parser.add_argument(
+        '--archive-logs',
+        action='store_true',
+        help='Archive activity logs past the retention window'
+    )
+    
     args = parser.parse_args()
     
     # Handle list-accounts command
@@ -154,6 +263,29 @@ Multi-Account Examples:
         print(f"Total: {len(accounts)} account(s)\n")
         return
     
+    # Handle check-indexes command
+    if args.check_indexes:
+        print_banner()
+        print("\n🔍 Checking database query plans...")
+        
+        if not check_indexes(args.account):
+            sys.exit(1)
+        return
+    
+    # Handle backfill-rollups command
+    if args.backfill_rollups:
+        print_banner()
+        print("\n📊 Rebuilding rollup tables...\n")
+        backfill_rollups(args.account)
+        return
+    
+    # Handle archive-logs command
+    if args.archive_logs:
+        print_banner()
+        print("\n🗄️  Archiving old activity logs...\n")
+        archive_logs(args.account)
+        return
+    
     # Determine account folder based on --account parameter
     account_folder = None
     if args.account:
@@ -190,7 +322,7 @@ Multi-Account Examples:
         bot = BotAutomation(account_folder=account_folder)
         
         async def test():
-            success = await bot.initialize()
+            success = await bot.initialize(verify=True)
             if success:
                 print("\n✅ Connection test passed!")
                 print(f"   Logged in as: @{bot.twitter.me.screen_name}")
@@ -203,10 +335,10 @@ Multi-Account Examples:
         asyncio.run(test())
     
     elif args.run_once:
-        asyncio.run(run_once(args.run_once, account_folder))
+        asyncio.run(run_once(args.run_once, account_folder, args.account))
     
     elif args.daemon:
-        asyncio.run(run_scheduled(account_folder))
+        asyncio.run(run_scheduled(account_folder, args.account))
     
     else:
         print_banner()
@@ -0,0 +1,89 @@
+"""
+Deferred action queue
+Queued actions reserve the rate limit budget and run under the scheduler's concurrency cap
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from bot.action_queue import LIKE, DeferredActionQueue
+from bot.async_database import AsyncDatabase
+from bot.clock import VirtualClock
+from bot.config_loader import ConfigLoader
+from bot.database import Database
+from bot.scheduler import SlotScheduler
+from bot.twitter_client import TwitterClient
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(datetime(2026, 1, 5, 9, 0).timestamp())
+
+
+def make_tweet(tweet_id: int):
+    user = SimpleNamespace(id=f'u{tweet_id}', screen_name=f'user{tweet_id}')
+    return SimpleNamespace(id=str(tweet_id), user=user)
+
+
+def test_enqueued_likes_reserve_the_budget(tmp_path, clock):
+    db = AsyncDatabase(Database(db_path=str(tmp_path / "metrics.db"), clock=clock), inline=True)
+    twitter = TwitterClient('cookies.json', ConfigLoader('config'), db, clock=clock)
+    twitter.me = SimpleNamespace(id='me')
+    
+    async def search(query, product='Latest', count=20, max_pages=None):
+        for tweet_id in range(20):
+            yield make_tweet(tweet_id)
+    
+    twitter.iter_search_tweets = search
+    queue = DeferredActionQueue(clock=clock)
+    
+    # likes_per_hour is 10 in config/settings.yaml
+    for _ in range(7):
+        twitter.limiter.record_action('likes')
+    assert twitter.limiter.remaining('likes') == 3
+    
+    async def scenario():
+        assert await twitter.search_and_like('kuota', max_like=5, queue=queue) == 3
+        assert await twitter.search_and_like('kuota', max_like=5, queue=queue) == 0
+    
+    clock.run(scenario())
+    assert queue.pending(LIKE) == 3
+
+
+def test_queued_actions_share_their_slots_permit(clock):
+    scheduler = SlotScheduler(clock, max_concurrent=1)
+    queue_a = DeferredActionQueue('a', clock=clock)
+    queue_b = DeferredActionQueue('b', clock=clock)
+    ran = []
+    
+    async def action(name):
+        ran.append((name, clock.time()))
+        await clock.sleep(60)
+        return True
+    
+    async def slot_a():
+        # Waits for its own queued action while holding the only place
+        async with scheduler.permit('a'):
+            queue_a.enqueue(LIKE, lambda: action('a'))
+            queue_b.enqueue(LIKE, lambda: action('b'))
+            assert await queue_a.join(timeout=600)
+            assert scheduler.get_dispatch_status()['executing'] == 1
+            await clock.sleep(60)
+    
+    async def scenario():
+        started = clock.time()
+        queue_a.start(lambda: scheduler.permit('a'))
+        queue_b.start(lambda: scheduler.permit('b'))
+        await slot_a()
+        assert await queue_b.join(timeout=600)
+        await queue_a.stop()
+        await queue_b.stop()
+        return started
+    
+    started = clock.run(scenario())
+    
+    # a's action ran inside a's slot; b's waited until the slot let go
+    assert ran == [('a', started), ('b', started + 120)]
+    assert scheduler.peak_concurrent == 1
@@ -0,0 +1,36 @@
+"""
+Call metrics
+Latency histogram percentiles
+"""
+
+from bot.call_metrics import LatencyHistogram
+
+
+def test_percentile_is_capped_at_the_slowest_call():
+    histogram = LatencyHistogram()
+    for ms in (120, 130, 140):
+        histogram.record(ms)
+    
+    # Every call falls in the 250ms bucket, but none took longer than 140ms
+    assert histogram.percentile(50) == 140
+    assert histogram.percentile(99) == 140
+
+
+def test_percentile_uses_bucket_bound_below_the_max():
+    histogram = LatencyHistogram()
+    for ms in [20] * 9 + [400]:
+        histogram.record(ms)
+    
+    assert histogram.percentile(50) == 25
+    assert histogram.percentile(99) == 400
+
+
+def test_overflow_bucket_reports_the_max():
+    histogram = LatencyHistogram()
+    histogram.record(150000)
+    
+    assert histogram.percentile(99) == 150000
+
+
+def test_empty_histogram_has_no_percentiles():
+    assert LatencyHistogram().percentile(50) is None
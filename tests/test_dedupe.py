@@ -0,0 +1,124 @@
+"""
+Reply dedupe index
+Bloom filter false positives are confirmed against the database, never trusted
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from bot.clock import VirtualClock
+from bot.database import Database
+from bot.dedupe import BloomFilter, ReplyDedupeIndex
+
+
+def tweet(tweet_id, author='someone'):
+    return SimpleNamespace(id=tweet_id, author=author)
+
+
+def author_of(t) -> str:
+    return t.author
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(datetime(2026, 1, 5, 22, 0, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.fixture
+def db(tmp_path, clock):
+    database = Database(db_path=str(tmp_path / "metrics.db"), clock=clock)
+    yield database
+    database.close()
+
+
+def reply(db, index, tweet_id, author):
+    db.add_replied_tweet(str(tweet_id), author, 'text', f'r{tweet_id}', 'reply')
+    index.add(str(tweet_id), author)
+
+
+# ============= BLOOM FILTER =============
+
+def test_no_false_negatives():
+    bloom = BloomFilter(10000)
+    for i in range(10000):
+        bloom.add(f'seen{i}')
+    
+    assert all(f'seen{i}' in bloom for i in range(10000))
+
+
+def test_false_positive_rate_at_capacity():
+    bloom = BloomFilter(10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f'seen{i}')
+    
+    false_positives = sum(f'new{i}' in bloom for i in range(50000))
+    assert false_positives / 50000 < 0.015
+
+
+def test_sizing():
+    bloom = BloomFilter(1000000, error_rate=0.01)
+    
+    # ~9.6 bits and 7 hashes per key at 1%
+    assert 1150000 < len(bloom.bits) < 1250000
+    assert bloom.num_hashes == 7
+
+
+def test_is_full_past_capacity():
+    bloom = BloomFilter(2)
+    bloom.add('a')
+    bloom.add('b')
+    assert not bloom.is_full()
+    bloom.add('c')
+    assert bloom.is_full()
+
+
+# ============= INDEX =============
+
+def test_false_positives_are_confirmed_not_dropped(db):
+    # A tiny, overloaded filter answers "maybe" for almost everything
+    index = ReplyDedupeIndex(db, min_capacity=1, error_rate=0.5)
+    index.load()
+    for i in range(50):
+        reply(db, index, i, f'author{i}')
+    
+    candidates = [tweet(i) for i in range(40, 140)]
+    kept = index.filter_new(candidates, author_of)
+    
+    assert [t.id for t in kept] == list(range(50, 140))
+    stats = index.get_stats()
+    assert stats['false_positives'] == stats['bloom_hits'] - 10
+    assert stats['false_positives'] > 0
+
+
+def test_loads_existing_replies(db):
+    for i in range(5):
+        db.add_replied_tweet(str(i), f'author{i}', 'text', f'r{i}', 'reply')
+    
+    index = ReplyDedupeIndex(db, min_capacity=100)
+    kept = index.filter_new([tweet(3), tweet(7)], author_of)
+    
+    assert [t.id for t in kept] == [7]
+    assert index.get_stats()['tweets_indexed'] == 5
+
+
+def test_full_filter_is_rebuilt_larger(db):
+    index = ReplyDedupeIndex(db, min_capacity=4)
+    index.load()
+    for i in range(6):
+        reply(db, index, i, f'author{i}')
+    
+    index.filter_new([tweet(99)], author_of)
+    assert index.get_stats()['capacity'] == 12
+
+
+def test_authors_reset_at_utc_midnight(db, clock):
+    index = ReplyDedupeIndex(db, min_capacity=100)
+    index.load()
+    reply(db, index, 1, 'alice')
+    
+    assert index.filter_new([tweet(2, 'alice')], author_of) == []
+    
+    clock.advance(3 * 3600)
+    assert [t.id for t in index.filter_new([tweet(2, 'alice')], author_of)] == [2]
@@ -0,0 +1,90 @@
+"""
+Fake X API
+The real twikit client against the in-process fake API on a virtual clock
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from bot.async_database import AsyncDatabase
+from bot.clock import VirtualClock
+from bot.config_loader import ConfigLoader
+from bot.database import Database
+from bot.fake_api import FakeXAPI, FakeXTransport, fake_cookies
+from bot.search_cache import get_search_cache
+from bot.twitter_client import TwitterClient
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(datetime(2026, 1, 5, 9, 0).timestamp())
+
+
+@pytest.fixture
+def account(tmp_path):
+    cookies = tmp_path / "cookies.json"
+    cookies.write_text(json.dumps(fake_cookies('tester')))
+    # Results of other tests' fake APIs must not be served from the shared cache
+    get_search_cache().invalidate()
+    return {'cookies': str(cookies), 'db_path': str(tmp_path / "metrics.db")}
+
+
+def make_client(account, api, clock) -> TwitterClient:
+    db = AsyncDatabase(Database(db_path=account['db_path'], clock=clock), inline=True)
+    return TwitterClient(account['cookies'], ConfigLoader('config'), db,
+                         account_id='tester', clock=clock, transport=FakeXTransport(api))
+
+
+def test_search_results_are_deterministic(account, clock):
+    async def search(api):
+        twitter = make_client(account, api, clock)
+        assert await twitter.setup()
+        tweets = await twitter.search_tweets('kuota xl', count=20)
+        await twitter.cleanup()
+        return [(tweet.id, tweet.user.screen_name) for tweet in tweets]
+    
+    first = clock.run(search(FakeXAPI(clock=clock, seed=7)))
+    again = clock.run(search(FakeXAPI(clock=clock, seed=7)))
+    
+    assert len(first) == 20
+    assert first == again
+
+
+def test_liked_tweets_are_not_liked_again_after_a_restart(account, clock):
+    api = FakeXAPI(clock=clock, seed=1)
+    
+    async def like(max_like):
+        # A fresh client each time, as after a restart
+        twitter = make_client(account, api, clock)
+        assert await twitter.setup()
+        liked = await twitter.search_and_like('kuota xl', max_like=max_like)
+        await twitter.cleanup()
+        return liked
+    
+    assert clock.run(like(3)) == 3
+    assert clock.run(like(3)) == 3
+    
+    favorites = api.get_stats()['endpoints']['favorite_tweet']
+    assert favorites == {'ok': 6}
+    assert len(api.accounts['tester'].favorites) == 6
+
+
+def test_rate_limited_endpoint_is_recorded(account, clock):
+    api = FakeXAPI(clock=clock, endpoint_limits={'search_timeline': (1, 900)})
+    
+    async def search_twice():
+        twitter = make_client(account, api, clock)
+        assert await twitter.setup()
+        await twitter.search_tweets('kuota', count=20)
+        get_search_cache().invalidate()
+        result = await twitter.search_tweets('kuota', count=20)
+        stats = twitter.call_metrics.get_stats('tester')['accounts']['tester']['search_tweet']
+        await twitter.cleanup()
+        return result, stats
+    
+    result, stats = clock.run(search_twice())
+    
+    assert api.get_stats()['endpoints']['search_timeline']['rate_limited'] >= 1
+    assert stats['rate_limited'] >= 1
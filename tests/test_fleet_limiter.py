@@ -0,0 +1,149 @@
+"""
+Fleet rate limiter
+Fair-share budgets in the shared ledger, and the account actions that draw on them
+"""
+
+import subprocess
+import sys
+import textwrap
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from bot.async_database import AsyncDatabase
+from bot.clock import VirtualClock
+from bot.config_loader import ConfigLoader
+from bot.database import Database
+from bot.fleet_limiter import FleetRateLimiter
+from bot.twitter_client import TwitterClient
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Registers an account, then tries to take `attempts` tweets from the
+# shared ledger; prints how many were granted
+GRABBER = textwrap.dedent("""
+    import sys
+    
+    from bot.fleet_limiter import FleetRateLimiter
+    
+    db_path, account_id, attempts = sys.argv[1], sys.argv[2], int(sys.argv[3])
+    fleet = FleetRateLimiter({'tweets_per_hour': 25}, db_path=db_path)
+    fleet.register(account_id)
+    print(sum(fleet.try_acquire(account_id, 'tweets') == 0 for _ in range(attempts)))
+""")
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(datetime(2026, 1, 5, 9, 0).timestamp())
+
+
+def make_fleet(tmp_path, clock, **limits) -> FleetRateLimiter:
+    return FleetRateLimiter(limits, db_path=str(tmp_path / "fleet.db"),
+                            clock=clock.time, sleep=clock.sleep)
+
+
+def test_replies_draw_on_the_fleet_tweet_budget(tmp_path, clock):
+    fleet = make_fleet(tmp_path, clock, tweets_per_hour=2)
+    db = AsyncDatabase(Database(db_path=str(tmp_path / "metrics.db"), clock=clock), inline=True)
+    twitter = TwitterClient('cookies.json', ConfigLoader('config'), db,
+                            fleet_limiter=fleet, account_id='account1', clock=clock)
+    
+    async def scenario():
+        assert await twitter._acquire('replies')
+        assert await twitter._acquire('tweets')
+        assert fleet.get_status('account1')['tweets']['per_hour']['own'] == 2
+        
+        # Budget spent by a reply and a tweet: neither may go out
+        assert not await twitter._acquire('replies')
+        assert not await twitter._acquire('tweets')
+        
+        await twitter._release('replies')
+        assert fleet.get_status('account1')['tweets']['per_hour']['own'] == 1
+        assert await twitter._acquire('tweets')
+    
+    clock.run(scenario())
+    fleet.close()
+
+
+def test_fair_share_between_active_accounts(tmp_path, clock):
+    fleet = make_fleet(tmp_path, clock, likes_per_hour=10)
+    for account_id in ('a', 'b', 'c'):
+        fleet.register(account_id)
+    
+    # ceil(10 / 3) = 4 each
+    granted = [fleet.try_acquire('a', 'likes') for _ in range(5)]
+    assert granted[:4] == [0, 0, 0, 0]
+    assert granted[4] == pytest.approx(3600)
+    
+    assert fleet.get_status('a')['likes']['per_hour'] == {'total': 4, 'limit': 10, 'own': 4, 'share': 4}
+    fleet.close()
+
+
+def test_share_grows_when_accounts_leave(tmp_path, clock):
+    fleet = make_fleet(tmp_path, clock, likes_per_hour=10)
+    fleet.register('a')
+    fleet.register('b')
+    
+    assert sum(fleet.try_acquire('a', 'likes') == 0 for _ in range(10)) == 5
+    
+    fleet.unregister('b')
+    assert sum(fleet.try_acquire('a', 'likes') == 0 for _ in range(10)) == 5
+    fleet.close()
+
+
+def test_idle_accounts_stop_counting(tmp_path, clock):
+    fleet = FleetRateLimiter({'likes_per_hour': 10}, db_path=str(tmp_path / "fleet.db"),
+                             member_ttl=600, clock=clock.time, sleep=clock.sleep)
+    fleet.register('a')
+    fleet.register('b')
+    assert fleet.get_status()['active_accounts'] == 2
+    
+    clock.advance(300)
+    fleet.register('a')
+    clock.advance(400)
+    assert fleet.get_status()['active_accounts'] == 1
+    fleet.close()
+
+
+def test_total_limit_binds_before_the_share(tmp_path, clock):
+    fleet = make_fleet(tmp_path, clock, likes_per_hour=5)
+    fleet.register('a')
+    fleet.register('b')
+    
+    # Shares are ceil(5 / 2) = 3, but only 5 fit in the hour
+    assert sum(fleet.try_acquire('a', 'likes') == 0 for _ in range(3)) == 3
+    assert sum(fleet.try_acquire('b', 'likes') == 0 for _ in range(3)) == 2
+    
+    clock.advance(1800)
+    fleet.release('b', 'likes')
+    assert fleet.try_acquire('b', 'likes') == 0
+    assert fleet.try_acquire('b', 'likes') == pytest.approx(1800)
+    fleet.close()
+
+
+def test_unlimited_actions_are_not_recorded(tmp_path, clock):
+    fleet = make_fleet(tmp_path, clock, likes_per_hour=1)
+    assert all(fleet.try_acquire('a', 'follows') == 0 for _ in range(10))
+    assert 'follows' not in fleet.get_status()
+    fleet.close()
+
+
+def test_processes_share_one_budget(tmp_path):
+    db_path = str(tmp_path / "fleet.db")
+    FleetRateLimiter({'tweets_per_hour': 25}, db_path=db_path).close()
+    
+    grabbers = [
+        subprocess.Popen([sys.executable, '-c', GRABBER, db_path, f'account{i}', '20'],
+                         cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        for i in range(4)
+    ]
+    granted = [int(grabber.communicate()[0]) for grabber in grabbers]
+    assert all(grabber.returncode == 0 for grabber in grabbers)
+    
+    # BEGIN IMMEDIATE serializes every decision: never more than the limit
+    assert sum(granted) == 25
+    fleet = FleetRateLimiter({'tweets_per_hour': 25}, db_path=db_path)
+    assert fleet.get_status()['tweets']['per_hour']['total'] == 25
+    fleet.close()
@@ -0,0 +1,37 @@
+"""
+Liked tweets
+Liked tweet ids survive a restart, so an account never likes a tweet twice
+"""
+
+from datetime import datetime
+
+from bot.clock import VirtualClock
+from bot.database import Database
+
+
+def test_liked_ids_survive_reopen(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    clock = VirtualClock(datetime(2026, 1, 5, 9, 0).timestamp())
+    
+    db = Database(db_path=path, clock=clock)
+    for tweet_id in ('101', '102', '103'):
+        db.record_liked_tweet(tweet_id)
+        clock.advance(60)
+    db.close()
+    
+    reopened = Database(db_path=path, clock=clock)
+    assert reopened.get_liked_tweet_ids() == ['101', '102', '103']
+    assert reopened.get_liked_tweet_ids(limit=2) == ['102', '103']
+    reopened.close()
+
+
+def test_only_most_recent_likes_are_kept(tmp_path):
+    clock = VirtualClock(datetime(2026, 1, 5, 9, 0).timestamp())
+    db = Database(db_path=str(tmp_path / "metrics.db"), clock=clock)
+    
+    for tweet_id in range(10):
+        db.record_liked_tweet(str(tweet_id), keep=4)
+        clock.advance(60)
+    
+    assert db.get_liked_tweet_ids() == ['6', '7', '8', '9']
+    db.close()
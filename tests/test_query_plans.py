@@ -0,0 +1,35 @@
+"""
+Dashboard query plans
+Every dashboard query must be answered by an index search on a migrated database
+"""
+
+import pytest
+
+from bot.database import DASHBOARD_QUERIES, Database
+from bot.migrations import SCHEMA_VERSION
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(db_path=str(tmp_path / "metrics.db"))
+    yield database
+    database.close()
+
+
+def test_database_is_migrated(db):
+    version = db.get_connection().execute("PRAGMA user_version").fetchone()[0]
+    assert version == SCHEMA_VERSION
+
+
+@pytest.mark.parametrize("name", sorted(DASHBOARD_QUERIES))
+def test_dashboard_query_is_index_search(db, name):
+    query, params = DASHBOARD_QUERIES[name]
+    cursor = db.get_connection().execute(f"EXPLAIN QUERY PLAN {query}", params)
+    details = [row['detail'] for row in cursor.fetchall()]
+    
+    assert not [detail for detail in details if detail.startswith('SCAN ')], details
+    assert [detail for detail in details if detail.startswith('SEARCH ') and ' USING ' in detail], details
+
+
+def test_check_query_plans_finds_nothing(db):
+    assert db.check_query_plans() == []
@@ -0,0 +1,124 @@
+"""
+Rate limiter
+Sliding windows, and restarts that keep the budget already spent
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from bot.async_database import AsyncDatabase
+from bot.clock import VirtualClock
+from bot.database import Database
+from bot.rate_limiter import SlidingWindowLimiter
+
+CONFIG = {'rate_limits': {'likes_per_hour': 3, 'likes_per_day': 5}}
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(datetime(2026, 1, 5, 9, 0).timestamp())
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "metrics.db")
+
+
+def make_limiter(db_path, clock, inline=True) -> SlidingWindowLimiter:
+    db = AsyncDatabase(Database(db_path=db_path, clock=clock), inline=inline)
+    return SlidingWindowLimiter(CONFIG, db, clock=clock.time, sleep=clock.sleep)
+
+
+def test_hour_window_slides(clock):
+    limiter = SlidingWindowLimiter(CONFIG, clock=clock.time)
+    
+    for _ in range(3):
+        limiter.record_action('likes')
+        clock.advance(600)
+    
+    assert not limiter.can_perform('likes')
+    assert limiter.remaining('likes') == 0
+    # The first like leaves the hour 3600s after it was recorded
+    assert limiter.wait_time('likes') == pytest.approx(1800)
+    
+    clock.advance(1800)
+    assert limiter.can_perform('likes')
+    assert limiter.remaining('likes') == 1
+
+
+def test_day_window_outlasts_the_hour(clock):
+    limiter = SlidingWindowLimiter(CONFIG, clock=clock.time)
+    
+    for _ in range(5):
+        limiter.record_action('likes')
+        clock.advance(3600)
+    
+    assert limiter.remaining('likes') == 0
+    assert limiter.wait_time('likes') == pytest.approx(86400 - 5 * 3600)
+
+
+def test_release_gives_back_the_latest_action(clock):
+    limiter = SlidingWindowLimiter(CONFIG, clock=clock.time)
+    
+    for _ in range(3):
+        limiter.record_action('likes')
+    limiter.release('likes')
+    
+    assert limiter.get_status('likes')['hour_count'] == 2
+
+
+def test_acquire_waits_on_the_clock(clock):
+    limiter = SlidingWindowLimiter(CONFIG, clock=clock.time, sleep=clock.sleep)
+    
+    async def scenario():
+        for _ in range(3):
+            assert await limiter.acquire('likes', max_wait=0)
+        assert not await limiter.acquire('likes', max_wait=60)
+        
+        started = clock.time()
+        assert await limiter.acquire('likes')
+        return clock.time() - started
+    
+    assert clock.run(scenario()) == pytest.approx(3600)
+
+
+def test_state_survives_a_restart(db_path, clock):
+    limiter = make_limiter(db_path, clock)
+    for _ in range(3):
+        limiter.record_action('likes')
+        clock.advance(60)
+    
+    restarted = make_limiter(db_path, clock)
+    assert restarted.get_status('likes')['hour_count'] == 3
+    assert restarted.get_status('likes')['day_count'] == 3
+    assert not restarted.can_perform('likes')
+
+
+def test_expired_events_are_not_reloaded(db_path, clock):
+    limiter = make_limiter(db_path, clock)
+    limiter.record_action('likes')
+    clock.advance(2 * 3600)
+    limiter.record_action('likes')
+    
+    clock.advance(23 * 3600)
+    restarted = make_limiter(db_path, clock)
+    assert restarted.get_status('likes') == {
+        'hour_count': 0, 'hour_limit': 3,
+        'day_count': 1, 'day_limit': 5,
+        'can_perform': True, 'wait_seconds': 0.0
+    }
+
+
+def test_saves_queued_on_the_writer_thread(db_path, clock):
+    limiter = make_limiter(db_path, clock, inline=False)
+    for _ in range(2):
+        limiter.record_action('likes')
+    limiter.release('likes')
+    
+    # close() waits for the queued saves
+    asyncio.run(limiter.db.close())
+    
+    restarted = make_limiter(db_path, clock)
+    assert restarted.get_status('likes')['hour_count'] == 1
@@ -0,0 +1,58 @@
+"""
+Rollup days
+Tweet aggregates in stats_daily use the same local day as the activity counters
+"""
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from bot.clock import VirtualClock
+from bot.database import Database
+
+
+@pytest.fixture
+def jakarta(monkeypatch):
+    """Run in UTC+7, where local midnight is 17:00 UTC"""
+    monkeypatch.setenv('TZ', 'Asia/Jakarta')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def utc(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def daily_rows(db):
+    rows = db.get_connection().execute("""
+        SELECT date, tweets_posted, tweet_count FROM stats_daily ORDER BY date
+    """).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def post(db, tweet_id):
+    db.add_tweet(tweet_id, f'tweet {tweet_id}')
+    db.increment_activity('tweet')
+
+
+def test_tweets_across_local_midnight(jakarta, tmp_path):
+    # 23:30 and 00:30 local: one UTC day, two local days
+    clock = VirtualClock(utc(2026, 1, 5, 16, 30))
+    db = Database(db_path=str(tmp_path / "metrics.db"), clock=clock)
+    
+    post(db, '1')
+    clock.advance(3600)
+    post(db, '2')
+    
+    expected = [('2026-01-05', 1, 1), ('2026-01-06', 1, 1)]
+    assert daily_rows(db) == expected
+    
+    db.update_tweet_stats('1', views=100, likes=5, retweets=0, replies=0)
+    assert daily_rows(db) == expected
+    
+    db.backfill_rollups()
+    assert daily_rows(db) == expected
+    db.close()
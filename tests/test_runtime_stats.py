@@ -0,0 +1,118 @@
+"""
+Runtime stats
+Stats filled in one process must be readable from another through the shared file
+"""
+
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from bot.runtime_stats import RuntimeStats
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Fills this process's search cache (two misses, one hit) and call
+# metrics (two searches, one rate limited), opens an HTTP pool, then
+# publishes them
+PUBLISHER = textwrap.dedent("""
+    import asyncio
+    import sys
+    
+    from bot.call_metrics import OK, RATE_LIMITED, get_call_metrics
+    from bot.http_pool import get_registry
+    from bot.runtime_stats import RuntimeStats
+    from bot.search_cache import get_search_cache
+    
+    async def fetch():
+        return ['tweet']
+    
+    async def main():
+        cache = get_search_cache()
+        await cache.get_or_fetch('a', fetch)
+        await cache.get_or_fetch('b', fetch)
+        await cache.get_or_fetch('a', fetch)
+        
+        get_call_metrics().record('account1', 'search_tweet', OK, 0.2)
+        get_call_metrics().record('account1', 'search_tweet', RATE_LIMITED, 0.04)
+        
+        client = get_registry().client('twitter')
+        RuntimeStats(sys.argv[1]).publish()
+        await get_registry().release(client)
+    
+    asyncio.run(main())
+""")
+
+
+def publish_from_subprocess(db_path: str):
+    subprocess.run([sys.executable, '-c', PUBLISHER, db_path], cwd=ROOT, check=True)
+
+
+def test_search_cache_stats_from_another_process(tmp_path):
+    db_path = str(tmp_path / "runtime_stats.db")
+    publish_from_subprocess(db_path)
+    
+    stats = RuntimeStats(db_path).get_search_cache_stats()
+    
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['entries'] == 2
+    assert stats['hit_rate'] == 0.333
+    assert len(stats['processes']) == 1
+
+
+def test_search_cache_stats_sum_processes(tmp_path):
+    db_path = str(tmp_path / "runtime_stats.db")
+    publish_from_subprocess(db_path)
+    publish_from_subprocess(db_path)
+    
+    stats = RuntimeStats(db_path).get_search_cache_stats()
+    
+    assert stats['misses'] == 4
+    assert len(stats['processes']) == 2
+
+
+def test_stale_and_withdrawn_snapshots_are_ignored(tmp_path):
+    db_path = str(tmp_path / "runtime_stats.db")
+    now = [1000.0]
+    publisher = RuntimeStats(db_path, clock=lambda: now[0])
+    reader = RuntimeStats(db_path, clock=lambda: now[0])
+    
+    publisher.publish()
+    assert len(reader.read('search_cache')) == 1
+    
+    now[0] += 3600
+    assert reader.read('search_cache') == []
+    
+    publisher.publish()
+    publisher.withdraw()
+    assert reader.read('search_cache') == []
+
+
+def test_call_stats_from_another_process(tmp_path):
+    db_path = str(tmp_path / "runtime_stats.db")
+    publish_from_subprocess(db_path)
+    publish_from_subprocess(db_path)
+    
+    stats = RuntimeStats(db_path).get_call_stats()
+    
+    search = stats['endpoints']['search_tweet']
+    assert search['count'] == 4
+    assert search['ok'] == 2
+    assert search['rate_limited'] == 2
+    assert search['buckets'] == {'le_50': 2, 'le_250': 2}
+    assert stats['accounts']['account1']['search_tweet']['max_ms'] == 200.0
+    
+    assert RuntimeStats(db_path).get_call_stats('account2')['accounts'] == {}
+
+
+def test_http_pool_stats_from_another_process(tmp_path):
+    db_path = str(tmp_path / "runtime_stats.db")
+    publish_from_subprocess(db_path)
+    
+    stats = RuntimeStats(db_path).get_http_pool_stats()
+    
+    assert [pool['upstream'] for pool in stats['pools']] == ['twitter']
+    assert stats['pools'][0]['clients'] == 1
+    assert stats['pools'][0]['source'] == stats['processes'][0]['source']
+    assert stats['per_host_limit'] == 10
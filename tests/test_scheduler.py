@@ -0,0 +1,218 @@
+"""
+Slot scheduler
+Cron parsing, DST transitions and catch-up of missed occurrences on a virtual clock
+"""
+
+import asyncio
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from bot.async_database import AsyncDatabase
+from bot.clock import VirtualClock
+from bot.database import Database
+from bot.scheduler import ALL, LATEST, SKIP, CronExpression, ScheduledSlot, SlotScheduler
+
+JAKARTA = ZoneInfo('Asia/Jakarta')
+NEW_YORK = ZoneInfo('America/New_York')
+
+
+def at(tz, *args) -> float:
+    return datetime(*args, tzinfo=tz).timestamp()
+
+
+def wall(tz, ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz).strftime('%Y-%m-%d %H:%M')
+
+
+# ============= CRON =============
+
+def test_fields_are_expanded():
+    cron = CronExpression('*/15 8-20/4 1,15 * 1-5')
+    
+    assert cron.minutes == [0, 15, 30, 45]
+    assert cron.hours == [8, 12, 16, 20]
+    assert cron.days == {1, 15}
+    assert cron.weekdays == {1, 2, 3, 4, 5}
+
+
+def test_daily_time_shorthand():
+    assert CronExpression('08:30').minutes == [30]
+    assert CronExpression('08:30').hours == [8]
+    # Unquoted 8:00 in YAML 1.1 arrives as 480
+    assert CronExpression(480).expression == '8:00'
+
+
+@pytest.mark.parametrize('expression', [
+    '* * * *', '60 * * * *', '* 24 * * *', '*/0 * * * *', '5-1 * * * *', 'a * * * *', '25:00'
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_sunday_is_0_and_7():
+    assert CronExpression('0 9 * * 0').weekdays == CronExpression('0 9 * * 7').weekdays == {0}
+
+
+def test_restricted_day_fields_match_either():
+    # The 13th, or any Friday
+    cron = CronExpression('0 9 13 * 5')
+    
+    fire = at(JAKARTA, 2026, 2, 1)
+    fires = []
+    for _ in range(3):
+        fire = cron.next_after(fire, JAKARTA)
+        fires.append(wall(JAKARTA, fire))
+    
+    assert fires == ['2026-02-06 09:00', '2026-02-13 09:00', '2026-02-20 09:00']
+
+
+def test_next_fire_is_strictly_after():
+    cron = CronExpression('0 8 * * *')
+    
+    assert wall(JAKARTA, cron.next_after(at(JAKARTA, 2026, 1, 5, 7, 59), JAKARTA)) == '2026-01-05 08:00'
+    assert wall(JAKARTA, cron.next_after(at(JAKARTA, 2026, 1, 5, 8, 0), JAKARTA)) == '2026-01-06 08:00'
+
+
+def test_leap_day():
+    cron = CronExpression('0 12 29 2 *')
+    assert wall(JAKARTA, cron.next_after(at(JAKARTA, 2026, 3, 1), JAKARTA)) == '2028-02-29 12:00'
+
+
+def test_never_fires():
+    with pytest.raises(ValueError):
+        CronExpression('0 0 31 2 *').next_after(at(JAKARTA, 2026, 1, 1), JAKARTA)
+
+
+# ============= DST =============
+
+def test_time_skipped_by_spring_forward_does_not_fire():
+    # 2026-03-08 02:00 EST jumps to 03:00 EDT
+    cron = CronExpression('30 2 * * *')
+    fire = cron.next_after(at(NEW_YORK, 2026, 3, 7, 12), NEW_YORK)
+    
+    assert wall(NEW_YORK, fire) == '2026-03-09 02:30'
+
+
+def test_time_repeated_by_fall_back_fires_once():
+    # 2026-11-01 01:00-02:00 happens twice
+    cron = CronExpression('30 1 * * *')
+    
+    first = cron.next_after(at(NEW_YORK, 2026, 10, 31, 12), NEW_YORK)
+    second = cron.next_after(first, NEW_YORK)
+    
+    assert wall(NEW_YORK, first) == '2026-11-01 01:30'
+    assert wall(NEW_YORK, second) == '2026-11-02 01:30'
+    assert second - first == 25 * 3600
+
+
+def test_hourly_slots_across_fall_back():
+    cron = CronExpression('0 * * * *')
+    
+    fire = at(NEW_YORK, 2026, 11, 1, 0, 30)
+    fires = []
+    for _ in range(3):
+        fire = cron.next_after(fire, NEW_YORK)
+        fires.append(fire)
+    
+    # As in cron, the repeated 01:00 local runs once (EDT), not twice
+    assert [wall(NEW_YORK, fire) for fire in fires] == [
+        '2026-11-01 01:00', '2026-11-01 02:00', '2026-11-01 03:00'
+    ]
+    assert [b - a for a, b in zip(fires, fires[1:])] == [7200, 3600]
+
+
+# ============= SCHEDULER =============
+
+@pytest.fixture
+def clock():
+    return VirtualClock(at(JAKARTA, 2026, 1, 5, 12, 0))
+
+
+@pytest.fixture
+def db(tmp_path, clock):
+    database = Database(db_path=str(tmp_path / "metrics.db"), clock=clock)
+    yield AsyncDatabase(database, inline=True)
+    database.close()
+
+
+def hourly_slot(clock, runs, catch_up=LATEST, database=None, name='hourly', **kwargs):
+    async def run():
+        runs.append(wall(JAKARTA, clock.time()))
+        await clock.sleep(60)
+    
+    return ScheduledSlot('account1', name, CronExpression('0 * * * *'), run, tz=JAKARTA,
+                         catch_up=catch_up, database=database, **kwargs)
+
+
+def run_scheduler(clock, slots, seconds, max_concurrent=None) -> SlotScheduler:
+    scheduler = SlotScheduler(clock, max_concurrent=max_concurrent)
+    
+    async def scenario():
+        await scheduler.add(slots)
+        task = asyncio.create_task(scheduler.run())
+        await clock.sleep(seconds)
+        scheduler.stop()
+        await task
+    
+    clock.run(scenario())
+    return scheduler
+
+
+def test_fires_on_time_without_polling(clock):
+    runs = []
+    run_scheduler(clock, [hourly_slot(clock, runs)], 3 * 3600 - 1)
+    
+    assert runs == ['2026-01-05 13:00', '2026-01-05 14:00']
+    # One wake-up per fire plus the slot's own sleep, not one per poll interval
+    assert clock.wakeups < 20
+
+
+@pytest.mark.parametrize('catch_up, expected_runs, skipped', [
+    # Missed 10:00 and 11:00 while down; 12:00 is due now
+    (LATEST, ['2026-01-05 12:00'], 2),
+    # 10:00 is two hours late, past the one-hour grace
+    (ALL, ['2026-01-05 12:00', '2026-01-05 12:01'], 1),
+    (SKIP, ['2026-01-05 12:00'], 2),
+])
+def test_catch_up_after_restart(clock, db, catch_up, expected_runs, skipped):
+    db.sync.save_schedule_state('hourly', at(JAKARTA, 2026, 1, 5, 9, 0), 'ok')
+    runs = []
+    slot = hourly_slot(clock, runs, catch_up=catch_up, database=db)
+    
+    run_scheduler(clock, [slot], 30 * 60)
+    
+    assert runs == expected_runs
+    assert slot.skipped == skipped
+    assert db.sync.get_schedule_state()['hourly']['last_fire'] == at(JAKARTA, 2026, 1, 5, 12, 0)
+
+
+def test_missed_beyond_grace_is_skipped(clock, db):
+    # Last handled 11:00; 12:00 is due but the grace is only 0 minutes
+    db.sync.save_schedule_state('hourly', at(JAKARTA, 2026, 1, 5, 11, 0), 'ok')
+    clock.advance(5 * 60)
+    runs = []
+    slot = hourly_slot(clock, runs, catch_up=LATEST, database=db, misfire_grace=0)
+    
+    run_scheduler(clock, [slot], 60 * 60)
+    
+    assert runs == ['2026-01-05 13:00']
+    assert slot.skipped == 1
+    assert db.sync.get_schedule_state()['hourly']['last_status'] == 'ok'
+
+
+def test_max_concurrent_queues_other_accounts(clock):
+    runs = []
+    
+    def slot_of(account_id):
+        async def run():
+            runs.append((account_id, wall(JAKARTA, clock.time())))
+            await clock.sleep(10 * 60)
+        return ScheduledSlot(account_id, 'hourly', CronExpression('0 * * * *'), run, tz=JAKARTA)
+    
+    scheduler = run_scheduler(clock, [slot_of('a'), slot_of('b')], 90 * 60, max_concurrent=1)
+    
+    assert sorted(runs) == [('a', '2026-01-05 13:00'), ('b', '2026-01-05 13:10')]
+    assert scheduler.peak_concurrent == 1